@@ -0,0 +1,141 @@
+# =====================================================
+# EduFin Credit Solutions - Arrow Hand-off Between Spark and pandas
+# Explicit-schema, Arrow-backed conversions in both directions
+# =====================================================
+
+# Data crosses the Spark / Python boundary in a few places: driver-side
+# dimensions (institutions, city and profile lookups, Faker pools) go up to
+# Spark, loans go down to the amortization engine (mapInPandas), and bcp_export
+# streams sorted tables back to the driver. Every crossing goes through Arrow
+# record batches with a schema given up front, never through Row objects or
+# lists of dicts, so nothing is inferred row by row:
+#
+#     institutions_df = to_spark(spark, institutions, 'institutions')
+#     for chunk in spark_chunks(payments_df, 200000, key='payment_id'): ...
+#
+# If Spark cannot use Arrow (disabled in the session, or a type it cannot
+# convert) it falls back to row-by-row conversion; that is reported, not silent.
+# Only pyspark's own pandas / pyarrow support is required.
+
+import math
+import warnings
+
+# Applied by spark_backend.get_spark_session
+ARROW_CONF = {
+    'spark.sql.execution.arrow.pyspark.enabled': 'true',
+    # Keep working without Arrow, but every fallback is reported (see _report_fallbacks)
+    'spark.sql.execution.arrow.pyspark.fallback.enabled': 'true',
+    # Rows per Arrow batch, also the mapInPandas batch size: the amortization engine
+    # is vectorized per batch, so the 10,000 default spends more time in per-batch overhead
+    'spark.sql.execution.arrow.maxRecordsPerBatch': '50000'
+}
+
+
+def _spark_types():
+    from pyspark.sql.types import ByteType, IntegerType, LongType, ShortType
+
+    return {'TINYINT': ByteType(), 'SMALLINT': ShortType(), 'INT': IntegerType(), 'BIGINT': LongType()}
+
+
+def spark_schema(frame):
+    """StructType for a pandas frame, from table_schemas types where the column is known
+
+    DECIMAL columns stay DoubleType here (Arrow will not convert float64 to
+    decimal128); spark_backend.compact_columns casts them once inside Spark.
+    """
+    import pandas as pd
+    from pyspark.sql.types import (BooleanType, DateType, DoubleType, LongType, StringType, StructField,
+                                   StructType, TimestampType)
+
+    from table_schemas import column_types
+
+    types = column_types()
+    integers = _spark_types()
+    fields = []
+    for name in frame.columns:
+        dtype = frame[name].dtype
+        sql_type = types.get(name)
+        if isinstance(dtype, pd.CategoricalDtype):
+            spark_type = StringType()
+        elif dtype.kind in 'iu':
+            spark_type = integers.get(sql_type, LongType())
+        elif dtype.kind == 'f':
+            spark_type = DoubleType()
+        elif dtype.kind == 'M':
+            spark_type = DateType() if sql_type == 'DATE' else TimestampType()
+        elif dtype.kind == 'b':
+            spark_type = BooleanType()
+        else:
+            spark_type = StringType()
+        fields.append(StructField(str(name), spark_type, True))
+    return StructType(fields)
+
+
+def _arrow_enabled(spark):
+    return spark.conf.get('spark.sql.execution.arrow.pyspark.enabled', 'false').lower() == 'true'
+
+
+def _report_fallbacks(caught, direction, name):
+    """Print the Arrow fallback warnings raised by createDataFrame / toPandas"""
+    fallbacks = [str(warning.message) for warning in caught if 'arrow' in str(warning.message).lower()]
+    for message in fallbacks:
+        print(f"   ⚠️ Arrow not used for {name} ({direction}), converted row by row: {message.splitlines()[0]}")
+    for warning in caught:
+        if str(warning.message) not in fallbacks:
+            warnings.warn_explicit(warning.message, warning.category, warning.filename, warning.lineno)
+    return bool(fallbacks)
+
+
+def to_spark(spark, frame, name):
+    """Driver-side pandas frame -> Spark DataFrame through Arrow, with an explicit schema"""
+    import pandas as pd
+
+    if not _arrow_enabled(spark):
+        print(f"   ⚠️ Arrow disabled in this session: {name} ({len(frame):,} rows) converted row by row")
+
+    # Categoricals go up as their values; Spark has no dictionary type
+    categorical = [column for column in frame.columns if isinstance(frame[column].dtype, pd.CategoricalDtype)]
+    frame = frame.astype({column: str for column in categorical})
+    schema = spark_schema(frame)
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        df = spark.createDataFrame(frame, schema=schema)
+    _report_fallbacks(caught, 'pandas -> Spark', name)
+    return df
+
+
+def spark_chunks(df, batch_rows, key=None, slice_rows=2000000, name='table'):
+    """Stream a Spark DataFrame to the driver as pandas batches converted through Arrow
+
+    The table is range-partitioned on `key` into slices of about `slice_rows`
+    rows, sorted within each slice, and each slice is fetched with one Arrow
+    toPandas() call, so batches come out in key order and driver memory stays
+    bounded by one slice. DECIMAL columns come back as float64 (as
+    table_schemas.frame_from_storage returns them), not as Python Decimals.
+    """
+    from pyspark.sql.functions import col, spark_partition_id
+    from pyspark.sql.types import DecimalType
+
+    spark = df.sparkSession
+    if not _arrow_enabled(spark):
+        print(f"   ⚠️ Arrow disabled in this session: {name} is streamed to the driver row by row")
+
+    columns = [col(field.name).cast('double').alias(field.name) if isinstance(field.dataType, DecimalType)
+               else col(field.name) for field in df.schema.fields]
+    slices = max(1, math.ceil(df.count() / slice_rows))
+    if key is not None:
+        df = df.repartitionByRange(slices, key).sortWithinPartitions(key)
+    else:
+        df = df.repartition(slices)
+    sliced = df.select(*columns, spark_partition_id().alias('_slice')).persist()
+
+    try:
+        for position in range(slices):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                frame = sliced.filter(col('_slice') == position).drop('_slice').toPandas()
+            _report_fallbacks(caught, 'Spark -> pandas', name)
+            for start in range(0, len(frame), batch_rows):
+                yield frame.iloc[start:start + batch_rows]
+    finally:
+        sliced.unpersist()
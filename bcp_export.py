@@ -0,0 +1,317 @@
+# =====================================================
+# EduFin Credit Solutions - SQL Server Native Bulk-Load Export
+# BCP XML format files + native binary data files + load script
+# =====================================================
+
+# Text CSV has to be parsed and converted by SQL Server on every load. Native
+# files carry values in SQL Server's own binary layout, described field by
+# field by an XML format file, so BULK INSERT only copies them into pages.
+#
+# Every field is written as NativePrefix (what `bcp -n` uses for nullable
+# columns): a length prefix followed by the raw bytes, with an all-ones prefix
+# meaning NULL.
+#   integers / float  1-byte prefix + little-endian SQLINT, SQLBIGINT or SQLFLT8
+#   dates             1-byte prefix + 3-byte SQLDATE (days since 0001-01-01)
+#   strings           2-byte prefix + UTF-16LE SQLNVARCHAR (converted to VARCHAR on load)
+# Part files are sorted on the table's clustered key, so the load script can
+# declare ORDER(...) and BULK INSERT skips its own sort. With TABLOCK into an
+# empty table the load is minimally logged.
+#
+# read_native_file() decodes the files back for offline verification.
+
+import json
+import os
+import shutil
+import struct
+
+import numpy as np
+import pandas as pd
+
+from ssms_export import pandas_chunks, parquet_chunks
+from table_schemas import TABLE_SCHEMAS, column_names
+
+# SQL Server type -> (format file type, byte width, NumPy little-endian dtype)
+_FIXED_TYPES = {
+    'INT': ('SQLINT', 4, '<i4'),
+    'BIGINT': ('SQLBIGINT', 8, '<i8'),
+    'FLOAT': ('SQLFLT8', 8, '<f8'),
+    'DATE': ('SQLDATE', 3, None)
+}
+_STRING_TYPE = 'SQLNVARCHAR'
+
+# Days from 0001-01-01 (SQLDATE day zero) to the Unix epoch
+_SQLDATE_EPOCH_OFFSET = 719162
+
+
+def native_type(sql_type):
+    """Format-file type of a SQL Server column type"""
+    base = sql_type.split('(')[0].upper()
+    if base in _FIXED_TYPES:
+        return _FIXED_TYPES[base][0]
+    if base in ('DECIMAL', 'NUMERIC', 'MONEY', 'REAL'):
+        return 'SQLFLT8'  # carried as double, converted exactly to the column scale on load
+    if base in ('TINYINT', 'SMALLINT'):
+        return 'SQLINT'
+    return _STRING_TYPE
+
+
+def _fixed_spec(sql_type):
+    return {'SQLINT': _FIXED_TYPES['INT'], 'SQLBIGINT': _FIXED_TYPES['BIGINT'],
+            'SQLFLT8': _FIXED_TYPES['FLOAT'], 'SQLDATE': _FIXED_TYPES['DATE']}.get(native_type(sql_type))
+
+# =====================================================
+# FORMAT FILES
+# =====================================================
+
+def format_file_xml(schema):
+    """XML BCP format file describing the native data files of a table"""
+
+    fields, columns = [], []
+    for position, (name, sql_type) in enumerate(schema['columns'], start=1):
+        spec = _fixed_spec(sql_type)
+        if spec is None:
+            fields.append(f'  <FIELD ID="{position}" xsi:type="NativePrefix" PREFIX_LENGTH="2"/>')
+        else:
+            fields.append(f'  <FIELD ID="{position}" xsi:type="NativePrefix" PREFIX_LENGTH="1" MAX_LENGTH="{spec[1]}"/>')
+        columns.append(f'  <COLUMN SOURCE="{position}" NAME="{name}" xsi:type="{native_type(sql_type)}"/>')
+
+    return "\n".join([
+        '<?xml version="1.0"?>',
+        '<BCPFORMAT xmlns="http://schemas.microsoft.com/sqlserver/2004/bulkload/format"',
+        '           xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">',
+        ' <RECORD>', *fields, ' </RECORD>',
+        ' <ROW>', *columns, ' </ROW>',
+        '</BCPFORMAT>'
+    ]) + "\n"
+
+# =====================================================
+# NATIVE ENCODING (vectorized per batch)
+# =====================================================
+
+def _prefixed(data, lengths):
+    """Keep the first `lengths[i]` bytes of each row of a byte matrix: (flat bytes, lengths)"""
+    return data[np.arange(data.shape[1]) < lengths[:, None]], lengths
+
+
+def _encode_fixed(values, spec):
+    """NativePrefix bytes of a fixed-width column: (flat bytes, per-row lengths)"""
+    _, width, dtype = spec
+    null = np.array(pd.isna(values))
+    if dtype is None:
+        days = pd.to_datetime(values).to_numpy().astype('datetime64[D]')
+        null |= np.isnat(days)
+        raw = (np.where(null, 0, days.astype(np.int64)) + _SQLDATE_EPOCH_OFFSET).astype('<i4')
+    else:
+        raw = np.where(null, 0, values.to_numpy(dtype=float if dtype == '<f8' else None, na_value=0)).astype(dtype)
+
+    data = np.empty((len(raw), 1 + width), dtype=np.uint8)
+    data[:, 0] = np.where(null, 0xFF, width)
+    data[:, 1:] = raw.view(np.uint8).reshape(len(raw), -1)[:, :width]
+    return _prefixed(data, np.where(null, 1, 1 + width))
+
+
+def _encode_string(values):
+    """NativePrefix bytes of a string column as UTF-16LE"""
+    null = pd.isna(values).to_numpy()
+    text = np.asarray(values.astype(object).where(~null, '').astype(str).to_numpy(), dtype=str)
+    count = len(text)
+    width = text.dtype.itemsize // 4
+    codes = text.view(np.uint32).reshape(count, width) if width else np.zeros((count, 0), dtype=np.uint32)
+
+    if (codes > 0xFFFF).any():
+        # Characters outside the BMP need surrogate pairs - encode those rows in Python
+        encoded = [s.encode('utf-16-le') for s in text]
+        byte_lengths = np.array([len(b) for b in encoded], dtype=np.int64)
+        data = np.zeros((count, 2 + int(byte_lengths.max(initial=0))), dtype=np.uint8)
+        for row, payload in enumerate(encoded):
+            data[row, 2:2 + len(payload)] = np.frombuffer(payload, dtype=np.uint8)
+    else:
+        byte_lengths = np.char.str_len(text).astype(np.int64) * 2
+        data = np.empty((count, 2 + 2 * width), dtype=np.uint8)
+        data[:, 2:] = codes.astype('<u2').view(np.uint8).reshape(count, 2 * width)
+
+    data[:, :2] = np.where(null, 0xFFFF, byte_lengths).astype('<u2').view(np.uint8).reshape(count, 2)
+    return _prefixed(data, np.where(null, 2, 2 + byte_lengths))
+
+
+def encode_native_rows(chunk, schema):
+    """Encode a pandas batch as native rows: fields interleaved row by row"""
+
+    encoded = []
+    for name, sql_type in schema['columns']:
+        spec = _fixed_spec(sql_type)
+        encoded.append(_encode_string(chunk[name]) if spec is None else _encode_fixed(chunk[name], spec))
+
+    lengths = np.stack([row_lengths for _, row_lengths in encoded], axis=1)
+    row_end = np.cumsum(lengths.sum(axis=1))
+    field_start = (row_end - lengths.sum(axis=1))[:, None] + np.cumsum(lengths, axis=1) - lengths
+
+    output = np.empty(int(row_end[-1]) if len(row_end) else 0, dtype=np.uint8)
+    for position, (flat, row_lengths) in enumerate(encoded):
+        # Scatter each column's contiguous bytes into its slot of every row
+        source_start = np.cumsum(row_lengths) - row_lengths
+        output[np.repeat(field_start[:, position] - source_start, row_lengths) + np.arange(len(flat))] = flat
+    return output.tobytes()
+
+# =====================================================
+# READING NATIVE FILES BACK
+# =====================================================
+
+def read_native_file(path, schema):
+    """Decode a native data file into a pandas DataFrame (for verification)"""
+
+    with open(path, 'rb') as handle:
+        buffer = handle.read()
+
+    specs = [(name, _fixed_spec(sql_type)) for name, sql_type in schema['columns']]
+    rows, position = [], 0
+    while position < len(buffer):
+        row = []
+        for name, spec in specs:
+            if spec is None:
+                length = struct.unpack_from('<H', buffer, position)[0]
+                position += 2
+                if length == 0xFFFF:
+                    row.append(None)
+                    continue
+                row.append(buffer[position:position + length].decode('utf-16-le'))
+            else:
+                length = buffer[position]
+                position += 1
+                if length == 0xFF:
+                    row.append(None)
+                    continue
+                raw = buffer[position:position + length]
+                if spec[0] == 'SQLDATE':
+                    days = int.from_bytes(raw, 'little') - _SQLDATE_EPOCH_OFFSET
+                    row.append(np.datetime64(days, 'D'))
+                else:
+                    row.append(np.frombuffer(raw, dtype=spec[2])[0].item())
+            position += length
+        rows.append(row)
+    return pd.DataFrame(rows, columns=[name for name, _ in specs])
+
+# =====================================================
+# TABLE EXPORT
+# =====================================================
+
+def _source_chunks(source, key, batch_rows, name):
+    if hasattr(source, 'sparkSession'):
+        # Range-sorted slices come to the driver as Arrow batches, not Row objects
+        from arrow_handoff import spark_chunks
+        return spark_chunks(source, batch_rows, key=key, name=name)
+    if isinstance(source, str):
+        return parquet_chunks(source, batch_rows)
+    # In-memory frames are sorted up front; streamed sources are checked as they go
+    if key is not None and not source[key].is_monotonic_increasing:
+        source = source.sort_values(key, kind='stable')
+    return pandas_chunks(source, batch_rows)
+
+
+def export_native_table(source, output_path, table_name, schema=None, rows_per_file=5000000, batch_rows=200000):
+    """Write one table as clustered-key-ordered native part files plus its XML format file"""
+
+    schema = schema or TABLE_SCHEMAS[table_name]
+    key = schema['clustered_key']
+    directory = os.path.join(output_path, table_name)
+    # Parts of a larger earlier export would otherwise be picked up by the load script
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+    format_path = os.path.join(output_path, f"{table_name}.fmt.xml")
+    with open(format_path, 'w', encoding='utf-8') as handle:
+        handle.write(format_file_xml(schema))
+
+    files, handle = [], None
+    ordered, last_key = key is not None, None
+    for chunk in _source_chunks(source, key, batch_rows, table_name):
+        chunk = chunk[column_names(schema)]
+        if key is not None and len(chunk):
+            keys = chunk[key]
+            # ORDER(...) may only be declared if the whole table really is sorted
+            if not keys.is_monotonic_increasing or (last_key is not None and keys.iloc[0] < last_key):
+                ordered = False
+            last_key = keys.iloc[-1]
+
+        start = 0
+        while start < len(chunk):
+            if handle is None or files[-1]['rows'] >= rows_per_file:
+                if handle is not None:
+                    handle.close()
+                path = os.path.join(directory, f"part-{len(files):05d}.dat")
+                handle = open(path, 'wb')
+                files.append({'path': path, 'rows': 0})
+            take = min(rows_per_file - files[-1]['rows'], len(chunk) - start)
+            handle.write(encode_native_rows(chunk.iloc[start:start + take], schema))
+            files[-1]['rows'] += take
+            start += take
+
+    if handle is not None:
+        handle.close()
+    for entry in files:
+        entry['bytes'] = os.path.getsize(entry['path'])
+
+    return {
+        'target_table': schema['target_table'],
+        'format_file': format_path,
+        'clustered_key': key,
+        'ordered': ordered,
+        'rows': sum(entry['rows'] for entry in files),
+        'files': files
+    }
+
+# =====================================================
+# LOAD SCRIPT
+# =====================================================
+
+def bulk_load_script(manifest, data_root=None, batch_size=100000):
+    """T-SQL script loading every native part file with its format file
+
+    `data_root` replaces the export directory in paths when SQL Server sees
+    the files elsewhere (a share or mounted volume).
+    """
+
+    def server_path(path, table_name=None):
+        if data_root is None:
+            return path
+        name = os.path.basename(path)
+        return f"{data_root.rstrip('/')}/{table_name}/{name}" if table_name else f"{data_root.rstrip('/')}/{name}"
+
+    lines = [
+        "-- EduFin native bulk load generated from bcp_manifest.json",
+        "-- Minimal logging needs TABLOCK and an empty target (or a heap); ORDER matches the clustered index",
+        "SET NOCOUNT ON;"
+    ]
+    for table_name, table in manifest['tables'].items():
+        options = [f"FORMATFILE = '{server_path(table['format_file'])}'", "TABLOCK"]
+        if table['ordered'] and table['clustered_key']:
+            options.append(f"ORDER ({table['clustered_key']} ASC)")
+        options.append(f"BATCHSIZE = {batch_size}")
+        options = ", ".join(options)
+
+        lines.append("")
+        lines.append(f"-- {table['target_table']}: {table['rows']:,} rows in {len(table['files'])} files")
+        for entry in table['files']:
+            lines.append(f"BULK INSERT {table['target_table']} FROM '{server_path(entry['path'], table_name)}'")
+            lines.append(f"WITH ({options});")
+    return "\n".join(lines) + "\n"
+
+
+def export_native_datasets(datasets, output_path="/tmp/edufin_bcp", rows_per_file=5000000, batch_rows=200000,
+                           data_root=None, batch_size=100000):
+    """Export every table in native format, then write bcp_manifest.json and bulk_load.sql"""
+
+    print(f"\nExporting native BCP files to {output_path}...")
+    manifest = {'output_path': output_path, 'format': 'native', 'tables': {}}
+    for table_name, source in datasets.items():
+        table = export_native_table(source, output_path, table_name, rows_per_file=rows_per_file,
+                                    batch_rows=batch_rows)
+        manifest['tables'][table_name] = table
+        order_note = f"ordered by {table['clustered_key']}" if table['ordered'] else "unordered"
+        print(f"   Exported {table_name}: {table['rows']:,} rows in {len(table['files'])} files ({order_note})")
+
+    with open(os.path.join(output_path, 'bcp_manifest.json'), 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    with open(os.path.join(output_path, 'bulk_load.sql'), 'w') as handle:
+        handle.write(bulk_load_script(manifest, data_root, batch_size))
+    return manifest
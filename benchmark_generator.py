@@ -0,0 +1,191 @@
+# =====================================================
+# EduFin Credit Solutions - Generator Benchmark Suite
+# TPC-style scale factors x backends, compared against a stored baseline
+# =====================================================
+
+# Each (backend, scale factor) run generates every table through
+# generate_edufin_dataset and then runs the CSV and native BCP exporters, all
+# under PipelineInstrumentation. Results record rows, wall/CPU time, rows/sec
+# and peak RSS per stage. Local runs each get a fresh process so peak memory
+# is not inherited from a previous scale factor; Spark runs share one session.
+#
+#     python benchmark_generator.py --backends local --scale-factors 0.01 0.1 1
+#     python benchmark_generator.py --baseline benchmark_baseline.json            # compare
+#     python benchmark_generator.py --baseline benchmark_baseline.json --save-baseline
+#
+# SF 1 is the default dataset (100k customers, 150k loans, ~3M payments). The
+# local backend holds whole tables in memory, so SF 10 needs roughly 20 GB of
+# RAM; use sharded_generation for larger local runs.
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import bcp_export
+import ssms_export
+from data_generation_specs import generate_edufin_dataset, load_backend
+from edufin_config import EduFinDataConfig
+from pipeline_instrumentation import PipelineInstrumentation
+
+DEFAULT_SCALE_FACTORS = [0.01, 0.1, 1, 10]
+DEFAULT_BACKENDS = ['local', 'spark']
+EXPORTERS = ['csv', 'bcp']
+
+# Fields kept from each stage's metrics
+RESULT_FIELDS = ['stage', 'rows', 'wall_seconds', 'cpu_seconds', 'rows_per_second', 'rss_peak_mb', 'bytes_written']
+
+# =====================================================
+# BENCHMARK RUNS
+# =====================================================
+
+def run_single(backend, scale_factor, output_root="/tmp/edufin_benchmark", exporters=EXPORTERS, spark=None,
+               keep_outputs=False):
+    """Generate and export one dataset, returning one result record per stage"""
+
+    config = EduFinDataConfig(scale_factor=scale_factor)
+    run_dir = os.path.join(output_root, f"{backend}_sf{scale_factor:g}")
+    instrumentation = PipelineInstrumentation(spark if backend == "spark" else None)
+
+    datasets = generate_edufin_dataset(spark, backend=backend, config=config, output_path=f"{run_dir}/parquet",
+                                       instrumentation=instrumentation)
+
+    if 'csv' in exporters:
+        with instrumentation.stage("export_csv") as stage:
+            manifest = ssms_export.export_datasets(datasets, f"{run_dir}/csv")
+            stage.rows = sum(table['rows'] for table in manifest['tables'].values())
+            stage.record_output(f"{run_dir}/csv")
+
+    if 'bcp' in exporters:
+        with instrumentation.stage("export_bcp") as stage:
+            manifest = bcp_export.export_native_datasets(datasets, f"{run_dir}/bcp")
+            stage.rows = sum(table['rows'] for table in manifest['tables'].values())
+            stage.record_output(f"{run_dir}/bcp")
+
+    if backend == "spark":
+        for df in datasets.values():
+            df.unpersist()
+    if not keep_outputs:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    return [dict({'backend': backend, 'scale_factor': scale_factor},
+                 **{field: metrics.to_dict()[field] for field in RESULT_FIELDS})
+            for metrics in instrumentation.stages]
+
+
+def _run_isolated(backend, scale_factor, output_root, exporters, keep_outputs):
+    """Run a local benchmark in a fresh process so its peak RSS is its own"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_single, backend, scale_factor, output_root, exporters, None, keep_outputs).result()
+
+
+def run_benchmarks(scale_factors=DEFAULT_SCALE_FACTORS, backends=DEFAULT_BACKENDS, output_root="/tmp/edufin_benchmark",
+                   exporters=EXPORTERS, keep_outputs=False):
+    """Run every backend at every scale factor"""
+
+    results = []
+    for backend in backends:
+        spark = load_backend("spark").get_spark_session() if backend == "spark" else None
+        for scale_factor in scale_factors:
+            print(f"\n===== Benchmark: {backend} backend, scale factor {scale_factor:g} =====")
+            if spark is None:
+                results += _run_isolated(backend, scale_factor, output_root, exporters, keep_outputs)
+            else:
+                results += run_single(backend, scale_factor, output_root, exporters, spark, keep_outputs)
+    return results
+
+# =====================================================
+# RESULTS AND BASELINE COMPARISON
+# =====================================================
+
+def write_results(results, path):
+    document = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'results': results
+    }
+    with open(path, 'w') as handle:
+        json.dump(document, handle, indent=2)
+    return path
+
+
+def print_results(results):
+    print(f"\n{'backend':<8}{'SF':>7}  {'stage':<14}{'rows':>12}{'wall s':>10}{'rows/s':>14}{'peak MB':>10}")
+    for record in results:
+        rate = f"{record['rows_per_second']:,.0f}" if record['rows_per_second'] else '-'
+        rows = f"{record['rows']:,}" if record['rows'] is not None else '-'
+        print(f"{record['backend']:<8}{record['scale_factor']:>7g}  {record['stage']:<14}{rows:>12}"
+              f"{record['wall_seconds']:>10.2f}{rate:>14}{record['rss_peak_mb']:>10.0f}")
+
+
+def compare_to_baseline(results, baseline, tolerance=0.10, min_seconds=0.5):
+    """Flag stages slower or heavier than the baseline by more than `tolerance`
+
+    Stages faster than `min_seconds` in both runs are only checked for memory,
+    their timings are mostly noise.
+    """
+
+    reference = {(r['backend'], r['scale_factor'], r['stage']): r for r in baseline['results']}
+    regressions = []
+
+    print(f"\n{'backend':<8}{'SF':>7}  {'stage':<14}{'time x':>9}{'memory x':>10}")
+    for record in results:
+        base = reference.get((record['backend'], record['scale_factor'], record['stage']))
+        if base is None:
+            continue
+        timed = max(record['wall_seconds'], base['wall_seconds']) >= min_seconds and base['wall_seconds'] > 0
+        time_ratio = record['wall_seconds'] / base['wall_seconds'] if timed else None
+        memory_ratio = record['rss_peak_mb'] / base['rss_peak_mb'] if base['rss_peak_mb'] else None
+
+        flags = []
+        if time_ratio is not None and time_ratio > 1 + tolerance:
+            flags.append('slower')
+        if memory_ratio is not None and memory_ratio > 1 + tolerance:
+            flags.append('more memory')
+        if flags:
+            regressions.append(dict(record, time_ratio=time_ratio, memory_ratio=memory_ratio, flags=flags))
+
+        time_text = f"{time_ratio:.2f}" if time_ratio is not None else '-'
+        memory_text = f"{memory_ratio:.2f}" if memory_ratio is not None else '-'
+        print(f"{record['backend']:<8}{record['scale_factor']:>7g}  {record['stage']:<14}{time_text:>9}"
+              f"{memory_text:>10}  {', '.join(flags).upper()}")
+
+    print(f"\n{len(regressions)} regression(s) beyond {tolerance:.0%} of the baseline")
+    return regressions
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the EduFin data generator at several scale factors")
+    parser.add_argument("--scale-factors", type=float, nargs="+", default=DEFAULT_SCALE_FACTORS)
+    parser.add_argument("--backends", nargs="+", choices=DEFAULT_BACKENDS, default=DEFAULT_BACKENDS)
+    parser.add_argument("--exporters", nargs="*", choices=EXPORTERS, default=EXPORTERS)
+    parser.add_argument("--output-root", default="/tmp/edufin_benchmark")
+    parser.add_argument("--results", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    parser.add_argument("--keep-outputs", action="store_true")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scale_factors, args.backends, args.output_root, args.exporters, args.keep_outputs)
+    print_results(results)
+    write_results(results, args.results)
+    print(f"\nResults written to {args.results}")
+
+    if args.baseline and args.save_baseline:
+        write_results(results, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare_to_baseline(results, json.load(handle), args.tolerance)
+        sys.exit(1 if regressions else 0)
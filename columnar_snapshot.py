@@ -0,0 +1,261 @@
+# =====================================================
+# EduFin Credit Solutions - Memory-Mapped Columnar Snapshots
+# One fixed-width binary file per column + a JSON manifest
+# =====================================================
+
+# Reloading a generated dataset means re-parsing CSVs (the data/ files use
+# dd/mm/yyyy dates) or starting Spark for the Parquet output. A snapshot is
+# written once and then opened with numpy.memmap: opening a table only reads
+# manifest.json, and column pages are loaded lazily by the OS on first touch.
+#
+#     <snapshot>/manifest.json                  tables, row counts, column kinds and dtypes
+#     <snapshot>/<table>/<column>.bin           little-endian fixed-width values
+#     <snapshot>/<table>/<column>.dict.json     dictionary of a dictionary-coded column
+#     <snapshot>/<table>/<column>.nulls.bin     packed null bits of a fixed-width string column
+#
+# Column kinds:
+#   numeric     the frame's own dtype (int8..int64, float64, bool); NULLs are NaN
+#               (integer columns with NULLs are float64, as in table_schemas)
+#   date        int32 days since 1970-01-01, INT32_MIN for NULL
+#   dictionary  int8 / int16 / int32 codes into the dictionary, -1 for NULL
+#               (categoricals, and strings with few distinct values)
+#   string      fixed-width ASCII bytes (or UTF-32 when needed) for mostly
+#               unique strings such as names and references, where a
+#               dictionary would be as large as the column
+#
+#     write_snapshot(datasets, "/tmp/edufin_snapshot")
+#     payments = open_snapshot("/tmp/edufin_snapshot")['payments']
+#     amounts = payments.column('payment_amount')        # np.memmap, zero-copy
+#     payments_df = payments.to_pandas(['loan_id', 'payment_date', 'payment_method'])
+#
+#     python columnar_snapshot.py /tmp/edufin_data /tmp/edufin_snapshot
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from data_quality_validation import VALIDATED_TABLES
+from referential_integrity import table_files
+from subset_extractor import CSV_DATE_FORMAT
+from table_schemas import column_types, read_parquet_frame
+
+MANIFEST = "manifest.json"
+SNAPSHOT_FORMAT = "edufin-columnar-v1"
+NULL_DAY = np.iinfo(np.int32).min
+
+# Strings are dictionary-coded while distinct values stay below this share of the rows
+DICTIONARY_MAX_SHARE = 0.5
+
+# =====================================================
+# WRITING
+# =====================================================
+
+def _code_dtype(size):
+    for dtype in (np.int8, np.int16, np.int32):
+        if size < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _encode_column(values):
+    """(kind, {file suffix: payload}, manifest extras) of one pandas column"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        dictionary = [str(value) for value in values.cat.categories]
+        codes = values.cat.codes.to_numpy().astype(_code_dtype(len(dictionary)))
+        return 'dictionary', {'.bin': codes, '.dict.json': dictionary}, {}
+
+    if values.dtype.kind == 'M':
+        days = values.to_numpy().astype('datetime64[D]')
+        encoded = np.where(np.isnat(days), NULL_DAY, days.astype(np.int64)).astype('<i4')
+        return 'date', {'.bin': encoded}, {'epoch': '1970-01-01'}
+
+    if values.dtype.kind in 'iufb':
+        return 'numeric', {'.bin': values.to_numpy().astype(values.dtype.newbyteorder('<'))}, {}
+
+    # Text: dictionary-coded unless most values are distinct
+    nulls = values.isna().to_numpy()
+    distinct = values[~nulls].unique()
+    if len(distinct) <= max(1, DICTIONARY_MAX_SHARE * len(values)):
+        codes, dictionary = pd.factorize(values, sort=True)
+        return 'dictionary', {'.bin': codes.astype(_code_dtype(len(dictionary))),
+                              '.dict.json': [str(value) for value in dictionary]}, {}
+
+    text = values.astype(object).where(~nulls, '').astype(str).to_numpy()
+    try:
+        encoded = np.char.encode(text.astype('U'), 'ascii')
+    except UnicodeEncodeError:
+        encoded = text.astype('U')
+    files = {'.bin': encoded}
+    if nulls.any():
+        files['.nulls.bin'] = np.packbits(nulls)
+    return 'string', files, {}
+
+
+def write_table(df, output_path, table):
+    """Write one pandas frame as per-column files; returns its manifest entry"""
+    directory = os.path.join(output_path, table)
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    for name in df.columns:
+        kind, files, extras = _encode_column(df[name])
+        entry = {'name': str(name), 'kind': kind, 'dtype': files['.bin'].dtype.str,
+                 'file': f"{table}/{name}.bin", **extras}
+        for suffix, payload in files.items():
+            path = os.path.join(directory, f"{name}{suffix}")
+            if suffix.endswith('.json'):
+                with open(path, 'w', encoding='utf-8') as handle:
+                    json.dump(payload, handle)
+                entry['dictionary'] = f"{table}/{name}{suffix}"
+            else:
+                payload.tofile(path)
+                if suffix == '.nulls.bin':
+                    entry['nulls'] = f"{table}/{name}{suffix}"
+        columns.append(entry)
+    return {'rows': len(df), 'columns': columns}
+
+
+def write_snapshot(datasets, output_path="/tmp/edufin_snapshot"):
+    """Write {table: pandas frame} as a snapshot; manifest.json is written last"""
+    os.makedirs(output_path, exist_ok=True)
+    manifest = {'format': SNAPSHOT_FORMAT, 'created_at': datetime.now().isoformat(timespec='seconds'),
+                'tables': {}}
+    for table, df in datasets.items():
+        manifest['tables'][table] = write_table(df, output_path, table)
+        print(f"   Snapshot {table}: {len(df):,} rows, {len(df.columns)} columns")
+
+    # A snapshot without a manifest is incomplete and is never opened
+    with open(os.path.join(output_path, f"{MANIFEST}.tmp"), 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    os.replace(os.path.join(output_path, f"{MANIFEST}.tmp"), os.path.join(output_path, MANIFEST))
+    return manifest
+
+
+def read_source_table(root, table):
+    """A table of a Parquet output, CSV export or data/ sample directory as a pandas frame"""
+    files = table_files(root, table)
+    if not files:
+        raise FileNotFoundError(f"No {table} table found under {root}")
+    if files[0].endswith('.parquet'):
+        return read_parquet_frame(files)
+
+    df = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+    types = column_types()
+    for column in df.columns:
+        if types.get(column) == 'DATE' and pd.api.types.is_string_dtype(df[column]):
+            sample = df[column].dropna()
+            # data/ samples use dd/mm/yyyy, ssms_export writes ISO dates
+            date_format = CSV_DATE_FORMAT if len(sample) and '/' in str(sample.iloc[0]) else '%Y-%m-%d'
+            df[column] = pd.to_datetime(df[column], format=date_format).astype('datetime64[s]')
+    return df
+
+# =====================================================
+# READING
+# =====================================================
+
+class SnapshotTable:
+    """Lazily memory-mapped columns of one snapshot table"""
+
+    def __init__(self, root, name, entry):
+        self.root = root
+        self.name = name
+        self.rows = entry['rows']
+        self.entries = {column['name']: column for column in entry['columns']}
+        self._dictionaries = {}
+
+    @property
+    def columns(self):
+        return list(self.entries)
+
+    def column(self, name):
+        """Stored values as a read-only np.memmap: values, int32 days, codes or fixed-width strings"""
+        entry = self.entries[name]
+        dtype = np.dtype(entry['dtype'])
+        if self.rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.root, entry['file']), dtype=dtype, mode='r', shape=(self.rows,))
+
+    def dictionary(self, name):
+        if name not in self._dictionaries:
+            with open(os.path.join(self.root, self.entries[name]['dictionary']), encoding='utf-8') as handle:
+                self._dictionaries[name] = json.load(handle)
+        return self._dictionaries[name]
+
+    def nulls(self, name):
+        """Boolean NULL mask of a column"""
+        entry = self.entries[name]
+        values = self.column(name)
+        if entry['kind'] == 'date':
+            return values == NULL_DAY
+        if entry['kind'] == 'dictionary':
+            return values < 0
+        if entry['kind'] == 'string':
+            if 'nulls' not in entry:
+                return np.zeros(self.rows, dtype=bool)
+            packed = np.fromfile(os.path.join(self.root, entry['nulls']), dtype=np.uint8)
+            return np.unpackbits(packed, count=self.rows).astype(bool)
+        return pd.isna(values)
+
+    def values(self, name):
+        """Decoded column: numbers as stored, dates as datetime64[s], dictionaries as Categorical, strings as str"""
+        entry = self.entries[name]
+        values = self.column(name)
+        if entry['kind'] == 'numeric':
+            return values
+        if entry['kind'] == 'date':
+            dates = values.astype('datetime64[D]').astype('datetime64[s]')
+            dates[values == NULL_DAY] = np.datetime64('NaT')
+            return dates
+        if entry['kind'] == 'dictionary':
+            return pd.Categorical.from_codes(values, self.dictionary(name), validate=False)
+        # Arrow strips the fixed-width padding and builds the str column without Python objects
+        import pyarrow as pa
+
+        return pd.array(pa.array(np.asarray(values), mask=self.nulls(name)).cast(pa.string()), dtype='str')
+
+    def to_pandas(self, columns=None):
+        """pandas frame of the selected columns, in the types table_schemas.frame_from_storage returns"""
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({name: self.values(name) for name in columns})
+
+
+class Snapshot:
+    """A snapshot directory opened from its manifest; tables are mapped on access"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as handle:
+            self.manifest = json.load(handle)
+        if self.manifest.get('format') != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not a {SNAPSHOT_FORMAT} snapshot")
+
+    @property
+    def tables(self):
+        return list(self.manifest['tables'])
+
+    def __getitem__(self, table):
+        return SnapshotTable(self.path, table, self.manifest['tables'][table])
+
+
+def open_snapshot(path="/tmp/edufin_snapshot"):
+    return Snapshot(path)
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a memory-mapped columnar snapshot of an EduFin dataset")
+    parser.add_argument("source", help="Parquet output, CSV export or data/ sample directory")
+    parser.add_argument("output_path")
+    parser.add_argument("--tables", nargs="+", default=VALIDATED_TABLES)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    print(f"Writing snapshot of {args.source} to {args.output_path}...")
+    write_snapshot({table: read_source_table(args.source, table) for table in args.tables}, args.output_path)
+    print(f"   Snapshot written in {time.perf_counter() - started:.1f}s")
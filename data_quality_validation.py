@@ -0,0 +1,257 @@
+# =====================================================
+# EduFin Credit Solutions - Data Quality Validation
+# Every configured check in one fused aggregation per table
+# =====================================================
+
+# Checks are declared as measures (row counts, null counts, category counts,
+# key ranges) that each backend evaluates in a single pass over a table -
+# one df.agg(...) action per table on Spark instead of separate count() and
+# groupBy() actions. The observed values are then compared with the
+# EduFinDataConfig targets:
+#   distributions   - share of every configured category (cities, profiles, ...)
+#   default rate    - Defaulted share of loans vs the share implied by their
+#                     default_probability (loans still Sanctioned cannot default)
+#   injected issues - missing mobile and invalid email rates (DATA_QUALITY_ISSUES)
+#   integrity       - every foreign key resolves to a parent row
+#
+#     report = validate_dataset(generators, tables, config)   # raises DataQualityError
+#
+# Tolerances come from config.VALIDATION_TOLERANCES, widened to 4 standard
+# errors so small scale factors do not fail on sampling noise. The default rate
+# tolerance is relative to the expected rate, so large runs check it tightly.
+
+import math
+
+# Tables in validation order (parents before the tables referencing them)
+VALIDATED_TABLES = ['institutions', 'customers', 'loans', 'payments', 'defaults']
+
+# (child table, foreign key, parent table, parent key)
+FOREIGN_KEYS = [
+    ('loans', 'customer_id', 'customers', 'customer_id'),
+    ('loans', 'institution_id', 'institutions', 'institution_id'),
+    ('payments', 'loan_id', 'loans', 'loan_id'),
+    ('defaults', 'loan_id', 'loans', 'loan_id')
+]
+
+PRIMARY_KEYS = {
+    'institutions': 'institution_id',
+    'customers': 'customer_id',
+    'loans': 'loan_id',
+    'payments': 'payment_id',
+    'defaults': 'loan_id'
+}
+
+STANDARD_ERRORS = 4
+
+
+class DataQualityError(ValueError):
+    """A check fell outside its tolerance; the full report is attached"""
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+
+def _weights(config_weights):
+    total = sum(config_weights.values())
+    return {value: weight / total for value, weight in config_weights.items()}
+
+
+def distribution_targets(config):
+    """{table: {column: {value: expected share}}} of the configured categorical distributions"""
+    return {
+        'customers': {
+            'current_city': _weights({city: info['weight'] for city, info in config.CITY_DISTRIBUTION.items()}),
+            'customer_profile': _weights({profile: info['probability']
+                                          for profile, info in config.CUSTOMER_PROFILES.items()}),
+            'gender': _weights(config.GENDER_DISTRIBUTION),
+            'employment_type': _weights(config.EMPLOYMENT_TYPES),
+            'kyc_status': _weights(config.KYC_STATUSES)
+        },
+        'loans': {
+            'loan_purpose': _weights(config.LOAN_PURPOSES),
+            'course_duration_months': _weights(config.COURSE_DURATIONS)
+        },
+        'payments': {
+            'payment_method': _weights(config.PAYMENT_RULES['payment_methods'])
+        }
+    }
+
+# =====================================================
+# MEASURES (evaluated by the backend's aggregate())
+# =====================================================
+
+def table_measures(table, config):
+    """{measure name: (kind, column, value)} for one table
+
+    kinds: rows, nulls, equals (rows where column == value), contains
+    (rows where the string column contains value), min, max, sum (of column,
+    skipping rows where value[0] == value[1] when value is given)
+    """
+    measures = {'rows': ('rows', None, None)}
+
+    key = PRIMARY_KEYS[table]
+    measures[f'{key}:min'] = ('min', key, None)
+    measures[f'{key}:max'] = ('max', key, None)
+
+    for column, shares in distribution_targets(config).get(table, {}).items():
+        for value in shares:
+            measures[f'{column}={value}'] = ('equals', column, value)
+
+    for child, column, _, _ in FOREIGN_KEYS:
+        if child == table:
+            measures[f'{column}:nulls'] = ('nulls', column, None)
+            measures[f'{column}:min'] = ('min', column, None)
+            measures[f'{column}:max'] = ('max', column, None)
+
+    if table == 'customers':
+        measures['mobile_number:nulls'] = ('nulls', 'mobile_number', None)
+        measures['email:invalid'] = ('contains', 'email', 'invalid')
+    if table == 'loans':
+        measures['current_loan_status=Defaulted'] = ('equals', 'current_loan_status', 'Defaulted')
+        # Expected defaults: loans not yet disbursed (Sanctioned) are never marked Defaulted
+        measures['default_probability:exposed'] = ('sum', 'default_probability',
+                                                   ('current_loan_status', 'Sanctioned'))
+    if table == 'payments':
+        for status in ['Successful', 'Failed']:
+            measures[f'payment_status={status}'] = ('equals', 'payment_status', status)
+    return measures
+
+# =====================================================
+# CHECKS
+# =====================================================
+
+def _tolerance(allowed, expected, rows):
+    """Configured tolerance, widened to STANDARD_ERRORS binomial standard errors"""
+    if not rows:
+        return allowed
+    return max(allowed, STANDARD_ERRORS * math.sqrt(expected * (1 - expected) / rows))
+
+
+def _share_check(table, check, observed_count, rows, expected, allowed):
+    observed = observed_count / rows if rows else 0.0
+    tolerance = _tolerance(allowed, expected, rows)
+    return {
+        'table': table, 'check': check, 'observed': round(observed, 6), 'expected': round(expected, 6),
+        'tolerance': round(tolerance, 6), 'passed': abs(observed - expected) <= tolerance
+    }
+
+
+def expected_default_rate(values):
+    """Defaulted share of loans implied by their default probabilities"""
+    return (values['default_probability:exposed'] or 0.0) / values['rows'] if values['rows'] else 0.0
+
+
+def table_checks(table, values, config):
+    """Checks that only need one table's measures"""
+    tolerances = config.VALIDATION_TOLERANCES
+    rows = values['rows']
+    checks = []
+
+    for column, shares in distribution_targets(config).get(table, {}).items():
+        for value, expected in shares.items():
+            checks.append(_share_check(table, f'{column}={value}', values[f'{column}={value}'], rows, expected,
+                                       tolerances['distribution']))
+
+    if table == 'customers':
+        issues = config.DATA_QUALITY_ISSUES
+        checks.append(_share_check(table, 'missing mobile rate', values['mobile_number:nulls'], rows,
+                                   issues['missing_mobile_rate'], tolerances['rate']))
+        checks.append(_share_check(table, 'invalid email rate', values['email:invalid'], rows,
+                                   issues['invalid_email_rate'], tolerances['rate']))
+    if table == 'loans':
+        expected = expected_default_rate(values)
+        checks.append(_share_check(table, 'default rate', values['current_loan_status=Defaulted'], rows,
+                                   expected, tolerances['default_rate'] * expected))
+    return checks
+
+
+def integrity_checks(table, values, measured, generators, tables):
+    """Foreign keys of `table` against already measured parents
+
+    Keys within the parent's id range are enough when the parent ids are
+    contiguous (customers, institutions); otherwise the backend counts orphans.
+    """
+    checks = []
+    for child, column, parent, parent_key in FOREIGN_KEYS:
+        if child != table:
+            continue
+        parent_values = measured[parent]
+        low, high = parent_values[f'{parent_key}:min'], parent_values[f'{parent_key}:max']
+        nulls = values[f'{column}:nulls']
+        if values['rows'] == nulls:
+            orphans = 0
+        elif low is None or values[f'{column}:min'] < low or values[f'{column}:max'] > high:
+            orphans = generators.count_orphans(tables[child], column, tables[parent], parent_key)
+        elif parent_values['rows'] == high - low + 1:
+            orphans = 0  # contiguous parent ids cover the whole range
+        else:
+            orphans = generators.count_orphans(tables[child], column, tables[parent], parent_key)
+        checks.append({
+            'table': table, 'check': f'{column} -> {parent}.{parent_key}', 'observed': orphans + nulls,
+            'expected': 0, 'tolerance': 0, 'passed': orphans + nulls == 0
+        })
+    return checks
+
+# =====================================================
+# DATASET VALIDATION
+# =====================================================
+
+def validate_dataset(generators, tables, config, fail_fast=True):
+    """Run every check, one aggregation per table
+
+    Returns {'passed', 'tables': {table: measures}, 'checks': [...]}. With
+    fail_fast, raises DataQualityError as soon as a table has a failing check,
+    before later tables are scanned.
+    """
+
+    report = {'passed': True, 'tables': {}, 'checks': []}
+    for table in VALIDATED_TABLES:
+        if table not in tables:
+            continue
+        values = generators.aggregate(tables[table], table_measures(table, config))
+        report['tables'][table] = values
+
+        checks = table_checks(table, values, config)
+        checks += integrity_checks(table, values, report['tables'], generators, tables)
+        report['checks'] += checks
+
+        failed = [check for check in checks if not check['passed']]
+        if failed:
+            report['passed'] = False
+            if fail_fast:
+                raise DataQualityError(f"{len(failed)} data quality check(s) failed on {table}: "
+                                       + "; ".join(_describe(check) for check in failed[:5]), report)
+    return report
+
+
+def _describe(check):
+    return (f"{check['table']} {check['check']}: {check['observed']} "
+            f"(expected {check['expected']} +/- {check['tolerance']})")
+
+
+def print_report(report):
+    """Console summary in the style of the generator's validation step"""
+    loans = report['tables'].get('loans')
+    if loans:
+        default_rate = loans['current_loan_status=Defaulted'] / loans['rows'] * 100 if loans['rows'] else 0.0
+        print(f"   Default rate: {default_rate:.2f}% (expected: {expected_default_rate(loans) * 100:.2f}%)")
+
+    customers = report['tables'].get('customers')
+    if customers:
+        cities = sorted(((name.split('=', 1)[1], count) for name, count in customers.items()
+                         if name.startswith('current_city=')), key=lambda item: -item[1])
+        print(f"   Top 5 cities by customer count:")
+        for city, count in cities[:5]:
+            print(f"     {city}: {count:,}")
+
+    payments = report['tables'].get('payments')
+    if payments:
+        print(f"   Payment status distribution:")
+        for status in ['Successful', 'Failed']:
+            print(f"     {status}: {payments[f'payment_status={status}']:,}")
+
+    failed = [check for check in report['checks'] if not check['passed']]
+    print(f"   {len(report['checks']) - len(failed)}/{len(report['checks'])} data quality checks passed")
+    for check in failed:
+        print(f"     FAILED {_describe(check)}")
@@ -0,0 +1,294 @@
+# =====================================================
+# EduFin Credit Solutions - Deterministic Random Streams
+# Counter-based RNG keyed by (seed, stream, entity id, draw)
+# =====================================================
+
+# Every random value in the dataset is a pure function of
+#     EduFinDataConfig.SEED x stream name x entity id x draw index
+# so any slice of customers, loans or payments can be regenerated on its own,
+# in any order and on any number of partitions, and come out identical.
+#
+# NumPy functions serve the pandas/NumPy code paths; the sql_* builders return
+# Spark SQL expression strings (built on xxhash64) for dbldatagen expr= columns
+# and expr(). Each backend is reproducible on its own - the hash functions
+# differ, so Spark and NumPy do not produce the same numbers.
+
+import random
+import zlib
+from functools import lru_cache
+
+import numpy as np
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+_MASK_53 = (1 << 53) - 1
+
+
+def stream_key(stream):
+    """Stable 32-bit key for a stream name (Python's hash() is salted per process)"""
+    return zlib.crc32(stream.encode('utf-8'))
+
+
+def _mix64(x):
+    """splitmix64 finalizer over uint64 arrays (wrap-around arithmetic)"""
+    x = (x ^ (x >> np.uint64(30))) * _MIX_1
+    x = (x ^ (x >> np.uint64(27))) * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def random_bits(seed, stream, ids, draw=0):
+    """64 random bits per entity id for one draw of one stream"""
+    ids = np.asarray(ids).astype(np.uint64)
+    key = np.array([((seed << 32) ^ stream_key(stream)) & 0xFFFFFFFFFFFFFFFF], dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        counter = _mix64(key + np.uint64(draw) * _GOLDEN)
+        return _mix64(ids * _GOLDEN + counter)
+
+
+def uniform(seed, stream, ids, draw=0, low=0.0, high=1.0):
+    """Uniform floats in [low, high) keyed by entity id"""
+    unit = (random_bits(seed, stream, ids, draw) >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+    return low + unit * (high - low)
+
+
+def normal(seed, stream, ids, draw=0, mean=0.0, std=1.0):
+    """Normal floats keyed by entity id (Box-Muller over draws 2*draw and 2*draw+1)"""
+    u1 = uniform(seed, stream, ids, 2 * draw)
+    u2 = uniform(seed, stream, ids, 2 * draw + 1)
+    return mean + std * np.sqrt(-2.0 * np.log1p(-u1)) * np.cos(2.0 * np.pi * u2)
+
+
+def randint(seed, stream, ids, low, high, draw=0):
+    """Integers in [low, high] inclusive, like random.randint"""
+    low = np.asarray(low, dtype=np.int64)
+    span = np.asarray(high, dtype=np.int64) - low + 1
+    return low + np.floor(uniform(seed, stream, ids, draw) * span).astype(np.int64)
+
+
+def weighted_choice(values, weights, u):
+    """Map uniforms to weighted categorical values (see AliasSampler)"""
+    return weighted_sampler(values, weights).choice(u)
+
+
+def entity_seed(seed, stream, entity_id):
+    """Integer seed for per-entity Python RNGs (random.Random, Faker.seed_instance)"""
+    return int(random_bits(seed, stream, [entity_id])[0])
+
+
+def entity_random(seed, stream, entity_id):
+    """A random.Random dedicated to one entity of one stream"""
+    return random.Random(entity_seed(seed, stream, entity_id))
+
+
+# =====================================================
+# WEIGHTED CATEGORICAL SAMPLING
+# =====================================================
+
+# Every weighted column (cities, profiles, statuses, payment methods, default
+# reasons, ...) draws through one AliasSampler per distribution, built once
+# (weighted_sampler is cached) and shared by both backends:
+#   choice(u) / sql(u)   Walker alias table: one uniform, one table lookup
+#                        and one comparison per row, whatever the number of values
+#   exact(...) / sql_exact(...)
+#                        for entity columns over dense ids 1..N (customers,
+#                        loans): ids are ranked by a keyed permutation of
+#                        [0, N) and each value gets a block of ranks sized by
+#                        its largest-remainder quota, so the full table has the
+#                        target counts to within one row per value. The value
+#                        of an id still depends only on the id, so shards and
+#                        partitions compose to the same table.
+
+PERMUTATION_ROUNDS = 4
+
+# Cycle-walking steps unrolled in Spark SQL; each step leaves the id range with
+# probability < 1/2, so 64 steps fail with probability < 2^-64
+SQL_PERMUTATION_STEPS = 64
+
+
+def _permutation_widths(population):
+    """Bit widths of the Feistel halves: the domain 2^bits is below 2 * population"""
+    bits = max(2, int(population - 1).bit_length())
+    return bits // 2, bits - bits // 2
+
+
+def _feistel(seed, stream, x, high_bits, low_bits):
+    """Keyed bijection of [0, 2^(high_bits + low_bits)) as an unbalanced Feistel network"""
+    high, low = x >> low_bits, x & ((1 << low_bits) - 1)
+    for round_number in range(PERMUTATION_ROUNDS):
+        width = high_bits if round_number % 2 == 0 else low_bits
+        mix = (random_bits(seed, stream, low, round_number) & np.uint64((1 << width) - 1)).astype(np.int64)
+        high, low = low, (high + mix) & ((1 << width) - 1)
+    return (high << low_bits) | low
+
+
+def permutation(seed, stream, positions, population):
+    """Keyed bijection of [0, population), applied to an array of positions in that range"""
+    positions = np.asarray(positions, dtype=np.int64)
+    if len(positions) and (positions.min() < 0 or positions.max() >= population):
+        raise ValueError(f"positions must lie in [0, {population})")
+    high_bits, low_bits = _permutation_widths(population)
+    ranks = positions.copy()
+    pending = np.arange(len(ranks))
+    # Cycle walking: re-apply the permutation until the rank lands inside the range
+    while len(pending):
+        ranks[pending] = _feistel(seed, stream, ranks[pending], high_bits, low_bits)
+        pending = pending[ranks[pending] >= population]
+    return ranks
+
+
+class AliasSampler:
+    """Walker alias table over weighted categorical values"""
+
+    def __init__(self, values, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        if len(weights) == 0 or len(weights) != len(values) or (weights < 0).any() or weights.sum() <= 0:
+            raise ValueError("weights must be non-negative, one per value, and not all zero")
+        self.values = list(values)
+        self.probabilities = weights / weights.sum()
+
+        # Vose's construction: every column holds its own value up to `accept`, the alias above it
+        count = len(weights)
+        scaled = self.probabilities * count
+        self.accept = np.ones(count)
+        self.alias = np.arange(count)
+        small = [i for i in range(count) if scaled[i] < 1]
+        large = [i for i in range(count) if scaled[i] >= 1]
+        while small and large:
+            below, above = small.pop(), large.pop()
+            self.accept[below], self.alias[below] = scaled[below], above
+            scaled[above] -= 1 - scaled[below]
+            (small if scaled[above] < 1 else large).append(above)
+
+    def indices(self, u):
+        """Value positions for an array of uniforms in [0, 1)"""
+        scaled = np.asarray(u, dtype=np.float64) * len(self.values)
+        column = scaled.astype(np.int64)
+        np.minimum(column, len(self.values) - 1, out=column)
+        # Keep the column's own value while the fractional part is below its acceptance threshold
+        keep = scaled < column + self.accept[column]
+        return np.where(keep, column, self.alias[column])
+
+    def choice(self, u):
+        return np.asarray(self.values)[self.indices(u)]
+
+    def quotas(self, rows):
+        """Largest-remainder counts per value for `rows` draws (summing to exactly `rows`)"""
+        raw = self.probabilities * rows
+        counts = np.floor(raw).astype(np.int64)
+        shortfall = rows - int(counts.sum())
+        counts[np.argsort(counts - raw, kind='stable')[:shortfall]] += 1
+        return counts
+
+    def exact(self, seed, stream, ids, population):
+        """Values of entities `ids` (1..population) with the quotas of the whole population"""
+        ranks = permutation(seed, stream, np.asarray(ids, dtype=np.int64) - 1, population)
+        bounds = np.cumsum(self.quotas(population))
+        return np.asarray(self.values)[np.searchsorted(bounds, ranks, side='right')]
+
+    def sql(self, u_expr):
+        """Spark SQL expression of choice() for a uniform expression (evaluated once per row)"""
+        if len(self.values) == 1:
+            return _sql_literal(self.values[0])
+        values = ", ".join(_sql_literal(v) for v in self.values)
+        accept = ", ".join(repr(float(a)) for a in self.accept)
+        alias = ", ".join(str(int(a) + 1) for a in self.alias)
+        column = "(cast(floor(scaled) as int) + 1)"
+        pick = (f"element_at(array({values}), if(scaled - floor(scaled) < element_at(array({accept}), {column}), "
+                f"{column}, element_at(array({alias}), {column})))")
+        return f"element_at(transform(array(({u_expr}) * {len(self.values)}), scaled -> {pick}), 1)"
+
+    def sql_exact(self, seed, stream, id_expr, population):
+        """Spark SQL expression of exact() for an id expression in 1..population"""
+        bounds = ", ".join(str(int(b)) for b in np.cumsum(self.quotas(population))[:-1])
+        values = ", ".join(_sql_literal(v) for v in self.values)
+        if not bounds:
+            return _sql_literal(self.values[0])
+        rank = sql_permutation(seed, stream, f"(cast({id_expr} as bigint) - 1)", population)
+        pick = f"element_at(array({values}), size(filter(array({bounds}), bound -> bound <= permuted)) + 1)"
+        return f"element_at(transform(array({rank}), permuted -> {pick}), 1)"
+
+
+@lru_cache(maxsize=None)
+def _cached_sampler(values, weights):
+    return AliasSampler(values, weights)
+
+
+def weighted_sampler(values, weights):
+    """The AliasSampler of a distribution, built once per process"""
+    return _cached_sampler(tuple(values), tuple(float(w) for w in weights))
+
+# =====================================================
+# SPARK SQL EXPRESSIONS
+# =====================================================
+
+def sql_uniform(seed, stream, id_expr, draw=0):
+    """Spark SQL expression for a uniform double in [0, 1) keyed by `id_expr`"""
+    return (f"(cast(xxhash64({int(seed)}L, {stream_key(stream)}L, {id_expr}, {int(draw)}) & {_MASK_53}L as double)"
+            f" / {float(1 << 53)})")
+
+
+def sql_normal(seed, stream, id_expr, draw=0, mean=0.0, std=1.0):
+    """Spark SQL expression for a normal double keyed by `id_expr`"""
+    u1 = sql_uniform(seed, stream, id_expr, 2 * draw)
+    u2 = sql_uniform(seed, stream, id_expr, 2 * draw + 1)
+    return f"({mean} + {std} * sqrt(-2.0 * ln(1.0 - {u1})) * cos(2.0 * pi() * {u2}))"
+
+
+def sql_randint(seed, stream, id_expr, low, high, draw=0):
+    """Spark SQL expression for an int in [low, high] inclusive"""
+    return f"(cast(floor({sql_uniform(seed, stream, id_expr, draw)} * ({high} - {low} + 1)) as int) + {low})"
+
+
+def sql_weighted_choice(values, weights, u_expr):
+    """Spark SQL expression picking a weighted value (see AliasSampler.sql)"""
+    return weighted_sampler(values, weights).sql(u_expr)
+
+
+def _sql_feistel(seed, stream, x_expr, high_bits, low_bits):
+    """Spark SQL expression of _feistel (xxhash64 as the round function)"""
+    masks = f"if(feistel_round % 2 = 0, {(1 << high_bits) - 1}L, {(1 << low_bits) - 1}L)"
+    mix = f"(xxhash64({int(seed)}L, {stream_key(stream)}L, half.low, feistel_round) & {masks})"
+    return (f"aggregate(sequence(0, {PERMUTATION_ROUNDS - 1}), "
+            f"named_struct('high', shiftright({x_expr}, {low_bits}), 'low', {x_expr} & {(1 << low_bits) - 1}L), "
+            f"(half, feistel_round) -> named_struct('high', half.low, 'low', (half.high + {mix}) & {masks}), "
+            f"half -> shiftleft(half.high, {low_bits}) | half.low)")
+
+
+def sql_permutation(seed, stream, position_expr, population):
+    """Spark SQL expression of permutation() for a position expression in [0, population)"""
+    high_bits, low_bits = _permutation_widths(population)
+    first = _sql_feistel(seed, stream, position_expr, high_bits, low_bits)
+    walk = _sql_feistel(seed, stream, "walked", high_bits, low_bits)
+    return (f"aggregate(sequence(1, {SQL_PERMUTATION_STEPS}), {first}, "
+            f"(walked, step) -> if(walked < {int(population)}L, walked, {walk}))")
+
+
+def sql_date_between(seed, stream, id_expr, start, end, draw=0):
+    """Spark SQL expression for a date uniformly drawn from [start, end]"""
+    days = sql_randint(seed, stream, id_expr, 0, (end - start).days, draw)
+    return f"date_add(DATE'{start:%Y-%m-%d}', {days})"
+
+
+def sql_digits(seed, stream, id_expr, width, draw=0):
+    """Spark SQL expression for a zero-padded random digit string of `width` digits"""
+    # Up to 15 digits fit exactly in the 53-bit uniform; longer strings are concatenated
+    parts = []
+    for chunk, start in enumerate(range(0, width, 15)):
+        size = min(15, width - start)
+        u = sql_uniform(seed, stream, id_expr, draw * 16 + chunk)
+        parts.append(f"lpad(cast(cast(floor({u} * 1e{size}) as bigint) as string), {size}, '0')")
+    return parts[0] if len(parts) == 1 else f"concat({', '.join(parts)})"
+
+
+def sql_letters(seed, stream, id_expr, count, draw=0):
+    """Spark SQL expression for `count` random upper-case letters"""
+    letters = [f"char(65 + cast(floor({sql_uniform(seed, stream, id_expr, draw * 16 + i)} * 26) as int))"
+               for i in range(count)]
+    return letters[0] if count == 1 else f"concat({', '.join(letters)})"
+
+
+def _sql_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "\\'") + "'"
+    return repr(value)
@@ -0,0 +1,47 @@
+# =====================================================
+# EduFin Credit Solutions - Dimension Lookup Tables
+# City and customer-profile dimensions built from EduFinDataConfig
+# =====================================================
+
+# Attributes that depend only on a customer's city or profile are looked up
+# in these small tables instead of being spelled out as CASE/when() chains:
+#   local backend - vectorized positional indexing (lookup)
+#   Spark backend - broadcast hash joins (spark_backend.broadcast_dimension)
+# Every configured city and profile is covered, and each costs the same.
+
+import numpy as np
+import pandas as pd
+
+
+def city_dimension(config):
+    """One row per configured city: state, tier and income parameters"""
+    return pd.DataFrame([
+        {'city': city, 'state': info['state'], 'tier': info['tier'],
+         'avg_income': float(info['avg_income']), 'income_std': float(info['income_std'])}
+        for city, info in config.CITY_DISTRIBUTION.items()
+    ])
+
+
+def profile_dimension(config):
+    """One row per customer profile: CIBIL band, risk category and payment behaviour"""
+    return pd.DataFrame([
+        {'profile': profile, 'cibil_low': info['cibil_range'][0], 'cibil_high': info['cibil_range'][1],
+         'risk_category': info['risk_category'], 'default_probability': float(info['loan_default_probability']),
+         'on_time_probability': float(info['on_time_probability']), 'max_payment_delay': info['max_payment_delay']}
+        for profile, info in config.CUSTOMER_PROFILES.items()
+    ])
+
+
+def lookup(dimension, key, values, fallback=None):
+    """Dimension rows matching each of `values`, positionally aligned with them
+
+    Values missing from the dimension raise KeyError unless a `fallback` key is given.
+    """
+    keys = pd.Index(dimension[key])
+    positions = keys.get_indexer(np.asarray(values))
+    missing = positions < 0
+    if missing.any():
+        if fallback is None:
+            raise KeyError(f"{key} values missing from the dimension: {sorted(set(np.asarray(values)[missing]))[:5]}")
+        positions = np.where(missing, keys.get_loc(fallback), positions)
+    return dimension.iloc[positions].reset_index(drop=True)
@@ -0,0 +1,187 @@
+# =====================================================
+# EduFin Credit Solutions - Data Generation Configuration
+# Business rules shared by the Spark and local backends
+# =====================================================
+
+from datetime import datetime
+
+# =====================================================
+# BUSINESS RULES AND CONFIGURATION
+# =====================================================
+
+class EduFinDataConfig:
+    """Configuration class for realistic business data generation"""
+    
+    # Dataset sizes at scale factor 1
+    SCALE_FACTOR = 1
+    TOTAL_CUSTOMERS = 100000
+    TOTAL_INSTITUTIONS = 5000
+    TOTAL_LOANS = 150000
+    TOTAL_PAYMENTS = 800000
+    TOTAL_DEFAULTS = 18000  # 12% of loans
+    
+    # Date ranges
+    BUSINESS_START_DATE = datetime(2019, 1, 1)
+    CURRENT_DATE = datetime(2024, 6, 30)
+    
+    # Reproducibility: every random value is keyed by (SEED, stream, entity id),
+    # see deterministic_rng. AS_OF_DATE is the horizon for loan status, payments
+    # and DPD (previously datetime.now(), which made reruns differ day to day);
+    # unless given, it is the instance's CURRENT_DATE, set in __init__ so a
+    # subclass overriding CURRENT_DATE moves the horizon with it
+    SEED = 20190101
+    
+    # Geographic distribution (Indian cities)
+    CITY_DISTRIBUTION = {
+        # Tier 1 cities (15% of customers)
+        'Mumbai': {'state': 'Maharashtra', 'tier': 'Tier1', 'weight': 0.04, 'avg_income': 450000, 'income_std': 200000},
+        'Delhi': {'state': 'Delhi', 'tier': 'Tier1', 'weight': 0.035, 'avg_income': 420000, 'income_std': 180000},
+        'Bangalore': {'state': 'Karnataka', 'tier': 'Tier1', 'weight': 0.035, 'avg_income': 480000, 'income_std': 220000},
+        'Hyderabad': {'state': 'Telangana', 'tier': 'Tier1', 'weight': 0.025, 'avg_income': 380000, 'income_std': 170000},
+        'Chennai': {'state': 'Tamil Nadu', 'tier': 'Tier1', 'weight': 0.03, 'avg_income': 400000, 'income_std': 180000},
+        'Kolkata': {'state': 'West Bengal', 'tier': 'Tier1', 'weight': 0.025, 'avg_income': 350000, 'income_std': 160000},
+        
+        # Tier 2 cities (35% of customers)
+        'Pune': {'state': 'Maharashtra', 'tier': 'Tier2', 'weight': 0.025, 'avg_income': 320000, 'income_std': 140000},
+        'Ahmedabad': {'state': 'Gujarat', 'tier': 'Tier2', 'weight': 0.02, 'avg_income': 300000, 'income_std': 130000},
+        'Jaipur': {'state': 'Rajasthan', 'tier': 'Tier2', 'weight': 0.018, 'avg_income': 280000, 'income_std': 120000},
+        'Surat': {'state': 'Gujarat', 'tier': 'Tier2', 'weight': 0.015, 'avg_income': 290000, 'income_std': 125000},
+        'Lucknow': {'state': 'Uttar Pradesh', 'tier': 'Tier2', 'weight': 0.018, 'avg_income': 260000, 'income_std': 110000},
+        'Kanpur': {'state': 'Uttar Pradesh', 'tier': 'Tier2', 'weight': 0.015, 'avg_income': 250000, 'income_std': 100000},
+        'Nagpur': {'state': 'Maharashtra', 'tier': 'Tier2', 'weight': 0.012, 'avg_income': 270000, 'income_std': 115000},
+        'Indore': {'state': 'Madhya Pradesh', 'tier': 'Tier2', 'weight': 0.012, 'avg_income': 265000, 'income_std': 110000},
+        'Thane': {'state': 'Maharashtra', 'tier': 'Tier2', 'weight': 0.015, 'avg_income': 340000, 'income_std': 150000},
+        'Bhopal': {'state': 'Madhya Pradesh', 'tier': 'Tier2', 'weight': 0.01, 'avg_income': 255000, 'income_std': 105000},
+        'Visakhapatnam': {'state': 'Andhra Pradesh', 'tier': 'Tier2', 'weight': 0.01, 'avg_income': 275000, 'income_std': 120000},
+        'Vadodara': {'state': 'Gujarat', 'tier': 'Tier2', 'weight': 0.01, 'avg_income': 285000, 'income_std': 125000},
+        'Patna': {'state': 'Bihar', 'tier': 'Tier2', 'weight': 0.012, 'avg_income': 220000, 'income_std': 90000},
+        'Ludhiana': {'state': 'Punjab', 'tier': 'Tier2', 'weight': 0.008, 'avg_income': 295000, 'income_std': 130000},
+        'Agra': {'state': 'Uttar Pradesh', 'tier': 'Tier2', 'weight': 0.01, 'avg_income': 240000, 'income_std': 95000},
+        'Nashik': {'state': 'Maharashtra', 'tier': 'Tier2', 'weight': 0.008, 'avg_income': 265000, 'income_std': 115000},
+        'Faridabad': {'state': 'Haryana', 'tier': 'Tier2', 'weight': 0.008, 'avg_income': 315000, 'income_std': 140000},
+        'Meerut': {'state': 'Uttar Pradesh', 'tier': 'Tier2', 'weight': 0.008, 'avg_income': 245000, 'income_std': 100000},
+        'Rajkot': {'state': 'Gujarat', 'tier': 'Tier2', 'weight': 0.007, 'avg_income': 275000, 'income_std': 120000},
+        'Kalyan-Dombivali': {'state': 'Maharashtra', 'tier': 'Tier2', 'weight': 0.007, 'avg_income': 320000, 'income_std': 140000},
+        
+        # Tier 3 cities (25% of customers)
+        'Kota': {'state': 'Rajasthan', 'tier': 'Tier3', 'weight': 0.015, 'avg_income': 180000, 'income_std': 70000},
+        'Dehradun': {'state': 'Uttarakhand', 'tier': 'Tier3', 'weight': 0.008, 'avg_income': 240000, 'income_std': 95000},
+        'Chandigarh': {'state': 'Chandigarh', 'tier': 'Tier3', 'weight': 0.006, 'avg_income': 350000, 'income_std': 150000},
+        'Coimbatore': {'state': 'Tamil Nadu', 'tier': 'Tier3', 'weight': 0.008, 'avg_income': 260000, 'income_std': 110000},
+        'Jodhpur': {'state': 'Rajasthan', 'tier': 'Tier3', 'weight': 0.006, 'avg_income': 210000, 'income_std': 85000},
+        'Madurai': {'state': 'Tamil Nadu', 'tier': 'Tier3', 'weight': 0.007, 'avg_income': 230000, 'income_std': 90000},
+        'Raipur': {'state': 'Chhattisgarh', 'tier': 'Tier3', 'weight': 0.006, 'avg_income': 220000, 'income_std': 85000},
+        'Kochi': {'state': 'Kerala', 'tier': 'Tier3', 'weight': 0.007, 'avg_income': 280000, 'income_std': 120000},
+        'Thiruvananthapuram': {'state': 'Kerala', 'tier': 'Tier3', 'weight': 0.006, 'avg_income': 270000, 'income_std': 115000},
+        'Guwahati': {'state': 'Assam', 'tier': 'Tier3', 'weight': 0.005, 'avg_income': 250000, 'income_std': 100000},
+        'Mangalore': {'state': 'Karnataka', 'tier': 'Tier3', 'weight': 0.004, 'avg_income': 270000, 'income_std': 110000},
+        'Bhubaneswar': {'state': 'Odisha', 'tier': 'Tier3', 'weight': 0.005, 'avg_income': 240000, 'income_std': 95000},
+        'Jabalpur': {'state': 'Madhya Pradesh', 'tier': 'Tier3', 'weight': 0.005, 'avg_income': 210000, 'income_std': 80000},
+        
+        # Small cities/towns (25% of customers) - distributed across remaining weight
+        'Others': {'state': 'Various', 'tier': 'Tier3', 'weight': 0.15, 'avg_income': 150000, 'income_std': 60000}
+    }
+    
+    # Educational institutions distribution
+    INSTITUTION_TYPES = {
+        'IIT': {'count': 23, 'avg_fee': 200000, 'default_rate': 0.02, 'ranking_range': (1, 50)},
+        'NIT': {'count': 31, 'avg_fee': 150000, 'default_rate': 0.035, 'ranking_range': (15, 100)},
+        'IIIT': {'count': 25, 'avg_fee': 180000, 'default_rate': 0.03, 'ranking_range': (20, 80)},
+        'IIM': {'count': 20, 'avg_fee': 2000000, 'default_rate': 0.015, 'ranking_range': (1, 30)},
+        'Medical College': {'count': 350, 'avg_fee': 800000, 'default_rate': 0.06, 'ranking_range': (1, 200)},
+        'Private Engineering': {'count': 3000, 'avg_fee': 400000, 'default_rate': 0.12, 'ranking_range': (50, 1000)},
+        'State University': {'count': 800, 'avg_fee': 80000, 'default_rate': 0.15, 'ranking_range': (100, 500)},
+        'Private University': {'count': 500, 'avg_fee': 300000, 'default_rate': 0.10, 'ranking_range': (75, 300)},
+        'Coaching Institute': {'count': 250, 'avg_fee': 120000, 'default_rate': 0.25, 'ranking_range': (1, 50)}
+    }
+    
+    # Customer behavior profiles (risk_category and loan_default_probability drive loan status)
+    CUSTOMER_PROFILES = {
+        'excellent': {'probability': 0.20, 'cibil_range': (750, 850), 'default_rate': 0.02, 'payment_delay_avg': 2,
+                      'on_time_probability': 0.95, 'max_payment_delay': 7,
+                      'risk_category': 'Low', 'loan_default_probability': 0.03},
+        'good': {'probability': 0.45, 'cibil_range': (650, 749), 'default_rate': 0.06, 'payment_delay_avg': 5,
+                 'on_time_probability': 0.85, 'max_payment_delay': 15,
+                 'risk_category': 'Medium', 'loan_default_probability': 0.08},
+        'fair': {'probability': 0.25, 'cibil_range': (550, 649), 'default_rate': 0.15, 'payment_delay_avg': 12,
+                 'on_time_probability': 0.70, 'max_payment_delay': 30,
+                 'risk_category': 'High', 'loan_default_probability': 0.18},
+        'poor': {'probability': 0.10, 'cibil_range': (300, 549), 'default_rate': 0.35, 'payment_delay_avg': 25,
+                 'on_time_probability': 0.50, 'max_payment_delay': 60,
+                 'risk_category': 'Critical', 'loan_default_probability': 0.35}
+    }
+    
+    # EMI payment behaviour (used by the amortization engine)
+    PAYMENT_RULES = {
+        'first_installment_after_days': 30,
+        'days_between_installments': 30,
+        'failure_after_days': 30,           # Very late payments can fail...
+        'failure_probability': 0.3,
+        'partial_after_days': 15,           # ...or be paid partially
+        'partial_probability': 0.2,
+        'partial_fraction_range': (0.5, 0.9),
+        'seasonal_delay_months': [3, 4],    # March-April exam season
+        'seasonal_delay_probability': 0.3,
+        'seasonal_delay_days': (3, 10),
+        'penalty_per_day': 100,
+        'closure_threshold': 100,           # Small remaining balance closes the loan
+        'payment_methods': {'Auto Debit': 0.4, 'UPI': 0.3, 'Net Banking': 0.2, 'Cheque': 0.08, 'Cash': 0.02}
+    }
+    
+    # Economic impact by year (multipliers)
+    ECONOMIC_MULTIPLIERS = {
+        2019: {'default_rate': 1.0, 'disbursement': 1.0, 'avg_income': 1.0},
+        2020: {'default_rate': 1.8, 'disbursement': 0.6, 'avg_income': 0.9},  # COVID impact
+        2021: {'default_rate': 1.5, 'disbursement': 0.8, 'avg_income': 0.95},  # Recovery
+        2022: {'default_rate': 1.2, 'disbursement': 1.1, 'avg_income': 1.05},  # Normalization
+        2023: {'default_rate': 1.0, 'disbursement': 1.3, 'avg_income': 1.08},  # Growth
+        2024: {'default_rate': 0.9, 'disbursement': 1.4, 'avg_income': 1.12}   # Expansion
+    }
+    
+    # Categorical distributions (value: weight) shared by both backends
+    GENDER_DISTRIBUTION = {'M': 0.6, 'F': 0.4}
+    EMPLOYMENT_TYPES = {'Student': 0.45, 'Part-time Employee': 0.20, 'Full-time Employee': 0.25,
+                        'Self-employed': 0.08, 'Unemployed': 0.02}
+    KYC_STATUSES = {'Verified': 0.85, 'Pending': 0.12, 'Rejected': 0.03}
+    LOAN_PURPOSES = {'Tuition Fee': 0.60, 'Hostel Fee': 0.15, 'Equipment': 0.10, 'Books & Stationery': 0.05,
+                     'Examination Fee': 0.05, 'Living Expenses': 0.05}
+    COURSE_DURATIONS = {12: 0.1, 24: 0.2, 36: 0.3, 48: 0.3, 60: 0.1}
+    PARTNERSHIP_STATUSES = {'Active': 0.85, 'Inactive': 0.10, 'Under Review': 0.05}
+    DEFAULT_REASONS = {'Family Issues': 0.25, 'Medical Emergency': 0.25, 'Business Failure': 0.25, 'Other': 0.25}
+    
+    # Synthetic contact details
+    EMAIL_DOMAINS = ['gmail', 'yahoo', 'outlook', 'rediffmail', 'hotmail']
+    
+    # Deliberate data quality issues for cleaning exercises
+    DATA_QUALITY_ISSUES = {'missing_mobile_rate': 0.05, 'invalid_email_rate': 0.03}
+    
+    # Allowed deviations checked by data_quality_validation (absolute shares,
+    # except default_rate; all widened to 4 standard errors for small samples)
+    VALIDATION_TOLERANCES = {
+        'distribution': 0.02,   # share of each configured category
+        'rate': 0.01,           # injected data quality issue rates
+        'default_rate': 0.05    # relative to the rate implied by default_probability
+    }
+    
+    # Faker value pools (see faker_value_pool): values sampled once, cached on disk
+    FAKER_LOCALE = 'en_IN'  # Indian locale for realistic names and addresses
+    FAKER_POOL_SIZE = 5000
+    FAKER_POOL_DIR = None   # default: ~/.cache/edufin_faker_pool
+    
+    # Fact tables scale with the scale factor; institutions are a fixed-size
+    # dimension (like TPC-H's NATION/REGION) built from INSTITUTION_TYPES
+    SCALED_SIZES = ['TOTAL_CUSTOMERS', 'TOTAL_LOANS', 'TOTAL_PAYMENTS', 'TOTAL_DEFAULTS']
+    
+    def __init__(self, seed=None, as_of_date=None, scale_factor=None):
+        if seed is not None:
+            self.SEED = seed
+        if as_of_date is not None:
+            self.AS_OF_DATE = as_of_date
+        elif not hasattr(self, 'AS_OF_DATE'):
+            self.AS_OF_DATE = self.CURRENT_DATE
+        if scale_factor is not None:
+            if scale_factor <= 0:
+                raise ValueError(f"scale_factor must be positive, got {scale_factor}")
+            self.SCALE_FACTOR = scale_factor
+            for size in self.SCALED_SIZES:
+                setattr(self, size, max(1, int(round(getattr(EduFinDataConfig, size) * scale_factor))))
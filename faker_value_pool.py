@@ -0,0 +1,92 @@
+# =====================================================
+# EduFin Credit Solutions - Faker Value Pool
+# Pre-sampled Faker values, persisted as .npy and memory-mapped
+# =====================================================
+
+# Faker costs tens of microseconds per call, so calling it per row does not
+# scale. Each field is instead sampled once into a pool of `size` values
+# (seeded, so pools are reproducible), saved as a fixed-width unicode .npy file
+# and memory-mapped on later runs. Rows pick pool entries with keyed random
+# indices (deterministic_rng), which runs at NumPy speed:
+#
+#     pool = value_pool(config)
+#     names = pool.sample('first_name', 'customer_first_name', customer_ids)
+#
+# Pools are keyed by locale, seed and size. Delete the cache directory after
+# upgrading Faker to pick up its new data.
+
+import os
+import zlib
+
+import numpy as np
+
+from deterministic_rng import entity_seed, randint
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "edufin_faker_pool")
+
+# Pool field -> Faker provider method
+POOL_FIELDS = {
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'name': 'name',
+    'company': 'company',
+    'email': 'email',
+    'phone_number': 'phone_number'
+}
+
+
+class FakerValuePool:
+    """Lazily built, disk-cached pools of Faker values"""
+
+    def __init__(self, seed, locale='en_IN', size=5000, cache_dir=DEFAULT_CACHE_DIR):
+        self.seed = seed
+        self.locale = locale
+        self.size = size
+        self.cache_dir = cache_dir
+        self._pools = {}
+
+    def path(self, field):
+        return os.path.join(self.cache_dir, f"{field}_{self.locale}_{self.seed}_{self.size}.npy")
+
+    def values(self, field):
+        """The pool of one field, memory-mapped from the cache (built on first use)"""
+        if field not in self._pools:
+            path = self.path(field)
+            if not os.path.exists(path):
+                self._build(field, path)
+            self._pools[field] = np.load(path, mmap_mode='r')
+        return self._pools[field]
+
+    def _build(self, field, path):
+        from faker import Faker  # only needed when a pool is missing from the cache
+
+        fake = Faker(self.locale)
+        fake.seed_instance(entity_seed(self.seed, 'faker_pool', zlib.crc32(field.encode('utf-8'))))
+        provider = getattr(fake, POOL_FIELDS[field])
+        values = np.array([provider() for _ in range(self.size)], dtype=str)
+
+        # Write to a temporary name first so concurrent workers never load a partial file
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp.npy"
+        np.save(temporary, values)
+        os.replace(temporary, path)
+
+    def indices(self, stream, ids, draw=0):
+        """Keyed pool positions for each entity id"""
+        return randint(self.seed, stream, ids, 0, self.size - 1, draw)
+
+    def sample(self, field, stream, ids, draw=0):
+        """One pool value per entity id, as a NumPy string array"""
+        return np.asarray(self.values(field)[self.indices(stream, ids, draw)])
+
+
+_pools = {}
+
+
+def value_pool(config):
+    """The shared FakerValuePool for a config's seed, locale and pool size"""
+    key = (config.SEED, config.FAKER_LOCALE, config.FAKER_POOL_SIZE, config.FAKER_POOL_DIR)
+    if key not in _pools:
+        _pools[key] = FakerValuePool(config.SEED, config.FAKER_LOCALE, config.FAKER_POOL_SIZE,
+                                     config.FAKER_POOL_DIR or DEFAULT_CACHE_DIR)
+    return _pools[key]
@@ -0,0 +1,249 @@
+# =====================================================
+# EduFin Credit Solutions - Incremental Monthly Generation
+# Rolls an existing snapshot forward one period at a time
+# =====================================================
+
+# A full generate_edufin_dataset (or sharded_generation) run at AS_OF_DATE is
+# the base snapshot. Each advance moves the horizon to the next month end and
+# writes only what changed into date partitions next to it:
+#
+#     increments/payments/as_of_date=2024-07-31/             new installments
+#     increments/loans/as_of_date=2024-07-31/                loans whose current_loan_status changed
+#     increments/defaults_collections/as_of_date=2024-07-31/ every default row as of that date
+#                                                            (dpd_days moves for all of them)
+#     increments/market_rollups/as_of_date=2024-07-31/       the whole rollup, if the base has one
+#
+# Schedules resume from each loan's last payment_sequence_number and
+# total_outstanding_principal, kept in a one-row-per-loan state file, so a
+# monthly update costs O(loans + new rows) and never rereads the payment
+# history. Random draws are keyed by payment id, so the new installments are
+# exactly the rows a full run at the new horizon would add. Loans that had
+# already defaulted keep their schedule (a full rerun would redraw its stop
+# point); no new loans are originated. Writing a new base removes increments/,
+# and the state file records the base it indexed (AS_OF_DATE and a config
+# fingerprint) so increments are never applied to a different one.
+#
+#     python incremental_generation.py --output-path /tmp/edufin_data --months 3
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+import local_backend
+from amortization_engine import build_payment_schedules
+from edufin_config import EduFinDataConfig
+from parquet_layout import part_files
+from pipeline_dag import config_fingerprint
+from sharded_generation import read_sharded_table
+from table_schemas import INCREMENTS_DIRECTORY, OUTPUT_DIRECTORIES, compact_frame, read_parquet_frame
+
+INCREMENTS_DIR = INCREMENTS_DIRECTORY
+STATE_FILE = "incremental_state.json"
+LOAN_STATE_FILE = "loan_state.parquet"
+
+# Per-loan payment progress kept next to the loan columns in the state file
+PROGRESS_COLUMNS = ['last_payment_date', 'last_payment_sequence', 'total_paid', 'last_outstanding_principal']
+
+# Versioned tables: the latest row per key wins when partitions are read back
+TABLE_KEYS = {
+    'loans': 'loan_id',
+    'defaults': 'loan_id',
+    'market_rollups': ['current_city', 'disbursement_year']
+}
+
+
+def next_period(as_of_date, months=1):
+    """The month end `months` periods after `as_of_date`"""
+    return (pd.Timestamp(as_of_date) + pd.offsets.MonthEnd(months)).to_pydatetime()
+
+
+def partition_path(output_path, table, as_of_date):
+    return os.path.join(output_path, INCREMENTS_DIR, OUTPUT_DIRECTORIES[table],
+                        f"as_of_date={pd.Timestamp(as_of_date):%Y-%m-%d}")
+
+# =====================================================
+# SNAPSHOT STATE
+# =====================================================
+
+def payment_progress(payments_df):
+    """PROGRESS_COLUMNS per loan from a set of payments"""
+    progress = local_backend.last_payment_summary(payments_df)
+    last = payments_df.sort_values(['loan_id', 'payment_sequence_number']).drop_duplicates('loan_id', keep='last')
+    progress = progress.merge(last[['loan_id', 'total_outstanding_principal']], on='loan_id', how='left')
+    return progress.rename(columns={'total_outstanding_principal': 'last_outstanding_principal'})
+
+
+def snapshot_identity(config):
+    """Settings the base snapshot was generated with; increments are only valid on top of the same ones"""
+    return {
+        'base_as_of_date': f"{pd.Timestamp(config.AS_OF_DATE):%Y-%m-%d}",
+        'config_fingerprint': hashlib.sha256(config_fingerprint(config).encode()).hexdigest()
+    }
+
+
+def _initial_state(output_path, config):
+    """State of the base snapshot, built once from its loans and full payment history"""
+    loans_df = read_sharded_table(output_path, 'loans')
+    progress = payment_progress(read_sharded_table(output_path, 'payments'))
+    return {
+        'seed': config.SEED,
+        **snapshot_identity(config),
+        'as_of_date': f"{pd.Timestamp(config.AS_OF_DATE):%Y-%m-%d}",
+        'loan_columns': list(loans_df.columns),
+        'partitions': []
+    }, loans_df.merge(progress, on='loan_id', how='left')
+
+
+def load_state(output_path, config):
+    """(state, loan state) of a snapshot; the first call indexes the base snapshot"""
+    state_path = os.path.join(output_path, INCREMENTS_DIR, STATE_FILE)
+    if not os.path.exists(state_path):
+        return _initial_state(output_path, config)
+
+    with open(state_path) as handle:
+        state = json.load(handle)
+    if state['seed'] != config.SEED:
+        raise ValueError(f"Snapshot at {output_path} was generated with seed {state['seed']}, not {config.SEED}")
+    # A base regenerated with other settings (and its increments not removed) would
+    # be advanced from loan state that no longer describes it
+    identity = snapshot_identity(config)
+    if state.get('base_as_of_date') != identity['base_as_of_date']:
+        raise ValueError(f"Increments at {output_path} start from a base as of {state.get('base_as_of_date')}, "
+                         f"not {identity['base_as_of_date']}; remove {INCREMENTS_DIR}/ to start over")
+    if state.get('config_fingerprint') != identity['config_fingerprint']:
+        raise ValueError(f"Increments at {output_path} were built on a base generated with a different config; "
+                         f"remove {INCREMENTS_DIR}/ to start over")
+    return state, pd.read_parquet(os.path.join(output_path, INCREMENTS_DIR, LOAN_STATE_FILE))
+
+
+def save_state(output_path, state, loan_state):
+    """Write the state files, replacing the previous ones only once both are complete"""
+    directory = os.path.join(output_path, INCREMENTS_DIR)
+    os.makedirs(directory, exist_ok=True)
+    loan_state.to_parquet(os.path.join(directory, f"{LOAN_STATE_FILE}.tmp"), index=False)
+    with open(os.path.join(directory, f"{STATE_FILE}.tmp"), 'w') as handle:
+        json.dump(state, handle, indent=2)
+    os.replace(os.path.join(directory, f"{LOAN_STATE_FILE}.tmp"), os.path.join(directory, LOAN_STATE_FILE))
+    os.replace(os.path.join(directory, f"{STATE_FILE}.tmp"), os.path.join(directory, STATE_FILE))
+
+# =====================================================
+# ONE PERIOD
+# =====================================================
+
+def _merge_progress(loan_state, new_progress):
+    """Fold one period's per-loan payment summary into the progress columns"""
+    new = new_progress.set_index('loan_id').reindex(loan_state['loan_id'])
+    has_new = new['last_payment_sequence'].notna().to_numpy()
+
+    loan_state = loan_state.copy()
+    loan_state['last_payment_date'] = loan_state['last_payment_date'].where(
+        loan_state['last_payment_date'] >= new['last_payment_date'].to_numpy(),
+        new['last_payment_date'].to_numpy()).where(has_new, loan_state['last_payment_date'])
+    loan_state['total_paid'] = loan_state['total_paid'].where(~has_new, loan_state['total_paid'].fillna(0) +
+                                                              new['total_paid'].to_numpy())
+    for column in ['last_payment_sequence', 'last_outstanding_principal']:
+        loan_state[column] = loan_state[column].where(~has_new, new[column].to_numpy())
+    return loan_state
+
+
+def advance_period(output_path="/tmp/edufin_data", config=None):
+    """Move the snapshot at `output_path` to the next month end, writing one set of partitions"""
+
+    config = config or EduFinDataConfig()
+    state, loan_state = load_state(output_path, config)
+
+    period_config = copy.copy(config)
+    period_config.AS_OF_DATE = next_period(state['as_of_date'])
+    as_of = f"{pd.Timestamp(period_config.AS_OF_DATE):%Y-%m-%d}"
+    if as_of in state['partitions']:
+        raise ValueError(f"Partition {as_of} already exists under {output_path}")
+
+    # Status transitions (Sanctioned -> Active/Defaulted, Active -> Closed)
+    previous_status = loan_state['current_loan_status'].to_numpy()
+    months, status = local_backend.loan_status(period_config, loan_state)
+    loan_state['months_since_disbursement'] = months
+    loan_state['current_loan_status'] = status
+    loan_columns = state['loan_columns']
+
+    # New installments; loans that had already defaulted made their last payment
+    resume = loan_state.loc[loan_state['last_payment_sequence'].notna(),
+                            ['loan_id', 'last_payment_sequence', 'last_outstanding_principal']]
+    resume = resume.rename(columns={'last_payment_sequence': 'payment_sequence_number',
+                                    'last_outstanding_principal': 'total_outstanding_principal'})
+    scheduled = loan_state[previous_status != 'Defaulted'][loan_columns]
+    payments_df, new_progress = build_payment_schedules(scheduled, period_config, resume=resume, summary=True)
+    payments_df = compact_frame(payments_df, period_config)
+    loan_state = _merge_progress(loan_state, new_progress)
+
+    # Default records move with the horizon (dpd_days, buckets, collection stage)
+    last_payments = loan_state[['loan_id', 'last_payment_date', 'last_payment_sequence', 'total_paid']]
+    last_payments = last_payments[last_payments['last_payment_sequence'].notna()].astype({'last_payment_sequence': 'int64'})
+    defaults_df = local_backend.generate_defaults(period_config, loan_state[loan_columns], None,
+                                                  last_payments=last_payments)
+
+    changed = status != previous_status
+    changed_loans = compact_frame(loan_state[changed][loan_columns], period_config)
+    tables = [('payments', payments_df), ('loans', changed_loans), ('defaults', defaults_df)]
+
+    # Market rollups only see the status changes (market_customer_rollups does not depend on status)
+    if os.path.isdir(os.path.join(output_path, OUTPUT_DIRECTORIES['market_rollups'])):
+        previous_loans = changed_loans.assign(current_loan_status=previous_status[changed])
+        rollups_df = local_backend.update_market_rollups(period_config, read_table(output_path, 'market_rollups'),
+                                                         previous_loans, changed_loans)
+        tables.append(('market_rollups', rollups_df))
+
+    for table, table_df in tables:
+        local_backend.save_table(table_df, partition_path(output_path, table, as_of))
+
+    state['as_of_date'] = as_of
+    state['partitions'].append(as_of)
+    save_state(output_path, state, loan_state)
+    return {'as_of_date': as_of, 'payments': len(payments_df), 'loans': len(changed_loans),
+            'defaults': len(defaults_df)}
+
+
+def advance_months(output_path="/tmp/edufin_data", config=None, months=1):
+    """Advance the snapshot `months` periods, one partition per month"""
+
+    print(f"Advancing EduFin snapshot at {output_path} by {months} month(s)...")
+    results = []
+    for _ in range(months):
+        started = time.perf_counter()
+        result = advance_period(output_path, config)
+        print(f"   {result['as_of_date']}: {result['payments']:,} new payments, {result['loans']:,} status changes, "
+              f"{result['defaults']:,} default rows ({time.perf_counter() - started:.1f}s)")
+        results.append(result)
+    return results
+
+# =====================================================
+# READING A SNAPSHOT BACK
+# =====================================================
+
+def read_table(output_path, table):
+    """A table as of the latest partition: base rows plus increments, latest version per key"""
+    paths = part_files(os.path.join(output_path, OUTPUT_DIRECTORIES[table]))
+    increments = os.path.join(output_path, INCREMENTS_DIR, OUTPUT_DIRECTORIES[table])
+    if os.path.isdir(increments):
+        # as_of_date=YYYY-MM-DD names sort chronologically
+        paths += [os.path.join(increments, partition) for partition in sorted(os.listdir(increments))]
+    table_df = read_parquet_frame(paths)
+    if table in TABLE_KEYS:
+        table_df = table_df.drop_duplicates(TABLE_KEYS[table], keep='last').sort_values(TABLE_KEYS[table])
+    return table_df.reset_index(drop=True)
+
+# =====================================================
+# USAGE EXAMPLE
+# =====================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll an EduFin snapshot forward month by month")
+    parser.add_argument("--output-path", default="/tmp/edufin_data", help="directory of the base snapshot")
+    parser.add_argument("--months", type=int, default=1)
+    args = parser.parse_args()
+
+    advance_months(args.output_path, months=args.months)
@@ -0,0 +1,572 @@
+# =====================================================
+# EduFin Credit Solutions - Local Data Generation Backend
+# Pure NumPy/pandas generators - no Spark, no JVM
+# =====================================================
+
+# Mirrors the Spark backend table by table with the same business rules and
+# distributions, driven by deterministic_rng so every value is keyed by entity
+# id. Generators accept explicit id arrays, so any slice of customers or loans
+# (and their dependent payments/defaults) can be produced on its own.
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from amortization_engine import build_payment_schedules, format_references
+from deterministic_rng import normal, randint, uniform, weighted_choice, weighted_sampler
+from dimension_lookups import city_dimension, lookup, profile_dimension
+from faker_value_pool import value_pool
+from parquet_layout import write_pandas_table
+from referential_integrity import KeyBitmap
+from table_schemas import compact_frame, read_parquet_frame, write_parquet_frame
+
+# =====================================================
+# VECTORIZED HELPERS
+# =====================================================
+
+def _choice(config_weights, seed, stream, ids, draw=0):
+    """Weighted categorical draw from a {value: weight} config dictionary"""
+    return weighted_choice(list(config_weights.keys()), list(config_weights.values()),
+                           uniform(seed, stream, ids, draw))
+
+
+def _exact_choice(config_weights, seed, stream, ids, population):
+    """Weighted categorical values of entity ids 1..population, in exact proportions over the population"""
+    return weighted_sampler(list(config_weights.keys()), list(config_weights.values())).exact(
+        seed, stream, ids, population)
+
+
+def _date_between(seed, stream, ids, start, end, draw=0):
+    """Dates uniformly drawn from [start, end] as datetime64[s]"""
+    start = np.datetime64(start.date() if hasattr(start, 'date') else start, 'D')
+    end = np.datetime64(end.date() if hasattr(end, 'date') else end, 'D')
+    days = randint(seed, stream, ids, 0, (end - start).astype(np.int64), draw)
+    return (start + days).astype('datetime64[s]')
+
+
+def _digits(seed, stream, ids, width, draw=0):
+    """Zero-padded random digit strings"""
+    return format_references('', randint(seed, stream, ids, 0, 10 ** width - 1, draw), width)
+
+
+def _letters(seed, stream, ids, count, draw=0):
+    """Random upper-case letter strings"""
+    codes = np.stack([65 + np.floor(uniform(seed, stream, ids, draw * 16 + i) * 26) for i in range(count)], axis=1)
+    return np.ascontiguousarray(codes.astype(np.uint32)).view(f'U{count}').ravel()
+
+
+def _months_between(end, start):
+    """Spark's months_between(end, start) for day-resolution dates"""
+    start = start.astype('datetime64[D]')
+    end = np.datetime64(end, 'D')
+    start_month, end_month = start.astype('datetime64[M]'), end.astype('datetime64[M]')
+    start_day = (start - start_month).astype(np.int64) + 1
+    end_day = (end - end_month).astype(np.int64) + 1
+    months = (end_month - start_month).astype(np.int64).astype(np.float64)
+    # Same day of month, or both month ends, count as whole months; else a 31-day month
+    start_last = (start + 1).astype('datetime64[M]') != start_month
+    end_last = (end + 1).astype('datetime64[M]') != end_month
+    whole = (start_day == end_day) | (start_last & end_last)
+    return np.round(np.where(whole, months, months + (end_day - start_day) / 31.0), 8)
+
+# =====================================================
+# INSTITUTIONS TABLE GENERATION
+# =====================================================
+
+# Cities used to name institutions of each flagship type; other types draw from
+# the first 30 (medical colleges) or 40 configured cities
+INSTITUTION_CITIES = {
+    'IIT': ['Mumbai', 'Delhi', 'Chennai', 'Kanpur', 'Kharagpur', 'Roorkee', 'Guwahati', 'Hyderabad'],
+    'NIT': ['Trichy', 'Warangal', 'Surathkal', 'Calicut', 'Rourkela', 'Durgapur', 'Jaipur', 'Bhopal'],
+    'IIM': ['Ahmedabad', 'Bangalore', 'Calcutta', 'Lucknow', 'Kozhikode', 'Indore', 'Shillong'],
+    'Coaching Institute': ['Kota', 'Delhi', 'Hyderabad', 'Pune', 'Mumbai']
+}
+INSTITUTION_NAME_PREFIXES = {
+    'IIT': 'Indian Institute of Technology',
+    'NIT': 'National Institute of Technology',
+    'IIM': 'Indian Institute of Management'
+}
+
+
+def generate_institutions(config):
+    """Generate realistic educational institutions data"""
+
+    seed = config.SEED
+    pool = value_pool(config)
+    cities = list(config.CITY_DISTRIBUTION.keys())
+    partnership_window_start = config.AS_OF_DATE - pd.Timedelta(days=5 * 365)
+
+    # Institution ids are assigned type by type, in INSTITUTION_TYPES order
+    counts = [type_config['count'] for type_config in config.INSTITUTION_TYPES.values()]
+    ids = np.arange(1, sum(counts) + 1)
+    inst_type = np.repeat(list(config.INSTITUTION_TYPES.keys()), counts)
+    city = np.empty(len(ids), dtype=object)
+    name = np.empty(len(ids), dtype=object)
+    nirf_ranking = np.full(len(ids), None, dtype=object)
+    type_default_rate = np.repeat([t['default_rate'] for t in config.INSTITUTION_TYPES.values()], counts)
+
+    for type_name, type_config in config.INSTITUTION_TYPES.items():
+        rows = np.flatnonzero(inst_type == type_name)
+        type_ids = ids[rows]
+
+        # Generate realistic institution names
+        choices = INSTITUTION_CITIES.get(type_name, cities[:30] if type_name == 'Medical College' else cities[:40])
+        city[rows] = np.asarray(choices, dtype=object)[randint(seed, 'institution_city', type_ids, 0, len(choices) - 1)]
+        if type_name in INSTITUTION_NAME_PREFIXES:
+            name[rows] = INSTITUTION_NAME_PREFIXES[type_name] + ' ' + city[rows]
+        elif type_name == 'Medical College':
+            name[rows] = city[rows] + ' Medical College'
+        elif type_name == 'Coaching Institute':
+            name[rows] = pool.sample('company', 'institution_company', type_ids).astype(object) + ' ' + city[rows]
+        else:
+            name[rows] = city[rows] + ' ' + type_name
+
+        low, high = type_config['ranking_range']
+        if high <= 1000:
+            nirf_ranking[rows] = randint(seed, 'institution_ranking', type_ids, low, high).tolist()
+
+    # Select city and get details (cities outside the configuration use 'Others')
+    city_info = lookup(city_dimension(config), 'city', city, fallback='Others')
+
+    institutions_df = pd.DataFrame({
+        'institution_id': ids,
+        'institution_name': name,
+        'institution_code': format_references('INST', ids, 6),
+        'institution_type': inst_type,
+        'city': city,
+        'state': city_info['state'].to_numpy(),
+        'tier_classification': city_info['tier'].to_numpy(),
+        'establishment_year': randint(seed, 'institution_established', ids, 1950, 2020),
+        'nirf_ranking': nirf_ranking,
+        'placement_percentage': np.clip(normal(seed, 'institution_placement', ids, mean=85, std=15), 30, 100),
+        'average_package': normal(seed, 'institution_package', ids, mean=600000, std=200000).astype(np.int64),
+        'partnership_start_date': _date_between(seed, 'institution_partnership', ids,
+                                                partnership_window_start, config.AS_OF_DATE),
+        'partnership_status': _exact_choice(config.PARTNERSHIP_STATUSES, seed, 'institution_partnership_status', ids,
+                                            len(ids)),
+        'default_rate_percentage': np.maximum(0, normal(seed, 'institution_default_rate', ids,
+                                                        mean=0, std=2) + type_default_rate * 100),
+        'contact_person_name': pool.sample('name', 'institution_contact_name', ids),
+        'contact_email': pool.sample('email', 'institution_contact_email', ids),
+        'contact_phone': pool.sample('phone_number', 'institution_contact_phone', ids)
+    })
+    return compact_frame(institutions_df, config)
+
+# =====================================================
+# CUSTOMERS TABLE GENERATION
+# =====================================================
+
+def customer_attributes(config, customer_ids):
+    """Risk-relevant customer attributes, recomputable for any set of customer ids"""
+
+    seed = config.SEED
+    cities = list(config.CITY_DISTRIBUTION.keys())
+    current_city = _exact_choice({city: config.CITY_DISTRIBUTION[city]['weight'] for city in cities},
+                                 seed, 'customer_city', customer_ids, config.TOTAL_CUSTOMERS)
+    customer_profile = _exact_choice({p: info['probability'] for p, info in config.CUSTOMER_PROFILES.items()},
+                                     seed, 'customer_profile', customer_ids, config.TOTAL_CUSTOMERS)
+
+    # Calculate income based on city distribution
+    city = lookup(city_dimension(config), 'city', current_city)
+    annual_income = np.abs(normal(seed, 'customer_income', customer_ids) * city['income_std'].to_numpy() +
+                           city['avg_income'].to_numpy())
+
+    # Calculate CIBIL score based on customer profile
+    profile = lookup(profile_dimension(config), 'profile', customer_profile)
+    cibil_low = profile['cibil_low'].to_numpy()
+    cibil_high = profile['cibil_high'].to_numpy()
+    cibil_score = (uniform(seed, 'customer_cibil', customer_ids) * (cibil_high - cibil_low) + cibil_low).astype(np.int32)
+
+    return {
+        'current_city': current_city,
+        'current_state': city['state'].to_numpy(),
+        'customer_profile': customer_profile,
+        'annual_income': annual_income,
+        'cibil_score': cibil_score
+    }
+
+
+def generate_customers(config, customer_ids=None):
+    """Generate realistic customer data with proper distributions"""
+
+    seed = config.SEED
+    pool = value_pool(config)
+    ids = np.arange(1, config.TOTAL_CUSTOMERS + 1) if customer_ids is None else np.asarray(customer_ids)
+    attributes = customer_attributes(config, ids)
+
+    mobile_number = pd.Series(format_references('', randint(seed, 'customer_mobile', ids, 6 * 10 ** 9, 10 ** 10 - 1), 10),
+                              dtype=object)
+    email = pd.Series(_digits(seed, 'customer_email', ids, 8), dtype=object)
+    email = 'user' + email + '@' + _choice({d: 1 for d in config.EMAIL_DOMAINS}, seed, 'customer_email', ids, draw=1) + '.com'
+    pan_number = (pd.Series(_letters(seed, 'customer_pan', ids, 5), dtype=object) +
+                  _digits(seed, 'customer_pan', ids, 4, draw=1) + _letters(seed, 'customer_pan', ids, 1, draw=2))
+
+    current_city = attributes['current_city']
+
+    customers_df = pd.DataFrame({
+        'customer_id': ids,
+        'application_number': format_references('APPL', randint(seed, 'customer_application', ids, 0, 10 ** 8 - 1), 8),
+        'full_name': (pd.Series(pool.sample('first_name', 'customer_first_name', ids), dtype=object) + ' ' +
+                      pool.sample('last_name', 'customer_last_name', ids)).to_numpy(),
+        'date_of_birth': _date_between(seed, 'customer_dob', ids, pd.Timestamp(1988, 1, 1), pd.Timestamp(2006, 12, 31)),
+        'gender': _exact_choice(config.GENDER_DISTRIBUTION, seed, 'customer_gender', ids, config.TOTAL_CUSTOMERS),
+        # Add data quality issues: 5% missing mobile numbers, 3% invalid emails
+        'mobile_number': mobile_number.where(uniform(seed, 'customer_mobile_missing', ids) >=
+                                             config.DATA_QUALITY_ISSUES['missing_mobile_rate'], None),
+        'email': email.where(uniform(seed, 'customer_email_invalid', ids) >=
+                             config.DATA_QUALITY_ISSUES['invalid_email_rate'], email + 'invalid'),
+        'pan_number': pan_number,
+        'aadhar_number': _digits(seed, 'customer_aadhar', ids, 12),
+        'current_city': current_city,
+        'employment_type': _exact_choice(config.EMPLOYMENT_TYPES, seed, 'customer_employment', ids,
+                                         config.TOTAL_CUSTOMERS),
+        'customer_profile': attributes['customer_profile'],
+        'registration_date': _date_between(seed, 'customer_registration', ids,
+                                           config.BUSINESS_START_DATE, config.CURRENT_DATE),
+        'kyc_status': _exact_choice(config.KYC_STATUSES, seed, 'customer_kyc', ids, config.TOTAL_CUSTOMERS),
+        'current_state': attributes['current_state'],
+        'annual_income': attributes['annual_income'],
+        'cibil_score': attributes['cibil_score']
+    })
+    return compact_frame(customers_df, config)
+
+# =====================================================
+# LOANS TABLE GENERATION
+# =====================================================
+
+def generate_loans(config, customers_df=None, institutions_df=None, loan_ids=None):
+    """Generate realistic loan data with complex business logic
+
+    Customer attributes are recomputed from the customer id (they are keyed
+    streams), so no join against `customers_df` is needed and any slice of
+    loan ids can be generated independently.
+    """
+
+    seed = config.SEED
+    ids = np.arange(1, config.TOTAL_LOANS + 1) if loan_ids is None else np.asarray(loan_ids)
+    customer_ids = randint(seed, 'loan_customer', ids, 1, config.TOTAL_CUSTOMERS)
+    customer = customer_attributes(config, customer_ids)
+
+    loans_df = pd.DataFrame({
+        'loan_id': ids,
+        'loan_application_number': format_references('LOAN', randint(seed, 'loan_application', ids, 0, 10 ** 10 - 1), 10),
+        'customer_id': customer_ids,
+        # Loan amounts and interest rates - normal, clipped to the product limits
+        'requested_amount': np.round(np.clip(normal(seed, 'loan_requested_amount', ids) * 300000 + 400000,
+                                             50000, 2500000), 2),
+        'base_interest_rate': np.round(np.clip(normal(seed, 'loan_interest_rate', ids) * 2.5 + 12.0, 7.5, 18.0), 3),
+        'application_date': _date_between(seed, 'loan_application_date', ids,
+                                          config.BUSINESS_START_DATE, config.CURRENT_DATE),
+        # Any of the generated institutions (ids 1..sum of the INSTITUTION_TYPES counts)
+        'institution_id': randint(seed, 'loan_institution', ids, 1,
+                                  sum(type_config['count'] for type_config in config.INSTITUTION_TYPES.values())),
+        'loan_purpose': _exact_choice(config.LOAN_PURPOSES, seed, 'loan_purpose', ids, config.TOTAL_LOANS),
+        'course_duration_months': _exact_choice(config.COURSE_DURATIONS, seed, 'loan_course_duration', ids,
+                                                config.TOTAL_LOANS),
+        'customer_profile': customer['customer_profile'],
+        'cibil_score': customer['cibil_score'],
+        'annual_income': customer['annual_income'],
+        'current_city': customer['current_city']
+    })
+
+    # Calculate loan approval logic
+    cibil = loans_df['cibil_score'].to_numpy()
+    loans_df['approval_probability'] = np.select([cibil >= 750, cibil >= 650, cibil >= 550], [0.95, 0.80, 0.60], 0.30)
+    loans_df['loan_status'] = np.where(uniform(seed, 'loan_approval', ids) < loans_df['approval_probability'],
+                                       'Approved', 'Rejected')
+
+    # Only process approved loans further
+    approved_loans = loans_df[loans_df['loan_status'] == 'Approved'].reset_index(drop=True)
+    ids = approved_loans['loan_id'].to_numpy()
+
+    # Calculate sanctioned amount (usually less than requested)
+    approved_loans['sanctioned_amount'] = np.minimum(approved_loans['requested_amount'],
+                                                     approved_loans['annual_income'] * 2.5)
+    approved_loans['loan_amount'] = approved_loans['sanctioned_amount']
+
+    # Risk categorization
+    profile = lookup(profile_dimension(config), 'profile', approved_loans['customer_profile'])
+    approved_loans['risk_category'] = profile['risk_category'].to_numpy()
+
+    # Calculate EMI
+    duration = approved_loans['course_duration_months'].to_numpy()
+    approved_loans['loan_term_months'] = np.where(duration <= 24, duration + 24, duration + 36)
+    approved_loans['monthly_interest_rate'] = approved_loans['base_interest_rate'] / 100 / 12
+
+    # EMI calculation using standard formula
+    rate = approved_loans['monthly_interest_rate']
+    growth = (1 + rate) ** approved_loans['loan_term_months']
+    approved_loans['emi_amount'] = approved_loans['loan_amount'] * rate * growth / (growth - 1)
+
+    # Disbursement dates (after approval)
+    approved_loans['disbursement_date'] = (approved_loans['application_date'].to_numpy() +
+                                           randint(seed, 'loan_disbursement', ids, 15, 59).astype('timedelta64[D]'))
+
+    # Current loan status based on time and customer behavior
+    approved_loans['default_probability'] = profile['default_probability'].to_numpy()
+    months, status = loan_status(config, approved_loans)
+    approved_loans.insert(approved_loans.columns.get_loc('default_probability'), 'months_since_disbursement', months)
+    approved_loans['current_loan_status'] = status
+
+    return compact_frame(approved_loans, config)
+
+
+def loan_status(config, loans_df):
+    """months_since_disbursement and current_loan_status of approved loans at config.AS_OF_DATE"""
+    months = _months_between(np.datetime64(config.AS_OF_DATE.date()), loans_df['disbursement_date'].to_numpy())
+    defaulted = uniform(config.SEED, 'loan_default', loans_df['loan_id'].to_numpy()) < \
+        loans_df['default_probability'].to_numpy()
+    status = np.select([months < 0, defaulted, months >= loans_df['loan_term_months'].to_numpy()],
+                       ['Sanctioned', 'Defaulted', 'Closed'], 'Active')
+    return months, status
+
+# =====================================================
+# PAYMENTS TABLE GENERATION
+# =====================================================
+
+def generate_payments(config, loans_df, summary=False):
+    """Generate realistic payment data with behavioral patterns
+
+    With summary=True, returns (payments, per-loan summary) for generate_defaults
+    (see amortization_engine.SUMMARY_COLUMNS).
+    """
+    if not summary:
+        return compact_frame(build_payment_schedules(loans_df, config), config)
+    payments_df, loan_summary = build_payment_schedules(loans_df, config, summary=True)
+    return compact_frame(payments_df, config), loan_summary
+
+# =====================================================
+# DEFAULTS TABLE GENERATION
+# =====================================================
+
+def last_payment_summary(payments_df):
+    """Per-loan last payment date, last installment number and total amount paid"""
+    return payments_df.groupby('loan_id', observed=True).agg(
+        last_payment_date=('payment_date', 'max'),
+        last_payment_sequence=('payment_sequence_number', 'max'),
+        total_paid=('payment_amount', 'sum')
+    ).reset_index()
+
+
+def generate_defaults(config, loans_df, payments_df, last_payments=None):
+    """Generate realistic default and collection data
+
+    `last_payments` (the generate_payments summary, or last_payment_summary)
+    can be passed instead of `payments_df` when the per-loan summary is already known.
+    """
+
+    seed = config.SEED
+
+    # Find defaulted loans
+    defaulted_loans = loans_df[loans_df['current_loan_status'] == 'Defaulted']
+
+    # Get last payment information for each defaulted loan
+    if last_payments is None:
+        last_payments = last_payment_summary(payments_df)
+
+    last_payments = last_payments[['loan_id', 'last_payment_date', 'last_payment_sequence', 'total_paid']]
+    defaults_df = defaulted_loans.merge(last_payments, on='loan_id', how='left').reset_index(drop=True)
+    ids = defaults_df['loan_id'].to_numpy()
+
+    # Default 60 days after last payment, or 90 days after disbursement
+    defaults_df['default_date'] = defaults_df['last_payment_date'].add(pd.Timedelta(days=60)).fillna(
+        defaults_df['disbursement_date'] + pd.Timedelta(days=90))
+    defaults_df['dpd_days'] = (pd.Timestamp(config.AS_OF_DATE.date()) - defaults_df['default_date']).dt.days
+
+    # Categorize into buckets
+    dpd = defaults_df['dpd_days'].to_numpy()
+    dpd_bands = [dpd <= 30, dpd <= 60, dpd <= 90, dpd <= 180]
+    defaults_df['default_bucket'] = np.select(dpd_bands, ['0-30 DPD', '31-60 DPD', '61-90 DPD', '91-180 DPD'],
+                                              '180+ DPD')
+
+    # Calculate default amount
+    defaults_df['default_amount'] = defaults_df['loan_amount'] - defaults_df['total_paid'].fillna(0)
+
+    # Add default reasons based on customer profile and timing
+    default_year = defaults_df['default_date'].dt.year.to_numpy()
+    default_month = defaults_df['default_date'].dt.month.to_numpy()
+    defaults_df['primary_default_reason'] = np.select(
+        [np.isin(default_year, [2020, 2021]),                      # COVID impact
+         defaults_df['customer_profile'].to_numpy() == 'poor',
+         np.isin(default_month, [3, 4])],                          # Exam season
+        ['Job Loss', 'Income Reduction', 'Course Dropout'],
+        _choice(config.DEFAULT_REASONS, seed, 'default_reason', ids))
+
+    # Collection stage based on time in default
+    defaults_df['collection_stage'] = np.select(
+        [dpd <= 30, dpd <= 90, dpd <= 180], ['Early Collection', 'Primary Collection', 'Secondary Collection'],
+        'Legal Action')
+
+    # Recovery information: 70-100%, 40-80%, 20-50%, 10-30% and 0-15% by bucket
+    recovery_u = uniform(seed, 'default_recovery', ids)
+    defaults_df['recovery_percentage'] = np.select(
+        dpd_bands, [recovery_u * 30 + 70, recovery_u * 40 + 40, recovery_u * 30 + 20, recovery_u * 20 + 10],
+        recovery_u * 15)
+    defaults_df['total_recovered_amount'] = defaults_df['default_amount'] * defaults_df['recovery_percentage'] / 100
+
+    return compact_frame(defaults_df, config)
+
+# =====================================================
+# MARKET ROLLUPS (OPTIONAL SUMMARY TABLES)
+# =====================================================
+
+# market_penetration_analysis in EduFin_SQL_V3.sql aggregates every customer
+# and loan per city; EduFin_SQL_V3_Rollups.sql computes the same columns from
+#   market_rollups           loan sums per city and disbursement year
+#   market_customer_rollups  customer counts per city and set of loan years
+# Distinct customers are not additive over years, so each customer is
+# counted once, under the bitmask of the years their loans were disbursed in
+# (bit year - 2000; bit 0 for a loan without one, or no loan at all).
+ROLLUP_KEYS = ['current_city', 'current_state', 'disbursement_year']
+ROLLUP_MEASURES = ['loans', 'customers_without_loans', 'portfolio_value', 'defaulted_loans',
+                   'currently_defaulted_loans', 'processing_days', 'processed_loans']
+ROLLUP_BASE_YEAR = 2000
+
+
+def _city_states(config, cities):
+    return lookup(city_dimension(config), 'city', cities, fallback='Others')['state'].to_numpy()
+
+
+def loan_rollups(loans_df):
+    """Loan measures of market_rollups per city and disbursement year"""
+    rollup_df = pd.DataFrame({
+        'current_city': loans_df['current_city'].astype('str'),
+        'disbursement_year': loans_df['disbursement_date'].dt.year,
+        'loan_amount': loans_df['loan_amount'],
+        # loan_status is what EduFin_SQL_V3.sql tests; current_loan_status is where defaults show up
+        'defaulted': (loans_df['loan_status'] == 'Defaulted').astype('int64'),
+        'currently_defaulted': (loans_df['current_loan_status'] == 'Defaulted').astype('int64'),
+        'processing_days': (loans_df['disbursement_date'] - loans_df['application_date']).dt.days
+    })
+    rollups = rollup_df.groupby(['current_city', 'disbursement_year'], dropna=False).agg(
+        loans=('loan_amount', 'size'),
+        portfolio_value=('loan_amount', lambda amounts: amounts.sum(min_count=1)),
+        defaulted_loans=('defaulted', 'sum'),
+        currently_defaulted_loans=('currently_defaulted', 'sum'),
+        processing_days=('processing_days', lambda days: days.sum(min_count=1)),
+        processed_loans=('processing_days', 'count')
+    ).reset_index()
+    rollups['customers_without_loans'] = 0
+    return rollups
+
+
+def _sum_rollups(config, frames):
+    """market_rollups of several partial rollups, added up per city and year"""
+    rollups = pd.concat([frame.astype({'current_city': 'str'}).drop(columns='current_state', errors='ignore')
+                         for frame in frames], ignore_index=True)
+    rollups = rollups.groupby(['current_city', 'disbursement_year'], dropna=False)[ROLLUP_MEASURES].sum(
+        min_count=1).reset_index()
+    rollups['current_state'] = _city_states(config, rollups['current_city'])
+    return compact_frame(rollups[ROLLUP_KEYS + ROLLUP_MEASURES], config)
+
+
+def generate_market_rollups(config, customers_df, loans_df):
+    """Loans per city and disbursement year (the market_rollups table)"""
+
+    # Customers without loans are rows with no loan in the query's LEFT JOIN
+    idle = customers_df.loc[~customers_df['customer_id'].isin(loans_df['customer_id']), 'current_city']
+    idle = idle.astype('str').value_counts().rename_axis('current_city').reset_index(name='customers_without_loans')
+    idle = idle.assign(disbursement_year=np.nan, loans=0, portfolio_value=np.nan, defaulted_loans=0,
+                       currently_defaulted_loans=0, processing_days=np.nan, processed_loans=0)
+    return _sum_rollups(config, [loan_rollups(loans_df), idle])
+
+
+def generate_market_customer_rollups(config, customers_df, loans_df):
+    """Customers per city and set of loan disbursement years (the market_customer_rollups table)"""
+
+    years = loans_df['disbursement_date'].dt.year.to_numpy()
+    bits = pd.DataFrame({
+        'customer_id': loans_df['customer_id'].to_numpy(),
+        'bit': np.left_shift(1, np.where(np.isnan(years), 0, years - ROLLUP_BASE_YEAR).astype(np.int64))
+    }).drop_duplicates()
+    loan_years = bits.groupby('customer_id')['bit'].sum()
+
+    rollups = pd.DataFrame({
+        'current_city': customers_df['current_city'].astype('str').to_numpy(),
+        'loan_years': loan_years.reindex(customers_df['customer_id']).fillna(1).astype('int64').to_numpy()
+    }).value_counts().rename('customers').reset_index().sort_values(['current_city', 'loan_years'])
+    rollups.insert(1, 'current_state', _city_states(config, rollups['current_city']))
+    return compact_frame(rollups.reset_index(drop=True), config)
+
+
+def update_market_rollups(config, rollups_df, previous_loans, current_loans):
+    """Fold new versions of existing loans (status changes) into market_rollups
+
+    `previous_loans` and `current_loans` hold the same loans before and after
+    the change; market_customer_rollups does not depend on loan status.
+    """
+    removed = loan_rollups(previous_loans)
+    removed[ROLLUP_MEASURES] = -removed[ROLLUP_MEASURES]
+    return _sum_rollups(config, [rollups_df, loan_rollups(current_loans), removed])
+
+# =====================================================
+# BACKEND OPERATIONS USED BY generate_edufin_dataset
+# =====================================================
+
+def cache_table(df):
+    """pandas frames are already materialized"""
+    return df
+
+
+def count_rows(df):
+    return len(df)
+
+
+def aggregate(df, measures):
+    """Evaluate data_quality_validation measures over in-memory columns"""
+    results = {}
+    for name, (kind, column, value) in measures.items():
+        if kind == 'rows':
+            result = len(df)
+        elif kind == 'nulls':
+            result = df[column].isna().sum()
+        elif kind == 'equals':
+            result = (df[column] == value).sum()
+        elif kind == 'contains':
+            result = df[column].str.contains(value, regex=False, na=False).sum()
+        elif kind in ('min', 'max'):
+            result = getattr(df[column], kind)() if len(df) else None
+        elif kind == 'sum':
+            values = df[column] if value is None else df[column][df[value[0]] != value[1]]
+            result = float(values.sum())
+        else:
+            raise ValueError(f"Unknown measure kind '{kind}'")
+        # numpy scalars -> plain Python numbers for the JSON report
+        results[name] = result.item() if hasattr(result, 'item') else result
+    return results
+
+
+def count_orphans(child_df, column, parent_df, parent_column):
+    """Non-null keys of `child_df` missing from the parent table"""
+    parent_keys = KeyBitmap.from_keys(parent_df[parent_column].dropna().to_numpy())
+    return int((~parent_keys.contains(child_df[column].dropna().to_numpy())).sum())
+
+
+def save_table(df, path, layout=None):
+    """Write one Parquet part file per table directory, like the Spark layout
+
+    With a parquet_layout layout the table is partitioned, sorted and encoded instead.
+    """
+    if layout is not None:
+        write_pandas_table(df, path, layout)
+        return
+    # Same overwrite semantics as Spark: parts of an earlier run must not be read back
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    write_parquet_frame(df, os.path.join(path, 'part-00000.parquet'))
+
+
+def load_table(path):
+    return read_parquet_frame(path)
+
+
+def checkpoint_table(df, path):
+    """Persist a table for pipeline_dag; the in-memory frame keeps being used"""
+    save_table(df, path)
+    return df
+
+
+def release_table(df):
+    """Nothing to unpersist: frames are freed once no stage references them"""
@@ -0,0 +1,170 @@
+# =====================================================
+# EduFin Credit Solutions - Physical Parquet Layouts
+# Partitioning, sort order, row groups and encodings per table
+# =====================================================
+
+# By default generate_edufin_dataset writes each table as flat, unsorted part
+# files. With table_layouts=TABLE_LAYOUTS (or --bi-layout) tables are written
+# for BI readers instead:
+#   payments  partitioned by due_date year/month, sorted by loan_id
+#   loans     partitioned by application_date year, clustered by customer_id
+#   others    clustered by their primary key
+# Partition pruning skips whole directories for date filters, and the sort
+# order keeps each row group's min/max statistics narrow, so key lookups and
+# joins (e.g. loans -> customers in EduFin_SQL_V3.sql) skip most row groups.
+# Dictionary encoding stays on for low-cardinality values (payment_method,
+# current_city, dates, amounts that repeat) and is switched off for columns
+# that are unique per row (ids, references), where the dictionary pages would
+# only be overhead before the writer falls back to plain encoding.
+#
+# Partition columns (due_year, ...) are derived from the date columns and live
+# in the directory names (Hive style: payments/due_year=2023/due_month=4/).
+
+import os
+import re
+import shutil
+
+from table_schemas import storage_table
+
+# Applies to every table unless its layout overrides it
+LAYOUT_DEFAULTS = {
+    'partition_by': [],             # (partition column, source date column, 'year' | 'month')
+    'sort_by': [],
+    'plain': [],                    # unique-per-row columns written without dictionary encoding
+    'compression': 'zstd',          # SF 1 payments, month partitions: 117 MB vs 149 MB with snappy
+    'row_group_rows': 131072,       # pyarrow (local backend)
+    'row_group_bytes': 16 * 2 ** 20,  # parquet.block.size (Spark backend)
+    'max_rows_per_file': 5000000
+}
+
+TABLE_LAYOUTS = {
+    'institutions': {
+        'sort_by': ['institution_id'],
+        'plain': ['institution_id', 'institution_code', 'contact_email', 'contact_phone']
+    },
+    'customers': {
+        'sort_by': ['customer_id'],
+        'plain': ['customer_id', 'application_number', 'mobile_number', 'email', 'pan_number', 'aadhar_number']
+    },
+    'loans': {
+        'partition_by': [('application_year', 'application_date', 'year')],
+        'sort_by': ['customer_id', 'loan_id'],
+        'plain': ['loan_id', 'loan_application_number']
+    },
+    'payments': {
+        'partition_by': [('due_year', 'due_date', 'year'), ('due_month', 'due_date', 'month')],
+        'sort_by': ['loan_id', 'payment_sequence_number'],
+        'plain': ['payment_id', 'transaction_reference']
+    },
+    'defaults': {
+        'sort_by': ['loan_id'],
+        'plain': ['loan_id', 'loan_application_number']
+    }
+}
+
+
+def table_layout(table, layouts=None):
+    """The full layout of one table (defaults filled in), or None for the flat layout"""
+    layouts = TABLE_LAYOUTS if layouts is None else layouts
+    if table not in layouts:
+        return None
+    return dict(LAYOUT_DEFAULTS, **layouts[table])
+
+
+def _natural_key(path):
+    # due_month=10 sorts after due_month=9
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', path)]
+
+
+def part_files(directory, suffixes=('.parquet',)):
+    """Data files under a table directory, partition subdirectories included, in natural order"""
+    files = []
+    for root, directories, names in os.walk(directory):
+        directories[:] = [name for name in directories if not name.startswith(('.', '_'))]
+        files += [os.path.join(root, name) for name in names
+                  if name.endswith(suffixes) and not name.startswith(('.', '_'))]
+    return sorted(files, key=lambda path: _natural_key(os.path.relpath(path, directory)))
+
+# =====================================================
+# WRITERS
+# =====================================================
+
+def write_pandas_table(df, path, layout):
+    """Write a pandas frame with a layout through pyarrow datasets"""
+    import pyarrow.dataset as ds
+
+    partition_columns = [name for name, _, _ in layout['partition_by']]
+    df = df.assign(**{name: getattr(df[source].dt, part).astype('int32')
+                      for name, source, part in layout['partition_by']})
+    order = partition_columns + layout['sort_by']
+    if order:
+        df = df.sort_values(order, kind='stable')
+    table = storage_table(df)
+
+    parquet_format = ds.ParquetFileFormat()
+    options = parquet_format.make_write_options(
+        compression=layout['compression'],
+        use_dictionary=[name for name in table.column_names if name not in layout['plain']],
+        write_statistics=True,
+        store_decimal_as_integer=True)
+    partitioning = (ds.partitioning(table.select(partition_columns).schema, flavor='hive')
+                    if partition_columns else None)
+
+    # Same overwrite semantics as Spark: the previous table directory goes away
+    shutil.rmtree(path, ignore_errors=True)
+    ds.write_dataset(table, path, format=parquet_format, file_options=options, partitioning=partitioning,
+                     basename_template="part-{i}.parquet", max_rows_per_group=layout['row_group_rows'],
+                     min_rows_per_group=layout['row_group_rows'],
+                     max_rows_per_file=layout['max_rows_per_file'], preserve_order=True)
+
+
+def write_spark_table(df, path, layout):
+    """Write a Spark DataFrame with a layout: one sorted task per partition value"""
+    from pyspark.sql import functions as F
+
+    partition_columns = [name for name, _, _ in layout['partition_by']]
+    for name, source, part in layout['partition_by']:
+        df = df.withColumn(name, getattr(F, part)(F.col(source)))
+
+    if partition_columns:
+        df = df.repartition(*partition_columns)
+    elif layout['sort_by']:
+        df = df.repartitionByRange(*layout['sort_by'])
+    df = df.sortWithinPartitions(*(partition_columns + layout['sort_by']))
+
+    writer = (df.write.mode("overwrite")
+              .option("compression", layout['compression'])
+              .option("maxRecordsPerFile", layout['max_rows_per_file'])
+              .option("parquet.block.size", layout['row_group_bytes']))
+    for name in layout['plain']:
+        writer = writer.option(f"parquet.enable.dictionary#{name}", "false")
+    if partition_columns:
+        writer = writer.partitionBy(*partition_columns)
+    writer.parquet(path)
+
+# =====================================================
+# LAYOUT INSPECTION
+# =====================================================
+
+def layout_summary(path, columns=()):
+    """Files, row groups and per-row-group min/max of `columns` for a written table"""
+    import pyarrow.parquet as pq
+
+    summary = {'path': path, 'files': 0, 'row_groups': 0, 'rows': 0, 'bytes': 0, 'statistics': []}
+    for file_path in part_files(path):
+        metadata = pq.ParquetFile(file_path).metadata
+        summary['files'] += 1
+        summary['row_groups'] += metadata.num_row_groups
+        summary['rows'] += metadata.num_rows
+        summary['bytes'] += os.path.getsize(file_path)
+        names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+        for group in range(metadata.num_row_groups):
+            row_group = metadata.row_group(group)
+            entry = {'file': os.path.relpath(file_path, path), 'row_group': group, 'rows': row_group.num_rows}
+            for column in columns:
+                if column in names:
+                    statistics = row_group.column(names.index(column)).statistics
+                    if statistics is not None and statistics.has_min_max:
+                        entry[column] = (statistics.min, statistics.max)
+            summary['statistics'].append(entry)
+    return summary
@@ -0,0 +1,240 @@
+# =====================================================
+# EduFin Credit Solutions - Checkpointed Stage DAG
+# Runs pipeline stages in dependency order with resumable checkpoints
+# =====================================================
+
+# Stages declare the stages they read from. Stages whose inputs are ready run
+# concurrently on a small thread pool (on Spark, their jobs share the cluster
+# through the FAIR scheduler). Every table a stage produces is written to
+#     <checkpoint_dir>/<stage>-<key>/
+# where the key hashes the config (seed included), the generator source and
+# the keys of the upstream stages. A rerun with the same inputs loads the
+# checkpoint instead of recomputing it, so a failure in a late stage only
+# reruns that stage. A stage's output stays cached until every stage reading
+# it has finished, then it is released. A stage may also produce side outputs
+# (e.g. payments and its per-loan summary from one pass); they are cached,
+# checkpointed and read by name just like stage outputs.
+#
+#     dag = PipelineDAG(stages, generators, engine, checkpoint_dir="/tmp/edufin_checkpoints")
+#     outputs = dag.run()
+
+import hashlib
+import importlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+
+from pipeline_instrumentation import PipelineInstrumentation
+
+CHECKPOINT_MARKER = "_checkpoint.json"
+
+
+class Stage:
+    """One pipeline step: run(inputs, metrics) builds its table from the outputs of `depends_on`
+
+    Stages with table=False (validation, save) are run every time and never checkpointed.
+    With `side_outputs`, run returns (table, *side tables) in that order, and
+    later stages can depend on the side output names.
+    """
+
+    def __init__(self, name, run, depends_on=(), table=True, description=None, side_outputs=()):
+        self.name = name
+        self.run = run
+        self.depends_on = tuple(depends_on)
+        self.table = table
+        self.description = description or name
+        self.side_outputs = tuple(side_outputs)
+
+    @property
+    def outputs(self):
+        return (self.name,) + self.side_outputs
+
+
+def config_fingerprint(config):
+    """Every upper-case setting of a config (class defaults and overrides) as canonical JSON"""
+    settings = {name: getattr(config, name) for name in dir(config) if name.isupper()}
+    return json.dumps(settings, sort_keys=True, default=str)
+
+
+def source_fingerprint(module_names):
+    """Hash of the source files of the modules that generate the data"""
+    digest = hashlib.sha256()
+    for name in sorted(module_names):
+        with open(importlib.import_module(name).__file__, 'rb') as handle:
+            digest.update(handle.read())
+    return digest.hexdigest()
+
+# =====================================================
+# PIPELINE DAG
+# =====================================================
+
+class PipelineDAG:
+    """Dependency-ordered, checkpointed and partly concurrent execution of Stages"""
+
+    def __init__(self, stages, generators, engine=(), checkpoint_dir=None, fingerprint="", instrumentation=None,
+                 max_workers=2):
+        self.stages = {stage.name: stage for stage in stages}
+        # Output name -> the stage producing it
+        self.producers = {output: stage.name for stage in stages for output in stage.outputs}
+        self.generators = generators
+        self.engine = engine
+        self.checkpoint_dir = checkpoint_dir
+        self.instrumentation = instrumentation or PipelineInstrumentation()
+        self.max_workers = max_workers
+        self.order = self._topological_order()
+        self.keys = self._stage_keys(fingerprint)
+        self._print_lock = threading.Lock()
+
+    def _topological_order(self):
+        order, visiting, visited = [], set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline stages form a cycle through '{name}'")
+            if name not in self.stages:
+                raise ValueError(f"Unknown pipeline stage '{name}'")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(self.producers.get(dependency, dependency))
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+
+        for name in self.stages:
+            visit(name)
+        return order
+
+    def _stage_keys(self, fingerprint):
+        """Content hash per stage: fingerprint, stage name and the keys of everything upstream"""
+        keys = {}
+        for name in self.order:
+            digest = hashlib.sha256(fingerprint.encode('utf-8'))
+            digest.update(name.encode('utf-8'))
+            for dependency in self.stages[name].depends_on:
+                digest.update(keys[self.producers[dependency]].encode('utf-8'))
+            keys[name] = digest.hexdigest()
+        return keys
+
+    def checkpoint_path(self, name):
+        return os.path.join(self.checkpoint_dir, f"{name}-{self.keys[self.producers[name]][:16]}")
+
+    def _print(self, message):
+        with self._print_lock:
+            print(message)
+
+    # =====================================================
+    # RUNNING ONE STAGE
+    # =====================================================
+
+    def _load_checkpoint(self, name):
+        """Checkpoint markers of a stage's outputs, or None when it has to be computed"""
+        if self.checkpoint_dir is None or not self.stages[name].table:
+            return None
+        markers = {}
+        for output in self.stages[name].outputs:
+            marker = os.path.join(self.checkpoint_path(output), CHECKPOINT_MARKER)
+            if not os.path.exists(marker):
+                return None
+            with open(marker) as handle:
+                markers[output] = json.load(handle)
+        return markers
+
+    def _write_checkpoint(self, name, table_df, rows):
+        # The marker is written last: a checkpoint without one is incomplete and gets recomputed
+        stage = self.producers[name]
+        path = self.checkpoint_path(name)
+        table_df = self.generators.checkpoint_table(table_df, path)
+        with open(os.path.join(path, CHECKPOINT_MARKER), 'w') as handle:
+            json.dump({'stage': stage, 'output': name, 'key': self.keys[stage], 'rows': rows,
+                       'created_at': datetime.now().isoformat(timespec='seconds')}, handle, indent=2)
+        return table_df
+
+    def _execute(self, name, inputs, metrics):
+        """{output name: table} of a stage, plus {output name: rows} for table stages"""
+        stage = self.stages[name]
+        checkpoints = self._load_checkpoint(name)
+        if checkpoints is not None:
+            metrics.rows = checkpoints[name]['rows']
+            metrics.checkpoint = 'loaded'
+            return ({output: self.generators.cache_table(self.generators.load_table(*self.engine,
+                                                                                    self.checkpoint_path(output)))
+                     for output in stage.outputs}, {output: marker['rows'] for output, marker in checkpoints.items()})
+
+        output = stage.run(inputs, metrics)
+        if not stage.table:
+            return {name: output}, {}
+        outputs = dict(zip(stage.outputs, output if stage.side_outputs else (output,)))
+        rows = {}
+        for output_name, table_df in outputs.items():
+            table_df = self.generators.cache_table(table_df)
+            rows[output_name] = self.generators.count_rows(table_df)
+            if self.checkpoint_dir is not None:
+                table_df = self._write_checkpoint(output_name, table_df, rows[output_name])
+            outputs[output_name] = table_df
+        metrics.rows = rows[name]
+        if self.checkpoint_dir is not None:
+            metrics.checkpoint = 'written'
+        return outputs, rows
+
+    def _run_stage(self, name, inputs):
+        stage = self.stages[name]
+        self._print(f"{stage.description}...")
+        started = time.perf_counter()
+        with self.instrumentation.stage(name) as metrics:
+            outputs, rows = self._execute(name, inputs, metrics)
+        if stage.table:
+            source = "from checkpoint" if metrics.checkpoint == 'loaded' else f"in {time.perf_counter() - started:.1f}s"
+            self._print(f"   {name}: {metrics.rows:,} rows {source}")
+            for side_output in stage.side_outputs:
+                self._print(f"   {side_output}: {rows[side_output]:,} rows (side output of {name})")
+        return outputs
+
+    # =====================================================
+    # RUNNING THE WHOLE DAG
+    # =====================================================
+
+    def run(self, keep=()):
+        """Run every stage once its dependencies are done; returns {stage or side output name: output}
+
+        Table outputs are released once their last consumer is done, except
+        those in `keep`, which the caller goes on using after run() returns.
+        """
+
+        outputs = {}
+        consumers = {output: sum(output in stage.depends_on for stage in self.stages.values())
+                     for output in self.producers}
+        pending = list(self.order)
+        running = {}
+
+        # Profilers are process-global: overlapping stages would land in each other's profiles
+        workers = 1 if self.instrumentation.profiling else self.max_workers
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                for name in [name for name in pending if all(d in outputs for d in self.stages[name].depends_on)]:
+                    inputs = {dependency: outputs[dependency] for dependency in self.stages[name].depends_on}
+                    running[pool.submit(self._run_stage, name, inputs)] = name
+                    pending.remove(name)
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        outputs.update(future.result())
+                    except BaseException:
+                        # Let stages already running finish, start nothing new
+                        pending.clear()
+                        for other in running:
+                            other.cancel()
+                        raise
+                    # Release upstream caches once their last reader is done
+                    for dependency in self.stages[name].depends_on:
+                        consumers[dependency] -= 1
+                        if (consumers[dependency] == 0 and dependency not in keep
+                                and self.stages[self.producers[dependency]].table):
+                            self.generators.release_table(outputs[dependency])
+        return outputs
@@ -0,0 +1,284 @@
+# =====================================================
+# EduFin Credit Solutions - Pipeline Instrumentation
+# Per-stage wall/CPU time, memory, throughput and Spark job tracking
+# =====================================================
+
+# Usage:
+#     instrumentation = PipelineInstrumentation(spark, profiler="cprofile")
+#     with instrumentation.stage("customers") as stage:
+#         customers_df = ...
+#         stage.rows = customers_df.count()
+#     instrumentation.write_report("/tmp/edufin_report.json")
+#
+# Each stage records wall time, CPU time of the thread that ran it, the peak
+# RSS sampled while it ran, rows/sec, bytes written (record_output) and, on
+# Spark, the job and stage ids it triggered (via a per-stage job group). RSS is
+# process-wide: stages that overlapped (pipeline_dag runs independent stages on
+# threads) list each other in `concurrent_with`, and their peaks include each
+# other's memory. Profilers are process-global, so pipeline_dag runs stages one
+# at a time while profiling. Reports are JSON so releases can be diffed for
+# regressions.
+
+import cProfile
+import json
+import os
+import platform
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_bytes():
+    """Resident set size of this process right now"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        # No procfs (macOS, Windows): fall back to the process high-water mark
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes():
+    """Process high-water RSS (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def path_size_bytes(path, spark=None):
+    """Bytes under a file or directory, local or (with a session) any Hadoop filesystem"""
+    if spark is not None:
+        hadoop_path = spark._jvm.org.apache.hadoop.fs.Path(path)
+        fs = hadoop_path.getFileSystem(spark._jsc.hadoopConfiguration())
+        return fs.getContentSummary(hadoop_path).getLength() if fs.exists(hadoop_path) else 0
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+class _RssSampler:
+    """Background thread tracking the peak RSS between start() and stop()"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.peak = current_rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+        return self.peak
+
+
+class StageMetrics:
+    """Measurements of one pipeline stage; set `rows` and call record_output() inside the stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.rows = None
+        self.outputs = []
+        self.bytes_written = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rss_start_bytes = 0
+        self.rss_peak_bytes = 0
+        self.spark_job_ids = []
+        self.spark_stage_ids = []
+        self.profile_path = None
+        self.checkpoint = None  # 'loaded' or 'written' when run through pipeline_dag
+        self.concurrent_with = set()  # stages running at the same time (shared RSS)
+        self._spark = None
+
+    def record_output(self, path):
+        """Count the bytes written to `path` towards this stage"""
+        size = path_size_bytes(path, self._spark)
+        self.outputs.append({'path': path, 'bytes': size})
+        self.bytes_written += size
+
+    @property
+    def rows_per_second(self):
+        if not self.rows or not self.wall_seconds:
+            return None
+        return self.rows / self.wall_seconds
+
+    def to_dict(self):
+        return {
+            'stage': self.name,
+            'rows': self.rows,
+            'wall_seconds': round(self.wall_seconds, 4),
+            'cpu_seconds': round(self.cpu_seconds, 4),
+            'concurrent_with': sorted(self.concurrent_with),
+            'rows_per_second': None if self.rows_per_second is None else round(self.rows_per_second, 1),
+            'rss_start_mb': round(self.rss_start_bytes / 2 ** 20, 1),
+            'rss_peak_mb': round(self.rss_peak_bytes / 2 ** 20, 1),
+            'bytes_written': self.bytes_written,
+            'outputs': self.outputs,
+            'spark_job_ids': self.spark_job_ids,
+            'spark_stage_ids': self.spark_stage_ids,
+            'profile': self.profile_path,
+            'checkpoint': self.checkpoint
+        }
+
+# =====================================================
+# PROFILING HOOKS
+# =====================================================
+
+def _cprofile_hook(profile_dir):
+    @contextmanager
+    def hook(stage):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            stage.profile_path = os.path.join(profile_dir, f"{stage.name}.prof")
+            profiler.dump_stats(stage.profile_path)
+    return hook
+
+
+def _pyinstrument_hook(profile_dir):
+    from pyinstrument import Profiler
+
+    @contextmanager
+    def hook(stage):
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            os.makedirs(profile_dir, exist_ok=True)
+            stage.profile_path = os.path.join(profile_dir, f"{stage.name}.html")
+            with open(stage.profile_path, 'w') as handle:
+                handle.write(profiler.output_html())
+    return hook
+
+
+def _profile_hook(profiler, profile_dir):
+    """None, "cprofile", "pyinstrument" or a callable(stage) returning a context manager"""
+    if profiler is None or callable(profiler):
+        return profiler
+    if profiler == 'cprofile':
+        return _cprofile_hook(profile_dir)
+    if profiler == 'pyinstrument':
+        return _pyinstrument_hook(profile_dir)
+    raise ValueError(f"Unknown profiler '{profiler}', expected 'cprofile', 'pyinstrument' or a callable")
+
+# =====================================================
+# PIPELINE INSTRUMENTATION
+# =====================================================
+
+class PipelineInstrumentation:
+    """Collects StageMetrics for every stage of a generation run"""
+
+    def __init__(self, spark=None, profiler=None, profile_dir="/tmp/edufin_profiles", run_info=None):
+        self.spark = spark
+        self.stages = []
+        self.run_info = dict(run_info or {})
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self._profile_hook = _profile_hook(profiler, profile_dir)
+        self._run_start = time.perf_counter()
+        self._active = {}
+        self._active_lock = threading.Lock()
+
+    @property
+    def profiling(self):
+        """Profilers hook the whole process, so profiled stages must not overlap"""
+        return self._profile_hook is not None
+
+    @contextmanager
+    def stage(self, name):
+        metrics = StageMetrics(name)
+        metrics._spark = self.spark
+        sampler = _RssSampler()
+
+        if self.spark is not None:
+            # Every Spark job triggered inside the stage lands in its own job group
+            group = f"edufin-{name}-{len(self.stages)}"
+            self.spark.sparkContext.setJobGroup(group, f"EduFin stage: {name}")
+
+        with self._active_lock:
+            for other in self._active.values():
+                other.concurrent_with.add(name)
+                metrics.concurrent_with.add(other.name)
+            self._active[id(metrics)] = metrics
+
+        metrics.rss_start_bytes = current_rss_bytes()
+        sampler.start()
+        # Per-thread CPU: stages running concurrently are not charged for each other
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            if self._profile_hook is None:
+                yield metrics
+            else:
+                with self._profile_hook(metrics):
+                    yield metrics
+        finally:
+            metrics.wall_seconds = time.perf_counter() - wall_start
+            metrics.cpu_seconds = time.thread_time() - cpu_start
+            metrics.rss_peak_bytes = sampler.stop()
+            with self._active_lock:
+                del self._active[id(metrics)]
+            if self.spark is not None:
+                self._collect_spark_ids(metrics, group)
+            self.stages.append(metrics)
+
+    def _collect_spark_ids(self, metrics, group):
+        tracker = self.spark.sparkContext.statusTracker()
+        metrics.spark_job_ids = sorted(tracker.getJobIdsForGroup(group))
+        for job_id in metrics.spark_job_ids:
+            job = tracker.getJobInfo(job_id)
+            if job is not None:
+                metrics.spark_stage_ids.extend(job.stageIds)
+        metrics.spark_stage_ids = sorted(set(metrics.spark_stage_ids))
+        self.spark.sparkContext.setLocalProperty("spark.jobGroup.id", None)
+
+    def report(self):
+        """The whole run as a JSON-serializable dictionary"""
+        return {
+            'started_at': self.started_at,
+            'total_wall_seconds': round(time.perf_counter() - self._run_start, 4),
+            'process_peak_rss_mb': round(peak_rss_bytes() / 2 ** 20, 1),
+            'rss_scope': 'process',  # stage peaks of concurrent stages include each other's memory
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'run': self.run_info,
+            'stages': [metrics.to_dict() for metrics in self.stages]
+        }
+
+    def write_report(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as handle:
+            json.dump(self.report(), handle, indent=2)
+        return path
+
+    def print_summary(self):
+        print("\nStage timings:")
+        for metrics in self.stages:
+            rate = f"{metrics.rows_per_second:,.0f} rows/s" if metrics.rows_per_second else ""
+            shared = "*" if metrics.concurrent_with else " "
+            print(f"   {metrics.name:<14} {metrics.wall_seconds:8.2f}s wall {metrics.cpu_seconds:8.2f}s cpu "
+                  f"{metrics.rss_peak_bytes / 2 ** 20:8.0f} MB peak{shared} {rate}")
+        if any(metrics.concurrent_with for metrics in self.stages):
+            print("   * ran alongside other stages: peak RSS is process-wide and includes their memory")
@@ -0,0 +1,230 @@
+# =====================================================
+# EduFin Credit Solutions - Referential Integrity Checker
+# Streams child tables against compact bitmaps of the parent keys
+# =====================================================
+
+# Parent tables (institutions, customers, loans) are read once, key column
+# only, into KeyBitmaps: one bit per id between the smallest and largest key,
+# so 150k loan ids take ~19 KB. Child tables are then streamed batch by batch
+# (loans, payments, defaults; loans is checked and indexed in the same pass)
+# and every foreign key is tested with two array lookups per batch, with no
+# join and no shuffle. Works on
+#   Parquet output       <root>/<table dir>/**/part-*.parquet (generate_edufin_dataset, sharded_generation)
+#   CSV exports          <root>/<table>/part-*.csv[.gz]       (ssms_export)
+#   sample CSVs          <root>/sample_<table>.csv            (data/)
+#
+#     python referential_integrity.py data
+#     python referential_integrity.py /tmp/edufin_data --samples 20
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from data_quality_validation import FOREIGN_KEYS, PRIMARY_KEYS, VALIDATED_TABLES
+from parquet_layout import part_files
+from table_schemas import TABLE_DIRECTORIES
+
+PARENT_TABLES = sorted({parent for _, _, parent, _ in FOREIGN_KEYS})
+
+
+class KeyBitmap:
+    """Set of integer keys stored as one bit per id in [low, high]"""
+
+    def __init__(self):
+        self.low = None
+        self.bits = np.zeros(0, dtype=np.uint8)
+        self.count = 0
+        self.duplicates = 0
+
+    @classmethod
+    def from_keys(cls, keys):
+        bitmap = cls()
+        bitmap.add(keys)
+        return bitmap
+
+    @property
+    def high(self):
+        return self.low + self.bits.size * 8 - 1
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def _cover(self, low, high):
+        """Grow the bitmap to span [low, high], doubling upwards as keys usually arrive ascending"""
+        if self.low is None:
+            self.low = low
+            self.bits = np.zeros((high - low) // 8 + 1, dtype=np.uint8)
+            return
+        if low >= self.low and high <= self.high:
+            return
+        new_low = self.low - 8 * -(-(self.low - low) // 8) if low < self.low else self.low
+        new_high = max(high, self.high + self.bits.size * 8) if high > self.high else self.high
+        bits = np.zeros((new_high - new_low) // 8 + 1, dtype=np.uint8)
+        shift = (self.low - new_low) // 8
+        bits[shift:shift + self.bits.size] = self.bits
+        self.low, self.bits = new_low, bits
+
+    def _test(self, offsets):
+        return ((self.bits[offsets >> 3] >> (offsets & 7).astype(np.uint8)) & 1).astype(bool)
+
+    def add(self, keys):
+        """Insert keys, counting any already present (or repeated) as duplicates"""
+        keys = np.asarray(keys, dtype=np.int64)
+        if len(keys) == 0:
+            return
+        self._cover(int(keys.min()), int(keys.max()))
+        offsets, repeats = np.unique(keys - self.low, return_counts=True)
+        present = self._test(offsets)
+        self.duplicates += int((repeats - 1).sum() + present.sum())
+        new = offsets[~present]
+        # Several new keys can share a byte, so the OR has to be unbuffered
+        np.bitwise_or.at(self.bits, new >> 3, np.left_shift(1, new & 7).astype(np.uint8))
+        self.count += len(new)
+
+    def contains(self, keys):
+        """Boolean membership mask for an integer key array"""
+        keys = np.asarray(keys, dtype=np.int64)
+        found = np.zeros(len(keys), dtype=bool)
+        if self.low is None:
+            return found
+        in_range = (keys >= self.low) & (keys <= self.high)
+        found[in_range] = self._test(keys[in_range] - self.low)
+        return found
+
+# =====================================================
+# STREAMING TABLE SOURCES
+# =====================================================
+
+def table_files(root, table):
+    """Data files of a table under any of the supported layouts, in part order"""
+    for directory in [os.path.join(root, TABLE_DIRECTORIES[table]), os.path.join(root, table)]:
+        if os.path.isdir(directory):
+            files = part_files(directory, ('.parquet', '.csv', '.csv.gz'))
+            if files:
+                return files
+    sample = os.path.join(root, f"sample_{table}.csv")
+    return [sample] if os.path.exists(sample) else []
+
+
+def key_batches(files, columns, batch_rows=500000):
+    """Stream only `columns` of a table as {column: float64 array} batches (NaN marks NULL)"""
+    for path in files:
+        if path.endswith('.parquet'):
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+                yield {column: batch.column(column).to_numpy(zero_copy_only=False).astype(np.float64)
+                       for column in columns}
+        else:
+            for chunk in pd.read_csv(path, usecols=columns, chunksize=batch_rows):
+                yield {column: pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=np.float64)
+                       for column in columns}
+
+# =====================================================
+# INTEGRITY CHECK
+# =====================================================
+
+def check_integrity(root, batch_rows=500000, sample_size=10):
+    """Orphan counts and sample orphan ids for every foreign key, one pass per table"""
+
+    indexes = {}
+    report = {'source': root, 'passed': True, 'tables': {}, 'foreign_keys': []}
+
+    for table in VALIDATED_TABLES:
+        files = table_files(root, table)
+        foreign_keys = [fk for fk in FOREIGN_KEYS if fk[0] == table]
+        if not files:
+            report['tables'][table] = {'files': 0}
+            for _, column, parent, parent_key in foreign_keys:
+                report['foreign_keys'].append({'child': table, 'column': column, 'parent': parent, 'checked': False})
+            continue
+
+        key = PRIMARY_KEYS[table]
+        index = KeyBitmap() if table in PARENT_TABLES else None
+        checks = [{'child': table, 'column': column, 'parent': parent, 'parent_key': parent_key,
+                   'checked': parent in indexes, 'rows': 0, 'nulls': 0, 'orphans': 0, 'sample_orphans': []}
+                  for _, column, parent, parent_key in foreign_keys]
+        columns = list(dict.fromkeys(([key] if index is not None else []) + [check['column'] for check in checks]))
+
+        rows = 0
+        for batch in key_batches(files, columns, batch_rows):
+            rows += len(batch[columns[0]])
+            if index is not None:
+                keys = batch[key]
+                index.add(keys[~np.isnan(keys)])
+            for check in checks:
+                if not check['checked']:
+                    continue
+                values = batch[check['column']]
+                nulls = np.isnan(values)
+                keys = values[~nulls].astype(np.int64)
+                orphans = keys[~indexes[check['parent']].contains(keys)]
+                check['rows'] += len(values)
+                check['nulls'] += int(nulls.sum())
+                check['orphans'] += len(orphans)
+                room = sample_size - len(check['sample_orphans'])
+                if room > 0:
+                    check['sample_orphans'] += [int(value) for value in orphans[:room]]
+
+        summary = {'files': len(files), 'rows': rows}
+        if index is not None:
+            indexes[table] = index
+            summary.update({'distinct_keys': index.count, 'duplicate_keys': index.duplicates,
+                            'bitmap_bytes': index.nbytes})
+            if index.duplicates:
+                report['passed'] = False
+        report['tables'][table] = summary
+
+        for check in checks:
+            if check['checked'] and check['orphans']:
+                report['passed'] = False
+            report['foreign_keys'].append(check)
+    return report
+
+
+def print_report(report):
+    print(f"Referential integrity of {report['source']}:")
+    for table, summary in report['tables'].items():
+        if not summary['files']:
+            print(f"   {table:<13} not found")
+            continue
+        line = f"   {table:<13} {summary['rows']:>12,} rows"
+        if 'distinct_keys' in summary:
+            line += f"  {summary['distinct_keys']:,} keys in a {summary['bitmap_bytes']:,} byte bitmap"
+            if summary['duplicate_keys']:
+                line += f"  DUPLICATE KEYS: {summary['duplicate_keys']:,}"
+        print(line)
+    for check in report['foreign_keys']:
+        name = f"{check['child']}.{check['column']} -> {check['parent']}"
+        if not check['checked']:
+            print(f"   {name:<36} not checked (table missing)")
+        elif check['orphans']:
+            print(f"   {name:<36} {check['orphans']:,} orphans, e.g. {check['sample_orphans']}")
+        else:
+            print(f"   {name:<36} ok")
+    print(f"   {'PASSED' if report['passed'] else 'FAILED'}")
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check foreign keys of generated EduFin tables")
+    parser.add_argument("root", nargs="?", default="/tmp/edufin_data",
+                        help="Parquet output, CSV export or data/ sample directory")
+    parser.add_argument("--samples", type=int, default=10, help="orphan ids to report per foreign key")
+    parser.add_argument("--batch-rows", type=int, default=500000)
+    parser.add_argument("--json", default=None, help="also write the report to this JSON file")
+    args = parser.parse_args()
+
+    result = check_integrity(args.root, args.batch_rows, args.samples)
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(result, handle, indent=2)
+    sys.exit(0 if result['passed'] else 1)
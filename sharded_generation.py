@@ -0,0 +1,126 @@
+# =====================================================
+# EduFin Credit Solutions - Sharded Local Generation
+# Multi-core generation with a process pool, one part file per shard
+# =====================================================
+
+# The id space of customers and loans is split into contiguous shards. Every
+# value is keyed by entity id (deterministic_rng), and a loan's payments and
+# default record depend only on that loan, so each worker generates
+#     customers[lo:hi]          -> customers/part-NNNNN.parquet
+#     loans[lo:hi] + payments + defaults for those loans
+#                               -> loans/, payments/, defaults_collections/part-NNNNN.parquet
+# without seeing any other shard. Reading the parts back in shard order gives
+# exactly the single-process local_backend output for the same seed - no
+# global shuffle or merge step is needed.
+
+import argparse
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import local_backend
+from edufin_config import EduFinDataConfig
+from parquet_layout import part_files
+from table_schemas import (INCREMENTS_DIRECTORY, OUTPUT_DIRECTORIES, TABLE_DIRECTORIES, read_parquet_frame,
+                           write_parquet_frame)
+
+
+def shard_ranges(total, shards):
+    """Split ids 1..total into `shards` contiguous (start, stop) ranges"""
+    bounds = np.linspace(1, total + 1, min(shards, total) + 1).astype(np.int64)
+    return [(int(start), int(stop)) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _clear_tables(output_path):
+    """Remove the tables and increments of an earlier run, which may hold more part files than this one"""
+    for table_dir in list(TABLE_DIRECTORIES.values()) + [INCREMENTS_DIRECTORY]:
+        shutil.rmtree(os.path.join(output_path, table_dir), ignore_errors=True)
+
+
+def _part_path(output_path, table, shard):
+    directory = os.path.join(output_path, TABLE_DIRECTORIES[table])
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f"part-{shard:05d}.parquet")
+
+# =====================================================
+# WORKER TASKS (module level so they can be pickled)
+# =====================================================
+
+def _institutions_shard(config, output_path):
+    """Institutions are small and Faker-bound, so they run as a single task"""
+    institutions_df = local_backend.generate_institutions(config)
+    write_parquet_frame(institutions_df, _part_path(output_path, 'institutions', 0))
+    return {'institutions': len(institutions_df)}
+
+
+def _customer_shard(config, output_path, shard, start, stop):
+    customers_df = local_backend.generate_customers(config, np.arange(start, stop))
+    write_parquet_frame(customers_df, _part_path(output_path, 'customers', shard))
+    return {'customers': len(customers_df)}
+
+
+def _loan_shard(config, output_path, shard, start, stop):
+    """Loans of one id range plus the payments and defaults that hang off them"""
+    loans_df = local_backend.generate_loans(config, loan_ids=np.arange(start, stop))
+    payments_df, loan_summary = local_backend.generate_payments(config, loans_df, summary=True)
+    defaults_df = local_backend.generate_defaults(config, loans_df, None, last_payments=loan_summary)
+
+    write_parquet_frame(loans_df, _part_path(output_path, 'loans', shard))
+    write_parquet_frame(payments_df, _part_path(output_path, 'payments', shard))
+    write_parquet_frame(defaults_df, _part_path(output_path, 'defaults', shard))
+    return {'loans': len(loans_df), 'payments': len(payments_df), 'defaults': len(defaults_df)}
+
+# =====================================================
+# SHARDED DATASET GENERATION
+# =====================================================
+
+def generate_sharded_dataset(config=None, output_path="/tmp/edufin_data", workers=None, shards=None):
+    """Generate the full dataset across a process pool, one part file per shard per table"""
+
+    config = config or EduFinDataConfig()
+    workers = workers or os.cpu_count()
+    # A few shards per worker keeps cores busy when shard costs differ
+    shards = shards or workers * 4
+
+    print(f"Generating EduFin dataset with {workers} worker processes, {shards} shards per table...")
+    started = time.perf_counter()
+    row_counts = dict.fromkeys(TABLE_DIRECTORIES, 0)
+    # Overwrite semantics, like the Spark backend: stale parts would duplicate ids
+    _clear_tables(output_path)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_institutions_shard, config, output_path)]
+        futures += [pool.submit(_customer_shard, config, output_path, shard, start, stop)
+                    for shard, (start, stop) in enumerate(shard_ranges(config.TOTAL_CUSTOMERS, shards))]
+        futures += [pool.submit(_loan_shard, config, output_path, shard, start, stop)
+                    for shard, (start, stop) in enumerate(shard_ranges(config.TOTAL_LOANS, shards))]
+
+        for future in futures:
+            for table, rows in future.result().items():
+                row_counts[table] += rows
+
+    for table, rows in row_counts.items():
+        print(f"   Generated {rows:,} {table}")
+    print(f"   Data saved to {output_path} in {time.perf_counter() - started:.1f}s")
+    return row_counts
+
+
+def read_sharded_table(output_path, table):
+    """Concatenate a table's part files in shard order"""
+    return read_parquet_frame(part_files(os.path.join(output_path, OUTPUT_DIRECTORIES[table])))
+
+# =====================================================
+# USAGE EXAMPLE
+# =====================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate the EduFin dataset on all local cores")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--shards", type=int, default=None, help="shards per table (default: 4 per worker)")
+    parser.add_argument("--output-path", default="/tmp/edufin_data")
+    args = parser.parse_args()
+
+    generate_sharded_dataset(output_path=args.output_path, workers=args.workers, shards=args.shards)
@@ -0,0 +1,678 @@
+# =====================================================
+# EduFin Credit Solutions - Spark Data Generation Backend
+# Tools: Databricks + dbldatagen + faker
+# =====================================================
+
+import dbldatagen as dg
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.functions import (broadcast, coalesce, col, concat, concat_ws, count, date_add, datediff, expr,
+                                   least, lit, month, months_between, shiftleft, when, year)
+from pyspark.sql.types import (DoubleType, IntegerType, LongType, StringType, StructField, StructType,
+                               TimestampType)
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+import amortization_engine
+import deterministic_rng
+import dimension_lookups
+import local_backend
+from amortization_engine import build_payment_schedules
+from arrow_handoff import ARROW_CONF, to_spark
+from deterministic_rng import (sql_date_between, sql_digits, sql_letters, sql_normal, sql_randint,
+                               sql_uniform, sql_weighted_choice, weighted_sampler)
+from dimension_lookups import city_dimension, profile_dimension
+from faker_value_pool import value_pool
+from parquet_layout import write_spark_table
+from table_schemas import column_types
+
+
+def get_spark_session():
+    """Spark session used when generate_edufin_dataset is not given one"""
+    builder = (SparkSession.builder
+               .appName("EduFin_Industrial_DataGen")
+               .config("spark.sql.adaptive.enabled", "true")
+               .config("spark.sql.adaptive.coalescePartitions.enabled", "true")
+               # Independent pipeline stages submit jobs concurrently (see pipeline_dag)
+               .config("spark.scheduler.mode", "FAIR"))
+    # pandas <-> Spark hand-offs go through Arrow record batches (see arrow_handoff)
+    for key, value in ARROW_CONF.items():
+        builder = builder.config(key, value)
+    return builder.getOrCreate()
+
+# =====================================================
+# SPARK EXPRESSION HELPERS
+# =====================================================
+
+def _weighted(config_weights, u_expr):
+    """Weighted choice over a {value: weight} config dictionary"""
+    return sql_weighted_choice(list(config_weights.keys()), list(config_weights.values()), u_expr)
+
+
+def _exact(config_weights, seed, stream, population):
+    """Weighted choice of dbldatagen ids 1..population in exact proportions (see AliasSampler.sql_exact)"""
+    return weighted_sampler(list(config_weights.keys()), list(config_weights.values())).sql_exact(
+        seed, stream, 'id', population)
+
+
+def broadcast_dimension(spark, dimension, prefix):
+    """A dimension_lookups table as a broadcast DataFrame, columns prefixed to avoid clashes"""
+    return broadcast(to_spark(spark, dimension.add_prefix(prefix), prefix.rstrip('_')))
+
+
+def compact_columns(df):
+    """Cast the known columns of a table to their table_schemas storage types
+    
+    Spark writes DECIMAL(15,2) money as 64-bit integers, and strings are
+    dictionary-encoded by the Parquet writer, so categorical columns stay strings.
+    """
+    types = column_types()
+    spark_types = {'TINYINT': 'tinyint', 'SMALLINT': 'smallint', 'INT': 'int', 'BIGINT': 'bigint', 'DATE': 'date'}
+    columns = []
+    for name in df.columns:
+        sql_type = types.get(name, '')
+        spark_type = spark_types.get(sql_type, sql_type.lower() if sql_type.startswith('DECIMAL') else None)
+        columns.append(col(name).cast(spark_type).alias(name) if spark_type else col(name))
+    return df.select(*columns)
+
+
+def broadcast_pool(spark, pool, field, prefix):
+    """A Faker value pool as a broadcast (position, value) DataFrame"""
+    values = pool.values(field)
+    frame = pd.DataFrame({f"{prefix}position": np.arange(len(values)), f"{prefix}value": values.astype(str)})
+    return broadcast(to_spark(spark, frame, prefix.rstrip('_')))
+
+# =====================================================
+# INSTITUTIONS TABLE GENERATION
+# =====================================================
+
+def generate_institutions(spark, config):
+    """Generate realistic educational institutions data"""
+    
+    # Institutions are a small driver-side dimension, shared with the local backend
+    institutions_df = to_spark(spark, local_backend.generate_institutions(config), "institutions")
+    return compact_columns(institutions_df)
+
+# =====================================================
+# CUSTOMERS TABLE GENERATION
+# =====================================================
+
+def generate_customers(spark, config):
+    """Generate realistic customer data with proper distributions"""
+    
+    # Use dbldatagen for efficient large-scale generation. Every column is an
+    # expression keyed by the customer id, so values do not depend on partitioning
+    seed = config.SEED
+    cities = list(config.CITY_DISTRIBUTION.keys())
+    profiles = list(config.CUSTOMER_PROFILES.keys())
+    email_user = f"concat('user', {sql_digits(seed, 'customer_email', 'id', 8)})"
+    email_domain = sql_weighted_choice(config.EMAIL_DOMAINS, [1] * len(config.EMAIL_DOMAINS),
+                                       sql_uniform(seed, 'customer_email', 'id', draw=1))
+    customer_spec = (
+        dg.DataGenerator(spark, name="customers", rows=config.TOTAL_CUSTOMERS, startingId=1)
+        .withIdOutput()
+        .withColumn("application_number", "string",
+                   expr=f"concat('APPL', {sql_digits(seed, 'customer_application', 'id', 8)})")
+        
+        # Personal Information - filled from the Faker value pools below
+        .withColumn("full_name", "string", expr="''")
+        .withColumn("date_of_birth", "date",
+                   expr=sql_date_between(seed, 'customer_dob', 'id', datetime(1988, 1, 1), datetime(2006, 12, 31)))
+        .withColumn("gender", "string",
+                   expr=_exact(config.GENDER_DISTRIBUTION, seed, 'customer_gender', config.TOTAL_CUSTOMERS))
+        .withColumn("mobile_number", "string",
+                   expr=f"concat(cast({sql_randint(seed, 'customer_mobile', 'id', 6, 9)} as string), "
+                        f"{sql_digits(seed, 'customer_mobile', 'id', 9, draw=1)})")
+        .withColumn("email", "string", expr=f"concat({email_user}, '@', {email_domain}, '.com')")
+        .withColumn("pan_number", "string",
+                   expr=f"concat({sql_letters(seed, 'customer_pan', 'id', 5)}, "
+                        f"{sql_digits(seed, 'customer_pan', 'id', 4, draw=1)}, "
+                        f"{sql_letters(seed, 'customer_pan', 'id', 1, draw=2)})")
+        .withColumn("aadhar_number", "string", expr=sql_digits(seed, 'customer_aadhar', 'id', 12))
+        
+        # Geographic Information - using weighted distribution
+        .withColumn("current_city", "string",
+                   expr=_exact({city: config.CITY_DISTRIBUTION[city]['weight'] for city in cities},
+                               seed, 'customer_city', config.TOTAL_CUSTOMERS))
+        
+        # Financial Information - will be calculated based on city
+        .withColumn("employment_type", "string",
+                   expr=_exact(config.EMPLOYMENT_TYPES, seed, 'customer_employment', config.TOTAL_CUSTOMERS))
+        
+        # Customer Profile - determines credit behavior
+        .withColumn("customer_profile", "string",
+                   expr=_exact({profile: config.CUSTOMER_PROFILES[profile]['probability'] for profile in profiles},
+                               seed, 'customer_profile', config.TOTAL_CUSTOMERS))
+        
+        .withColumn("registration_date", "date",
+                   expr=sql_date_between(seed, 'customer_registration', 'id',
+                                         config.BUSINESS_START_DATE, config.CURRENT_DATE))
+        .withColumn("kyc_status", "string",
+                   expr=_exact(config.KYC_STATUSES, seed, 'customer_kyc', config.TOTAL_CUSTOMERS))
+    )
+    
+    customers_df = customer_spec.build().withColumnRenamed("id", "customer_id")
+    
+    # Add calculated fields based on city and profile (broadcast joins against
+    # the config-built dimensions; the join condition keeps the column order)
+    city_dim = broadcast_dimension(spark, city_dimension(config), "city_dim_")
+    profile_dim = broadcast_dimension(spark, profile_dimension(config), "profile_dim_")
+    customers_df = (customers_df
+                    .join(city_dim, col("current_city") == col("city_dim_city"), "left")
+                    .join(profile_dim, col("customer_profile") == col("profile_dim_profile"), "left"))
+    
+    customers_df = customers_df.withColumn("current_state", col("city_dim_state"))
+    
+    # Names are picked from the pre-sampled Faker pools by keyed pool position
+    pool = value_pool(config)
+    first_names = broadcast_pool(spark, pool, 'first_name', "first_name_dim_")
+    last_names = broadcast_pool(spark, pool, 'last_name', "last_name_dim_")
+    last_position = pool.size - 1
+    customers_df = (customers_df
+                    .join(first_names, expr(sql_randint(seed, 'customer_first_name', 'customer_id', 0, last_position))
+                          == col("first_name_dim_position"), "left")
+                    .join(last_names, expr(sql_randint(seed, 'customer_last_name', 'customer_id', 0, last_position))
+                          == col("last_name_dim_position"), "left"))
+    customers_df = customers_df.withColumn(
+        "full_name", concat_ws(" ", col("first_name_dim_value"), col("last_name_dim_value"))
+    )
+    
+    # Calculate income based on city distribution
+    income_z = expr(sql_normal(seed, 'customer_income', 'customer_id'))
+    customers_df = customers_df.withColumn(
+        "annual_income", F.abs(income_z * col("city_dim_income_std") + col("city_dim_avg_income"))
+    )
+    
+    # Calculate CIBIL score based on customer profile
+    cibil_u = expr(sql_uniform(seed, 'customer_cibil', 'customer_id'))
+    customers_df = customers_df.withColumn(
+        "cibil_score",
+        (cibil_u * (col("profile_dim_cibil_high") - col("profile_dim_cibil_low"))
+         + col("profile_dim_cibil_low")).cast("int")
+    )
+    customers_df = customers_df.drop(*[c for c in customers_df.columns if c.startswith(("city_dim_", "profile_dim_", "first_name_dim_", "last_name_dim_"))])
+    
+    # Add data quality issues
+    customers_df = customers_df.withColumn(
+        "mobile_number",
+        when(expr(sql_uniform(seed, 'customer_mobile_missing', 'customer_id')) <
+             config.DATA_QUALITY_ISSUES['missing_mobile_rate'], None)  # 5% missing mobile numbers
+        .otherwise(col("mobile_number"))
+    )
+    
+    customers_df = customers_df.withColumn(
+        "email",
+        when(expr(sql_uniform(seed, 'customer_email_invalid', 'customer_id')) <
+             config.DATA_QUALITY_ISSUES['invalid_email_rate'],
+             concat(col("email"), lit("invalid")))  # 3% invalid emails
+        .otherwise(col("email"))
+    )
+    
+    return compact_columns(customers_df)
+
+# =====================================================
+# LOANS TABLE GENERATION
+# =====================================================
+
+def generate_loans(spark, config, customers_df, institutions_df):
+    """Generate realistic loan data with complex business logic"""
+    
+    # Create loan applications - some customers have multiple loans.
+    # Every column is an expression keyed by the loan id (see deterministic_rng)
+    seed = config.SEED
+    requested_z = sql_normal(seed, 'loan_requested_amount', 'id')
+    rate_z = sql_normal(seed, 'loan_interest_rate', 'id')
+    loan_spec = (
+        dg.DataGenerator(spark, name="loans", rows=config.TOTAL_LOANS, startingId=1)
+        .withIdOutput()
+        .withColumn("loan_application_number", "string",
+                   expr=f"concat('LOAN', {sql_digits(seed, 'loan_application', 'id', 10)})")
+        
+        # Link to customers (some customers have multiple loans)
+        .withColumn("customer_id", "int",
+                   expr=sql_randint(seed, 'loan_customer', 'id', 1, config.TOTAL_CUSTOMERS))
+        
+        # Loan amounts - realistic distribution (normal, clipped to the product limits)
+        .withColumn("requested_amount", "decimal(15,2)",
+                   expr=f"cast(least(greatest({requested_z} * 300000 + 400000, 50000), 2500000) as decimal(15,2))")
+        
+        # Interest rates based on risk
+        .withColumn("base_interest_rate", "decimal(6,3)",
+                   expr=f"cast(least(greatest({rate_z} * 2.5 + 12.0, 7.5), 18.0) as decimal(6,3))")
+        
+        # Application dates - realistic seasonal patterns
+        .withColumn("application_date", "date",
+                   expr=sql_date_between(seed, 'loan_application_date', 'id',
+                                         config.BUSINESS_START_DATE, config.CURRENT_DATE))
+        
+        # Institution selection
+        .withColumn("institution_id", "int",
+                   expr=sql_randint(seed, 'loan_institution', 'id', 1,
+                                    sum(type_config['count'] for type_config in config.INSTITUTION_TYPES.values())))
+        
+        # Loan purposes
+        .withColumn("loan_purpose", "string",
+                   expr=_exact(config.LOAN_PURPOSES, seed, 'loan_purpose', config.TOTAL_LOANS))
+        
+        # Course duration
+        .withColumn("course_duration_months", "int",
+                   expr=_exact(config.COURSE_DURATIONS, seed, 'loan_course_duration', config.TOTAL_LOANS))
+    )
+    
+    loans_df = loan_spec.build().withColumnRenamed("id", "loan_id")
+    
+    # Join with customer data for risk assessment
+    customer_risk = customers_df.select(col("customer_id").alias("id"), "customer_profile", "cibil_score",
+                                        "annual_income", "current_city")
+    loans_df = loans_df.join(
+        customer_risk,
+        loans_df.customer_id == customer_risk.id,
+        "left"
+    ).drop("id")
+    
+    # Calculate loan approval logic
+    loans_df = loans_df.withColumn(
+        "approval_probability",
+        when(col("cibil_score") >= 750, 0.95)
+        .when(col("cibil_score") >= 650, 0.80)
+        .when(col("cibil_score") >= 550, 0.60)
+        .otherwise(0.30)
+    )
+    
+    loans_df = loans_df.withColumn(
+        "loan_status",
+        when(expr(sql_uniform(seed, 'loan_approval', 'loan_id')) < col("approval_probability"), "Approved")
+        .otherwise("Rejected")
+    )
+    
+    # Only process approved loans further
+    approved_loans = loans_df.filter(col("loan_status") == "Approved")
+    
+    # Calculate sanctioned amount (usually less than requested)
+    approved_loans = approved_loans.withColumn(
+        "sanctioned_amount",
+        least(col("requested_amount"), col("annual_income") * 2.5)
+    )
+    
+    approved_loans = approved_loans.withColumn(
+        "loan_amount", col("sanctioned_amount")
+    )
+    
+    # Risk categorization (broadcast join against the profile dimension)
+    profile_dim = broadcast_dimension(spark, profile_dimension(config), "profile_dim_")
+    approved_loans = approved_loans.join(profile_dim, col("customer_profile") == col("profile_dim_profile"), "left")
+    approved_loans = approved_loans.withColumn("risk_category", col("profile_dim_risk_category"))
+    
+    # Calculate EMI
+    approved_loans = approved_loans.withColumn(
+        "loan_term_months",
+        when(col("course_duration_months") <= 24, col("course_duration_months") + 24)
+        .otherwise(col("course_duration_months") + 36)
+    )
+    
+    # EMI calculation using standard formula
+    approved_loans = approved_loans.withColumn(
+        "monthly_interest_rate", col("base_interest_rate") / 100 / 12
+    )
+    
+    approved_loans = approved_loans.withColumn(
+        "emi_amount",
+        (col("loan_amount") * col("monthly_interest_rate") * 
+         F.pow(1 + col("monthly_interest_rate"), col("loan_term_months"))) /
+        (F.pow(1 + col("monthly_interest_rate"), col("loan_term_months")) - 1)
+    )
+    
+    # Disbursement dates (after approval)
+    approved_loans = approved_loans.withColumn(
+        "disbursement_date",
+        expr(f"date_add(application_date, {sql_randint(seed, 'loan_disbursement', 'loan_id', 15, 59)})")
+    )
+    
+    # Current loan status based on time and customer behavior
+    approved_loans = approved_loans.withColumn(
+        "months_since_disbursement",
+        months_between(lit(config.AS_OF_DATE), col("disbursement_date"))
+    )
+    
+    # Determine current loan status
+    approved_loans = approved_loans.withColumn("default_probability", col("profile_dim_default_probability"))
+    
+    approved_loans = approved_loans.withColumn(
+        "current_loan_status",
+        when(col("months_since_disbursement") < 0, "Sanctioned")
+        .when(expr(sql_uniform(seed, 'loan_default', 'loan_id')) < col("default_probability"), "Defaulted")
+        .when(col("months_since_disbursement") >= col("loan_term_months"), "Closed")
+        .otherwise("Active")
+    )
+    
+    approved_loans = approved_loans.drop(*[c for c in approved_loans.columns if c.startswith("profile_dim_")])
+    return compact_columns(approved_loans)
+
+# =====================================================
+# PAYMENTS TABLE GENERATION
+# =====================================================
+
+PAYMENTS_SCHEMA = StructType([
+    StructField("payment_id", LongType()),
+    StructField("loan_id", LongType()),
+    StructField("payment_date", TimestampType()),
+    StructField("due_date", TimestampType()),
+    StructField("payment_amount", DoubleType()),
+    StructField("principal_amount", DoubleType()),
+    StructField("interest_amount", DoubleType()),
+    StructField("penalty_amount", LongType()),
+    StructField("days_early_late", IntegerType()),
+    StructField("payment_sequence_number", IntegerType()),
+    StructField("total_outstanding_principal", DoubleType()),
+    StructField("payment_method", StringType()),
+    StructField("payment_status", StringType()),
+    StructField("transaction_reference", StringType())
+])
+
+# Per-loan side output of the schedule pass (amortization_engine.SUMMARY_COLUMNS);
+# summary rows share the output with payment rows and are the ones without a payment_id
+SUMMARY_FIELDS = [
+    StructField("last_payment_date", TimestampType()),
+    StructField("last_payment_sequence", IntegerType()),
+    StructField("total_paid", DoubleType()),
+    StructField("last_outstanding_principal", DoubleType())
+]
+
+def generate_payments(spark, config, loans_df, summary=False):
+    """Generate realistic payment data with behavioral patterns
+
+    With summary=True, returns (payments, per-loan summary) from the same
+    mapInPandas pass, for generate_defaults.
+    """
+    
+    # Filter only disbursed loans
+    active_loans = loans_df.filter(
+        (col("current_loan_status").isin(["Active", "Closed", "Defaulted"])) &
+        (col("disbursement_date").isNotNull())
+    ).select(
+        "loan_id", "disbursement_date", "emi_amount", "loan_amount", "loan_term_months",
+        "base_interest_rate", "customer_profile", "current_loan_status"
+    )
+    
+    # Executors only need the engine modules and plain-data business rules
+    spark.sparkContext.addPyFile(deterministic_rng.__file__)
+    spark.sparkContext.addPyFile(dimension_lookups.__file__)
+    spark.sparkContext.addPyFile(amortization_engine.__file__)
+    engine_config = SimpleNamespace(
+        SEED=config.SEED,
+        AS_OF_DATE=config.AS_OF_DATE,
+        CUSTOMER_PROFILES=config.CUSTOMER_PROFILES,
+        PAYMENT_RULES=config.PAYMENT_RULES
+    )
+    schema = StructType(PAYMENTS_SCHEMA.fields + SUMMARY_FIELDS) if summary else PAYMENTS_SCHEMA
+    timestamps = [field.name for field in schema.fields if isinstance(field.dataType, TimestampType)]
+    strings = [field.name for field in schema.fields if isinstance(field.dataType, StringType)]
+    
+    def with_schema_columns(frame):
+        # Columns of the other record kind are typed nulls (Arrow cannot read NaN as a timestamp)
+        missing = {name: (pd.Series(pd.NaT, index=frame.index, dtype='datetime64[ns]') if name in timestamps
+                          else None if name in strings else np.nan)
+                   for name in schema.fieldNames() if name not in frame.columns}
+        return frame.assign(**missing)[schema.fieldNames()]
+    
+    def schedule_partition(loan_batches):
+        # Each Arrow batch of loans is scheduled independently inside the executor
+        for loans_batch in loan_batches:
+            payments, loan_summary = build_payment_schedules(loans_batch, engine_config, summary=True)
+            if len(payments):
+                yield with_schema_columns(payments.astype({"payment_method": str, "payment_status": str}))
+            if summary and len(loan_summary):
+                yield with_schema_columns(loan_summary)
+    
+    # Loans are already one row per loan_id, so no groupBy shuffle is needed
+    schedules_df = active_loans.mapInPandas(schedule_partition, schema)
+    if not summary:
+        # Timestamps become DATE and money DECIMAL(15,2) (see table_schemas)
+        return compact_columns(schedules_df)
+    
+    # Both outputs are materialized from one engine pass, then the combined rows are dropped
+    schedules_df = schedules_df.persist()
+    payments_df = compact_columns(schedules_df.filter(col("payment_id").isNotNull())
+                                  .select(*PAYMENTS_SCHEMA.fieldNames())).cache()
+    summary_df = (schedules_df.filter(col("payment_id").isNull())
+                  .select("loan_id", col("last_payment_date").cast("date").alias("last_payment_date"),
+                          "last_payment_sequence", "total_paid", "last_outstanding_principal")
+                  .cache())
+    payments_df.count()
+    summary_df.count()
+    schedules_df.unpersist()
+    return payments_df, summary_df
+
+# =====================================================
+# DEFAULTS TABLE GENERATION
+# =====================================================
+
+def generate_defaults(spark, config, loans_df, payments_df, last_payments=None):
+    """Generate realistic default and collection data
+
+    `last_payments` (the generate_payments summary) replaces the groupBy over
+    `payments_df`, so the payments table is not shuffled.
+    """
+    
+    # Find defaulted loans
+    defaulted_loans = loans_df.filter(col("current_loan_status") == "Defaulted")
+    
+    # Get last payment information for each defaulted loan
+    if last_payments is None:
+        last_payments = payments_df.groupBy("loan_id").agg(
+            F.max("payment_date").alias("last_payment_date"),
+            F.max("payment_sequence_number").alias("last_payment_sequence"),
+            F.sum("payment_amount").alias("total_paid")
+        )
+    
+    # Join with defaulted loans
+    defaults_base = defaulted_loans.join(
+        last_payments.select("loan_id", "last_payment_date", "last_payment_sequence", "total_paid"), "loan_id", "left"
+    )
+    
+    # Calculate default information
+    defaults_df = defaults_base.withColumn(
+        "default_date",
+        coalesce(
+            date_add(col("last_payment_date"), 60),  # Default 60 days after last payment
+            date_add(col("disbursement_date"), 90)   # Or 90 days after disbursement
+        )
+    )
+    
+    defaults_df = defaults_df.withColumn(
+        "dpd_days",
+        datediff(lit(config.AS_OF_DATE.date()), col("default_date"))
+    )
+    
+    # Categorize into buckets
+    defaults_df = defaults_df.withColumn(
+        "default_bucket",
+        when(col("dpd_days") <= 30, "0-30 DPD")
+        .when(col("dpd_days") <= 60, "31-60 DPD")
+        .when(col("dpd_days") <= 90, "61-90 DPD")
+        .when(col("dpd_days") <= 180, "91-180 DPD")
+        .otherwise("180+ DPD")
+    )
+    
+    # Calculate default amount
+    defaults_df = defaults_df.withColumn(
+        "default_amount",
+        col("loan_amount") - coalesce(col("total_paid"), 0)
+    )
+    
+    # Add default reasons based on customer profile and timing
+    defaults_df = defaults_df.withColumn(
+        "primary_default_reason",
+        when(year(col("default_date")).isin([2020, 2021]), "Job Loss")  # COVID impact
+        .when(col("customer_profile") == "poor", "Income Reduction")
+        .when(month(col("default_date")).isin([3, 4]), "Course Dropout")  # Exam season
+        .otherwise(
+            expr(_weighted(config.DEFAULT_REASONS, sql_uniform(config.SEED, 'default_reason', 'loan_id')))
+        )
+    )
+    
+    # Collection stage based on time in default
+    defaults_df = defaults_df.withColumn(
+        "collection_stage",
+        when(col("dpd_days") <= 30, "Early Collection")
+        .when(col("dpd_days") <= 90, "Primary Collection")
+        .when(col("dpd_days") <= 180, "Secondary Collection")
+        .otherwise("Legal Action")
+    )
+    
+    # Recovery information
+    recovery_u = expr(sql_uniform(config.SEED, 'default_recovery', 'loan_id'))
+    defaults_df = defaults_df.withColumn(
+        "recovery_percentage",
+        when(col("default_bucket") == "0-30 DPD", recovery_u * 30 + 70)  # 70-100% recovery
+        .when(col("default_bucket") == "31-60 DPD", recovery_u * 40 + 40)  # 40-80% recovery
+        .when(col("default_bucket") == "61-90 DPD", recovery_u * 30 + 20)  # 20-50% recovery
+        .when(col("default_bucket") == "91-180 DPD", recovery_u * 20 + 10)  # 10-30% recovery
+        .otherwise(recovery_u * 15)  # 0-15% recovery
+    )
+    
+    defaults_df = defaults_df.withColumn(
+        "total_recovered_amount",
+        col("default_amount") * col("recovery_percentage") / 100
+    )
+    
+    return compact_columns(defaults_df)
+
+# =====================================================
+# MARKET ROLLUPS (OPTIONAL SUMMARY TABLES)
+# =====================================================
+
+def _with_city_state(spark, config, rollups_df):
+    """current_state of each rollup city from the city dimension (second column)"""
+    city_dim = broadcast_dimension(spark, city_dimension(config), "city_dim_")
+    others_state = config.CITY_DISTRIBUTION['Others']['state']
+    rollups_df = rollups_df.join(city_dim, col("current_city") == col("city_dim_city"), "left")
+    columns = [column for column in rollups_df.columns if column != "current_city" and not column.startswith("city_dim_")]
+    return rollups_df.select("current_city", coalesce(col("city_dim_state"), lit(others_state)).alias("current_state"),
+                             *columns)
+
+
+def generate_market_rollups(spark, config, customers_df, loans_df):
+    """Loans per city and disbursement year (see local_backend.generate_market_rollups)"""
+
+    # Loan measures per city and disbursement year
+    processing_days = datediff(col("disbursement_date"), col("application_date"))
+    loan_rollups = (loans_df
+        .groupBy("current_city", year("disbursement_date").alias("disbursement_year"))
+        .agg(count(lit(1)).alias("loans"),
+             lit(0).alias("customers_without_loans"),
+             F.sum("loan_amount").alias("portfolio_value"),
+             count(when(col("loan_status") == "Defaulted", 1)).alias("defaulted_loans"),
+             count(when(col("current_loan_status") == "Defaulted", 1)).alias("currently_defaulted_loans"),
+             F.sum(processing_days).alias("processing_days"),
+             count(processing_days).alias("processed_loans"))
+    )
+
+    # Customers without loans, under a NULL disbursement year
+    idle = (customers_df
+        .join(loans_df.select("customer_id").distinct(), "customer_id", "left_anti")
+        .groupBy("current_city")
+        .agg(count(lit(1)).alias("customers_without_loans"))
+        .select("current_city", lit(None).cast("int").alias("disbursement_year"), lit(0).cast("long").alias("loans"),
+                "customers_without_loans", lit(None).cast("decimal(25,2)").alias("portfolio_value"),
+                lit(0).cast("long").alias("defaulted_loans"), lit(0).cast("long").alias("currently_defaulted_loans"),
+                lit(None).cast("long").alias("processing_days"), lit(0).cast("long").alias("processed_loans"))
+    )
+
+    measures = ["loans", "customers_without_loans", "portfolio_value", "defaulted_loans",
+                "currently_defaulted_loans", "processing_days", "processed_loans"]
+    rollups_df = (loan_rollups.unionByName(idle)
+        .groupBy("current_city", "disbursement_year")
+        .agg(*[F.sum(measure).alias(measure) for measure in measures]))
+    return compact_columns(_with_city_state(spark, config, rollups_df))
+
+
+def generate_market_customer_rollups(spark, config, customers_df, loans_df):
+    """Customers per city and set of loan disbursement years (bit year - 2000, bit 0 for none)"""
+
+    year_bit = shiftleft(lit(1).cast("long"),
+                         coalesce(year("disbursement_date") - local_backend.ROLLUP_BASE_YEAR, lit(0)))
+    loan_years = (loans_df
+        .select("customer_id", year_bit.alias("bit"))
+        .distinct()
+        .groupBy("customer_id")
+        .agg(F.sum("bit").alias("loan_years")))
+
+    rollups_df = (customers_df
+        .join(loan_years, "customer_id", "left")
+        .groupBy("current_city", coalesce(col("loan_years"), lit(1).cast("long")).alias("loan_years"))
+        .agg(count(lit(1)).alias("customers")))
+    return compact_columns(_with_city_state(spark, config, rollups_df))
+
+# =====================================================
+# BACKEND OPERATIONS USED BY generate_edufin_dataset
+# =====================================================
+
+def cache_table(df):
+    return df.cache()
+
+
+def count_rows(df):
+    return df.count()
+
+
+def aggregate(df, measures):
+    """Evaluate data_quality_validation measures in a single df.agg() action"""
+    columns = []
+    for position, (kind, column, value) in enumerate(measures.values()):
+        if kind == 'rows':
+            measure = count(lit(1))
+        elif kind == 'nulls':
+            measure = count(when(col(column).isNull(), 1))
+        elif kind == 'equals':
+            measure = count(when(col(column) == lit(value), 1))
+        elif kind == 'contains':
+            measure = count(when(col(column).contains(value), 1))
+        elif kind == 'min':
+            measure = F.min(col(column))
+        elif kind == 'max':
+            measure = F.max(col(column))
+        elif kind == 'sum':
+            measure = F.sum(col(column) if value is None else when(col(value[0]) != lit(value[1]), col(column)))
+        else:
+            raise ValueError(f"Unknown measure kind '{kind}'")
+        columns.append(measure.alias(f"m{position}"))
+    row = df.agg(*columns).first()
+    return {name: row[f"m{position}"] for position, name in enumerate(measures)}
+
+
+def count_orphans(child_df, column, parent_df, parent_column):
+    """Non-null keys of `child_df` missing from the parent table"""
+    parent_keys = parent_df.select(col(parent_column).alias(column))
+    return child_df.where(col(column).isNotNull()).select(column).join(parent_keys, column, "left_anti").count()
+
+
+def save_table(df, path, layout=None):
+    """Overwrite a Parquet table directory, optionally with a parquet_layout layout"""
+    if layout is not None:
+        write_spark_table(df, path, layout)
+        return
+    df.write.mode("overwrite").parquet(path)
+
+
+def load_table(spark, path):
+    return spark.read.parquet(path)
+
+
+def checkpoint_table(df, path):
+    """Persist a table for pipeline_dag and continue from the written files
+
+    Reading the checkpoint back truncates the lineage, so a released table is
+    re-read from Parquet rather than regenerated.
+    """
+    save_table(df, path)
+    checkpointed = df.sparkSession.read.parquet(path).cache()
+    df.unpersist()
+    return checkpointed
+
+
+def release_table(df):
+    df.unpersist()
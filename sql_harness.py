@@ -0,0 +1,446 @@
+# =====================================================
+# EduFin Credit Solutions - Embedded SQL Query Harness
+# Times EduFin_SQL_V3.sql against generated data, no SQL Server needed
+# =====================================================
+
+# The generated tables (as the sample_* tables of TABLE_SCHEMAS) and the
+# reference tables of EduFin_Table_SQL_V3.sql are loaded into an embedded
+# engine - SQLite from the standard library, or DuckDB when it is installed -
+# and every query of EduFin_SQL_V3.sql is run against them. The T-SQL pieces
+# the workload uses are translated on the way:
+#   DATEDIFF(unit, a, b)   julianday() arithmetic (SQLite) / date_diff (DuckDB)
+#   ISNULL(a, b)           COALESCE(a, b)
+#   YEAR(d)                strftime('%Y', d) (SQLite)
+#   GETDATE(), @@ROWCOUNT  the run's clock and the previous query's row count
+#   DECLARE @var = ...     substituted into the statements that follow
+#   STRING_AGG(a + b, s) WITHIN GROUP (ORDER BY o)
+#                          group_concat / string_agg with || concatenation
+# Each query is timed over several runs at several scale factors, and the
+# results can be compared with a stored baseline, so CI fails on a query
+# performance regression:
+#
+#     python sql_harness.py --scale-factors 0.01 0.1 --baseline sql_baseline.json
+#     python sql_harness.py --data-path /tmp/edufin_data --engines sqlite duckdb
+#     python sql_harness.py --sql EduFin_SQL_V3_Rollups.sql     # market_rollups variant
+
+import argparse
+import json
+import math
+import os
+import platform
+import re
+import sqlite3
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import local_backend
+from edufin_config import EduFinDataConfig
+from sharded_generation import read_sharded_table
+from table_schemas import REFERENCE_DDL_PATH, TABLE_SCHEMAS, column_names, storage_table
+
+SQL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'EduFin_SQL_V3.sql')
+
+ENGINES = ['sqlite', 'duckdb']
+DEFAULT_SCALE_FACTORS = [0.01, 0.1]
+
+# Generated tables needed to build each table locally
+TABLE_DEPENDENCIES = {
+    'institutions': [],
+    'customers': [],
+    'loans': [],
+    'payments': ['loans'],
+    'defaults': ['loans', 'payments'],
+    'market_rollups': ['customers', 'loans'],
+    'market_customer_rollups': ['customers', 'loans']
+}
+
+# Multipliers from days for the DATEDIFF units of the workload
+_DAY_FRACTIONS = {'DAY': 1, 'HOUR': 24, 'MINUTE': 1440, 'SECOND': 86400, 'MILLISECOND': 86400000}
+
+# =====================================================
+# PARSING T-SQL SCRIPTS
+# =====================================================
+
+def split_statements(sql_text):
+    """Top-level statements of a script as (name, statement); name is the last comment line before it"""
+    statements, name, current = [], None, []
+    position, quoted = 0, False
+    while position < len(sql_text):
+        char = sql_text[position]
+        if quoted:
+            current.append(char)
+            quoted = char != "'"
+        elif char == "'":
+            current.append(char)
+            quoted = True
+        elif sql_text.startswith('--', position):
+            end = sql_text.find('\n', position)
+            end = len(sql_text) if end < 0 else end
+            comment = sql_text[position + 2:end].strip()
+            # Comments above a statement name it; banners and trailing remarks do not
+            if not ''.join(current).strip() and comment and not comment.startswith('='):
+                name = comment
+            current.append(' ')
+            position = end
+            continue
+        elif char == ';':
+            statement = ''.join(current).strip()
+            if statement:
+                statements.append((name, statement))
+            name, current = None, []
+        else:
+            current.append(char)
+        position += 1
+    statement = ''.join(current).strip()
+    if statement:
+        statements.append((name, statement))
+    return statements
+
+
+def load_workload(path=SQL_PATH):
+    """Queries and DECLAREs of a T-SQL script, in script order"""
+    with open(path, encoding='utf-8-sig') as handle:
+        statements = split_statements(handle.read())
+    workload = []
+    for name, statement in statements:
+        keyword = statement.split(None, 1)[0].upper()
+        if keyword in ('SELECT', 'WITH', 'DECLARE'):
+            workload.append({'name': name or f"query {len(workload) + 1}", 'kind': keyword.lower(), 'sql': statement})
+    return workload
+
+
+def referenced_tables(workload):
+    """Generated tables (TABLE_SCHEMAS keys) that the workload reads"""
+    text = ' '.join(query['sql'] for query in workload).lower()
+    return [table for table, schema in TABLE_SCHEMAS.items()
+            if re.search(rf"\b{schema['target_table']}\b", text)]
+
+# =====================================================
+# T-SQL TRANSLATION
+# =====================================================
+
+def _split_arguments(text):
+    """Split a function's argument text on top-level commas"""
+    arguments, depth, quoted, start = [], 0, False, 0
+    for position, char in enumerate(text):
+        if char == "'":
+            quoted = not quoted
+        elif not quoted:
+            depth += {'(': 1, ')': -1}.get(char, 0)
+            if char == ',' and depth == 0:
+                arguments.append(text[start:position].strip())
+                start = position + 1
+    arguments.append(text[start:].strip())
+    return arguments
+
+
+def _closing_paren(text, start):
+    """Position of the parenthesis closing the one at `start`"""
+    depth, quoted = 0, False
+    for position in range(start, len(text)):
+        char = text[position]
+        if char == "'":
+            quoted = not quoted
+        elif not quoted and char in '()':
+            depth += 1 if char == '(' else -1
+            if depth == 0:
+                return position
+    raise ValueError(f"Unbalanced parentheses after: {text[start:start + 60]!r}")
+
+
+def _rewrite_calls(sql, function, rewrite):
+    """Replace every call of `function` with rewrite(arguments, trailing text) -> (replacement, consumed)"""
+    pattern = re.compile(rf"\b{function}\s*\(", re.IGNORECASE)
+    output, position = [], 0
+    while True:
+        match = pattern.search(sql, position)
+        if match is None:
+            output.append(sql[position:])
+            return ''.join(output)
+        close = _closing_paren(sql, match.end() - 1)
+        replacement, consumed = rewrite(_split_arguments(sql[match.end():close]), sql[close + 1:])
+        output.append(sql[position:match.start()])
+        output.append(replacement)
+        position = close + 1 + consumed
+
+
+def _concatenation(expression):
+    """T-SQL string + as the standard || operator (outside string literals)"""
+    parts = re.split(r"('(?:[^']|'')*')", expression)
+    return ''.join(part if part.startswith("'") else part.replace('+', '||') for part in parts)
+
+
+def translate(sql, engine, variables=None, rowcount=0):
+    """Rewrite the T-SQL constructs of the workload for SQLite or DuckDB"""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+
+    now = "strftime('%Y-%m-%d %H:%M:%f', 'now')" if engine == 'sqlite' else "CAST(now() AS TIMESTAMP)"
+    sql = re.sub(r"\bGETDATE\s*\(\s*\)", now, sql, flags=re.IGNORECASE)
+    sql = re.sub(r"@@ROWCOUNT\b", str(int(rowcount)), sql, flags=re.IGNORECASE)
+    for name, value in (variables or {}).items():
+        sql = re.sub(rf"{re.escape(name)}\b", value, sql)
+
+    def datediff(arguments, rest):
+        unit, start, end = arguments[0].upper(), translate(arguments[1], engine), translate(arguments[2], engine)
+        if unit not in _DAY_FRACTIONS:
+            raise ValueError(f"DATEDIFF unit {unit} is not translated")
+        if engine == 'duckdb':
+            return f"date_diff('{unit.lower()}', CAST({start} AS TIMESTAMP), CAST({end} AS TIMESTAMP))", 0
+        return f"CAST((julianday({end}) - julianday({start})) * {_DAY_FRACTIONS[unit]} AS INTEGER)", 0
+
+    def year(arguments, rest):
+        value = translate(arguments[0], engine)
+        if engine == 'duckdb':
+            return f"year({value})", 0
+        return f"CAST(strftime('%Y', {value}) AS INTEGER)", 0
+
+    def string_agg(arguments, rest):
+        expression, separator = _concatenation(translate(arguments[0], engine)), arguments[1]
+        order = re.match(r"\s*WITHIN\s+GROUP\s*\(", rest, re.IGNORECASE)
+        order_by, consumed = '', 0
+        if order:
+            close = _closing_paren(rest, order.end() - 1)
+            order_by, consumed = ' ' + rest[order.end():close].strip(), close + 1
+        if engine == 'duckdb':
+            return f"string_agg({expression}, {separator}{order_by})", consumed
+        if sqlite3.sqlite_version_info < (3, 44, 0):
+            order_by = ''  # ORDER BY inside aggregates needs SQLite 3.44
+        return f"group_concat({expression}, {separator}{order_by})", consumed
+
+    sql = _rewrite_calls(sql, 'DATEDIFF', datediff)
+    sql = _rewrite_calls(sql, 'YEAR', year)
+    sql = _rewrite_calls(sql, 'STRING_AGG', string_agg)
+    sql = re.sub(r"\bISNULL\s*\(", "COALESCE(", sql, flags=re.IGNORECASE)
+    return sql
+
+
+def _declared_value(statement, engine):
+    """(variable, SQL literal) of a `DECLARE @var TYPE = expression` evaluated now"""
+    match = re.match(r"DECLARE\s+(@\w+)\s+\w+(?:\([\d,\s]+\))?\s*=\s*(.+)$", statement, re.IGNORECASE | re.DOTALL)
+    if match is None:
+        raise ValueError(f"Unsupported DECLARE: {statement[:80]}")
+    name, expression = match.groups()
+    if re.fullmatch(r"GETDATE\s*\(\s*\)", expression.strip(), re.IGNORECASE):
+        stamp = datetime.now().isoformat(sep=' ', timespec='milliseconds')
+        return name, f"'{stamp}'" if engine == 'sqlite' else f"TIMESTAMP '{stamp}'"
+    return name, expression.strip()
+
+# =====================================================
+# LOADING TABLES
+# =====================================================
+
+def connect(engine):
+    """A fresh in-memory database of the engine"""
+    if engine == 'duckdb':
+        import duckdb
+
+        return duckdb.connect(':memory:')
+    connection = sqlite3.connect(':memory:')
+    try:
+        connection.execute("SELECT power(2, 3)")
+    except sqlite3.OperationalError:
+        # Builds without SQLITE_ENABLE_MATH_FUNCTIONS
+        connection.create_function('power', 2, math.pow, deterministic=True)
+    return connection
+
+
+def load_reference_tables(connection, path=REFERENCE_DDL_PATH):
+    """Run the CREATE TABLE and INSERT statements of EduFin_Table_SQL_V3.sql"""
+    with open(path, encoding='utf-8-sig') as handle:
+        statements = split_statements(handle.read())
+    for _, statement in statements:
+        if statement.split(None, 1)[0].upper() in ('CREATE', 'INSERT'):
+            connection.execute(statement)
+
+
+def load_generated_table(connection, engine, table, df):
+    """Load one generated table as its sample_* table, with the exported columns"""
+    schema = TABLE_SCHEMAS[table]
+    df = df[column_names(schema)]
+    target = schema['target_table']
+    if engine == 'duckdb':
+        connection.register('generated_frame', storage_table(df))
+        connection.execute(f"CREATE TABLE {target} AS SELECT * FROM generated_frame")
+        connection.unregister('generated_frame')
+        return
+
+    columns = ', '.join(f"{name} {sql_type}" for name, sql_type in schema['columns'])
+    connection.execute(f"CREATE TABLE {target} ({columns})")
+    # SQLite has no DATE type: dates are ISO text, which julianday() and strftime() read
+    values = df.astype({name: object for name in df.columns})
+    for name, sql_type in schema['columns']:
+        if sql_type == 'DATE':
+            values[name] = pd.to_datetime(df[name]).dt.strftime('%Y-%m-%d')
+    values = values.astype(object).where(values.notna(), None)
+    placeholders = ', '.join('?' * len(schema['columns']))
+    connection.executemany(f"INSERT INTO {target} VALUES ({placeholders})", values.itertuples(index=False))
+    connection.commit()
+
+
+def generated_tables(tables, scale_factor=None, data_path=None):
+    """pandas frames of `tables` read from `data_path`, or generated locally at `scale_factor`"""
+    if data_path is not None:
+        return {table: read_sharded_table(data_path, table) for table in tables}
+
+    config = EduFinDataConfig(scale_factor=scale_factor)
+    needed = set(tables)
+    for table in tables:
+        needed.update(TABLE_DEPENDENCIES[table])
+    frames = {}
+    if 'institutions' in needed:
+        frames['institutions'] = local_backend.generate_institutions(config)
+    if 'customers' in needed:
+        frames['customers'] = local_backend.generate_customers(config)
+    if 'loans' in needed:
+        frames['loans'] = local_backend.generate_loans(config)
+    if 'payments' in needed:
+        frames['payments'] = local_backend.generate_payments(config, frames['loans'])
+    if 'defaults' in needed:
+        frames['defaults'] = local_backend.generate_defaults(config, frames['loans'], frames['payments'])
+    if 'market_rollups' in needed:
+        frames['market_rollups'] = local_backend.generate_market_rollups(config, frames['customers'], frames['loans'])
+    if 'market_customer_rollups' in needed:
+        frames['market_customer_rollups'] = local_backend.generate_market_customer_rollups(config, frames['customers'],
+                                                                                          frames['loans'])
+    return {table: frames[table] for table in tables}
+
+# =====================================================
+# RUNNING THE WORKLOAD
+# =====================================================
+
+def run_workload(connection, engine, workload, repeat=3):
+    """Time every query `repeat` times; returns one record per query"""
+    records, variables, previous_rows = [], {}, 0
+    for query in workload:
+        if query['kind'] == 'declare':
+            name, value = _declared_value(query['sql'], engine)
+            variables[name] = value
+            continue
+        # @@ROWCOUNT refers to the statement before this one, as in one SSMS batch
+        sql = translate(query['sql'], engine, variables, rowcount=previous_rows)
+        timings, rows = [], 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            rows = len(connection.execute(sql).fetchall())
+            timings.append(time.perf_counter() - started)
+        previous_rows = rows
+        records.append({
+            'query': query['name'], 'rows': rows, 'runs': repeat,
+            'min_seconds': round(min(timings), 6), 'median_seconds': round(statistics.median(timings), 6)
+        })
+    return records
+
+
+def run_harness(scale_factors=DEFAULT_SCALE_FACTORS, engines=('sqlite',), repeat=3, data_path=None,
+                sql_path=SQL_PATH):
+    """Load and time the workload for every engine and scale factor (or once for `data_path`)"""
+
+    workload = load_workload(sql_path)
+    tables = referenced_tables(workload)
+    results = []
+    for scale_factor in ([None] if data_path is not None else scale_factors):
+        label = data_path if data_path is not None else f"SF {scale_factor:g}"
+        print(f"\n===== SQL harness: {label} =====")
+        started = time.perf_counter()
+        frames = generated_tables(tables, scale_factor, data_path)
+        print(f"   Tables {', '.join(f'{t} ({len(df):,})' for t, df in frames.items())} "
+              f"ready in {time.perf_counter() - started:.1f}s")
+
+        for engine in engines:
+            connection = connect(engine)
+            started = time.perf_counter()
+            load_reference_tables(connection)
+            for table, df in frames.items():
+                load_generated_table(connection, engine, table, df)
+            print(f"   {engine}: loaded in {time.perf_counter() - started:.1f}s")
+
+            for record in run_workload(connection, engine, workload, repeat):
+                results.append(dict({'engine': engine, 'scale_factor': scale_factor}, **record))
+                print(f"   {engine}: {record['query']:<48} {record['rows']:>6} rows  "
+                      f"{record['median_seconds'] * 1000:>10.1f} ms")
+            connection.close()
+    return results
+
+# =====================================================
+# RESULTS AND BASELINE COMPARISON
+# =====================================================
+
+def write_results(results, path):
+    document = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sqlite': sqlite3.sqlite_version,
+        'results': results
+    }
+    with open(path, 'w') as handle:
+        json.dump(document, handle, indent=2)
+    return path
+
+
+def compare_to_baseline(results, baseline, tolerance=0.25, min_seconds=0.05):
+    """Flag queries whose median latency grew by more than `tolerance` (or whose row count changed)
+
+    Queries faster than `min_seconds` in both runs are not timed against the baseline.
+    """
+
+    reference = {(r['engine'], r['scale_factor'], r['query']): r for r in baseline['results']}
+    regressions = []
+
+    print(f"\n{'engine':<8}{'SF':>7}  {'query':<48}{'time x':>9}")
+    for record in results:
+        base = reference.get((record['engine'], record['scale_factor'], record['query']))
+        if base is None:
+            continue
+        timed = max(record['median_seconds'], base['median_seconds']) >= min_seconds and base['median_seconds'] > 0
+        ratio = record['median_seconds'] / base['median_seconds'] if timed else None
+
+        flags = []
+        if ratio is not None and ratio > 1 + tolerance:
+            flags.append('slower')
+        if record['rows'] != base['rows']:
+            flags.append('rows changed')
+        if flags:
+            regressions.append(dict(record, time_ratio=ratio, flags=flags))
+
+        scale = f"{record['scale_factor']:g}" if record['scale_factor'] is not None else '-'
+        ratio_text = f"{ratio:.2f}" if ratio is not None else '-'
+        print(f"{record['engine']:<8}{scale:>7}  {record['query'][:47]:<48}{ratio_text:>9}  "
+              f"{', '.join(flags).upper()}")
+
+    print(f"\n{len(regressions)} regression(s) beyond {tolerance:.0%} of the baseline")
+    return regressions
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time EduFin_SQL_V3.sql on generated data in an embedded engine")
+    parser.add_argument("--scale-factors", type=float, nargs="+", default=DEFAULT_SCALE_FACTORS)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=['sqlite'])
+    parser.add_argument("--data-path", default=None, help="read generated Parquet tables instead of generating")
+    parser.add_argument("--sql", default=SQL_PATH, help="T-SQL workload to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--results", default="sql_harness_results.json")
+    parser.add_argument("--baseline", default=None, help="baseline results JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run_harness(args.scale_factors, args.engines, args.repeat, args.data_path, args.sql)
+    write_results(results, args.results)
+    print(f"\nResults written to {args.results}")
+
+    if args.baseline and args.save_baseline:
+        write_results(results, args.baseline)
+        print(f"Baseline updated: {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare_to_baseline(results, json.load(handle), args.tolerance)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,282 @@
+# =====================================================
+# EduFin Credit Solutions - SQL Server DDL Generator
+# Tables, keys and workload-driven indexes for the generated data
+# =====================================================
+
+# EduFin_Table_SQL_V3.sql only creates the reference tables. This module writes
+# the DDL of the generated tables from TABLE_SCHEMAS, in two scripts:
+#   edufin_tables.sql   before the bulk load - CREATE TABLE with the clustered
+#                       primary key (or a clustered columnstore for payments)
+#   edufin_indexes.sql  after the bulk load - foreign keys and nonclustered
+#                       indexes, which would otherwise slow every loaded batch
+# Indexes are derived from the predicates of the BI workload (EduFin_SQL_V3.sql):
+#   join keys        columns of the joined table compared in its ON clause
+#                    (ei.state AND ei.year -> (state, year)); on generated
+#                    tables the other columns the workload reads are
+#                    INCLUDEd, so the join is answered from the index
+#   filters          sargable WHERE columns of generated tables
+#   MIN / MAX        columns aggregated by MIN() or MAX() (one seek per end)
+#   COUNT(DISTINCT)  columns counted distinctly (an ordered index scan)
+#   foreign keys     SQL Server does not index them by itself
+# Columns wrapped in a function (YEAR(l.disbursement_date) = ei.year) cannot
+# be seeked and do not produce join indexes. Reference tables are a few dozen
+# rows, so only their join keys are indexed.
+#
+#     python sql_server_ddl.py --output-path /tmp/edufin_ddl
+#     python sql_server_ddl.py --payments-columnstore --market-rollups
+
+import argparse
+import os
+import re
+
+from data_quality_validation import FOREIGN_KEYS
+from sql_harness import SQL_PATH, split_statements
+from table_schemas import SUMMARY_DIRECTORIES, TABLE_DIRECTORIES, TABLE_SCHEMAS, column_names, reference_schemas
+
+ROLLUP_SQL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'EduFin_SQL_V3_Rollups.sql')
+
+_TOKEN = re.compile(r"'(?:[^']|'')*'|@@?\w+|\w+(?:\.\w+)?|[()]|[^\s\w]")
+_CLAUSES = {'SELECT': 'select', 'FROM': 'from', 'JOIN': 'from', 'ON': 'on', 'WHERE': 'where',
+            'GROUP': 'group', 'ORDER': 'order', 'HAVING': 'having'}
+_NOT_ALIASES = {'ON', 'WHERE', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'FULL', 'CROSS', 'OUTER', 'GROUP', 'ORDER',
+                'HAVING', 'UNION', 'AS'}
+
+# =====================================================
+# WORKLOAD PREDICATES
+# =====================================================
+
+def _known_tables(tables):
+    """{SQL table name: (registry key, columns)} of the generated and reference tables"""
+    known = {TABLE_SCHEMAS[table]['target_table']: (table, column_names(TABLE_SCHEMAS[table])) for table in tables}
+    for name, schema in reference_schemas().items():
+        known[name] = (name, column_names(schema))
+    return known
+
+
+def statement_predicates(name, statement, known):
+    """Column references of one query, by the clause and function they appear in"""
+    tokens = _TOKEN.findall(statement)
+    aliases = {}
+    for position, token in enumerate(tokens[:-1]):
+        if token.upper() in ('FROM', 'JOIN') and tokens[position + 1] in known:
+            table = tokens[position + 1]
+            aliases[table] = table
+            following = tokens[position + 2:position + 4]
+            if following and following[0].upper() == 'AS':
+                following = following[1:]
+            if following and re.fullmatch(r'\w+', following[0]) and following[0].upper() not in _NOT_ALIASES:
+                aliases[following[0]] = table
+
+    tables = set(aliases.values())
+    references, clause, stack, on_clause, joined = [], 'select', [], 0, None
+    for position, token in enumerate(tokens):
+        upper = token.upper()
+        if upper == 'JOIN' and position + 1 < len(tokens):
+            joined = tokens[position + 1]
+        if token == '(':
+            stack.append(clause)
+            continue
+        if token == ')':
+            clause = stack.pop() if stack else clause
+            continue
+        if upper in _CLAUSES:
+            clause = _CLAUSES[upper]
+            on_clause += upper == 'ON'
+            continue
+        if token.startswith("'") or token.startswith('@'):
+            continue
+
+        if '.' in token:
+            alias, column = token.split('.', 1)
+            table = aliases.get(alias)
+            if table is None or column not in known[table][1]:
+                continue
+        else:
+            # Unqualified columns belong to the only table of the query that has them
+            owners = [table for table in tables if token in known[table][1]]
+            if len(owners) != 1:
+                continue
+            table, column = owners[0], token
+
+        before = [tokens[position - offset].upper() if position >= offset else '' for offset in (1, 2, 3)]
+        references.append({
+            'query': name, 'table': table, 'column': column, 'clause': clause,
+            'on_clause': on_clause if clause == 'on' else None,
+            'joined': clause == 'on' and table == joined,
+            'wrapped': before[0] == '(' and re.fullmatch(r'\w+', before[1] or '-') is not None,
+            'min_max': before[0] == '(' and before[1] in ('MIN', 'MAX'),
+            'distinct': before[:3] == ['DISTINCT', '(', 'COUNT']
+        })
+    return references
+
+
+def workload_predicates(paths, tables):
+    """Column references of every query in the workload scripts"""
+    known = _known_tables(tables)
+    references = []
+    for path in paths:
+        with open(path, encoding='utf-8-sig') as handle:
+            statements = split_statements(handle.read())
+        for number, (name, statement) in enumerate(statements):
+            if statement.split(None, 1)[0].upper() in ('SELECT', 'WITH'):
+                label = f"{os.path.basename(path)}: {name or f'statement {number + 1}'}"
+                references += statement_predicates(label, statement, known)
+    return references
+
+# =====================================================
+# INDEX DESIGN
+# =====================================================
+
+def _add_index(indexes, table, keys, reason, include=()):
+    """Record an index, merged into any index whose keys start with the same columns"""
+    keys = list(keys)
+    for index in indexes:
+        if index['table'] != table:
+            continue
+        if index['keys'][:len(keys)] == keys or keys[:len(index['keys'])] == index['keys']:
+            if len(keys) > len(index['keys']):
+                index['keys'] = keys
+            if reason not in index['reasons']:
+                index['reasons'].append(reason)
+            index['include'] = [column for column in dict.fromkeys(index['include'] + list(include))
+                                if column not in index['keys']]
+            return
+    indexes.append({'table': table, 'keys': keys, 'include': list(include), 'reasons': [reason]})
+
+
+def design_indexes(references, tables):
+    """Nonclustered indexes for the workload: [{'table', 'keys', 'include', 'reasons'}]"""
+
+    generated = {TABLE_SCHEMAS[table]['target_table']: table for table in tables}
+    clustered = {name: TABLE_SCHEMAS[table]['clustered_key'] for name, table in generated.items()}
+    read_columns = {}
+    for reference in references:
+        read_columns.setdefault(reference['table'], []).append(reference['column'])
+
+    indexes = []
+
+    # Join keys of the joined (inner) table, per ON clause
+    joins = {}
+    for reference in references:
+        if reference['joined'] and not reference['wrapped']:
+            group = joins.setdefault((reference['query'], reference['on_clause'], reference['table']), [])
+            if reference['column'] not in group:
+                group.append(reference['column'])
+    for (query, _, table), keys in joins.items():
+        if keys[:1] == [clustered.get(table)]:
+            continue  # already the clustered key
+        include = []
+        if table in generated:
+            include = [column for column in dict.fromkeys(read_columns[table])
+                       if column not in keys and column != clustered[table]]
+        _add_index(indexes, table, keys, f"join on {', '.join(keys)} ({query})", include)
+
+    # Filters, MIN/MAX and distinct counts of generated tables
+    for reference in references:
+        table, column = reference['table'], reference['column']
+        if table not in generated or column == clustered[table]:
+            continue
+        if reference['clause'] == 'where' and not reference['wrapped']:
+            _add_index(indexes, table, [column], f"filter on {column} ({reference['query']})")
+        elif reference['min_max']:
+            _add_index(indexes, table, [column], f"MIN/MAX of {column} ({reference['query']})")
+        elif reference['distinct']:
+            _add_index(indexes, table, [column], f"COUNT(DISTINCT {column}) ({reference['query']})")
+
+    # Foreign keys not led by the clustered key
+    for child, column, parent, _ in FOREIGN_KEYS:
+        if child in tables and parent in tables and column != TABLE_SCHEMAS[child]['clustered_key']:
+            _add_index(indexes, TABLE_SCHEMAS[child]['target_table'], [column], f"foreign key to {parent}")
+    return indexes
+
+# =====================================================
+# DDL SCRIPTS
+# =====================================================
+
+def _index_name(table, keys, prefix='ix'):
+    return f"{prefix}_{table}_{'_'.join(keys)}"
+
+
+def create_tables_sql(tables, columnstore=()):
+    """CREATE TABLE statements with clustered primary keys, run before the bulk load"""
+
+    lines = ["-- EduFin generated tables (sql_server_ddl.py); load the data, then run edufin_indexes.sql",
+             "SET NOCOUNT ON;"]
+    for table in tables:
+        schema = TABLE_SCHEMAS[table]
+        name, key = schema['target_table'], schema['clustered_key']
+        columns = [f"    {column} {sql_type}{' NOT NULL' if column == key else ' NULL'}"
+                   for column, sql_type in schema['columns']]
+        if key is not None:
+            kind = 'NONCLUSTERED' if table in columnstore else 'CLUSTERED'
+            columns.append(f"    CONSTRAINT pk_{name} PRIMARY KEY {kind} ({key})")
+
+        lines += ["", f"IF OBJECT_ID(N'{name}', N'U') IS NULL", f"CREATE TABLE {name} (",
+                  ",\n".join(columns), ");"]
+        if table in columnstore:
+            # Bulk loads with BATCHSIZE >= 102400 go straight into compressed row groups
+            lines += [f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'cci_{name}')",
+                      f"CREATE CLUSTERED COLUMNSTORE INDEX cci_{name} ON {name};"]
+    return "\n".join(lines) + "\n"
+
+
+def create_indexes_sql(tables, indexes):
+    """Foreign keys and nonclustered indexes, run after the bulk load"""
+
+    lines = ["-- EduFin foreign keys and workload indexes (sql_server_ddl.py), run after the bulk load",
+             "SET NOCOUNT ON;", "", "-- Foreign keys (WITH CHECK, so the optimizer can trust them)"]
+    for child, column, parent, parent_key in FOREIGN_KEYS:
+        if child not in tables or parent not in tables:
+            continue
+        name, parent_name = TABLE_SCHEMAS[child]['target_table'], TABLE_SCHEMAS[parent]['target_table']
+        constraint = f"fk_{name}_{column}"
+        lines += [f"IF OBJECT_ID(N'{constraint}', N'F') IS NULL",
+                  f"ALTER TABLE {name} WITH CHECK ADD CONSTRAINT {constraint} "
+                  f"FOREIGN KEY ({column}) REFERENCES {parent_name} ({parent_key});"]
+
+    for index in indexes:
+        name = _index_name(index['table'], index['keys'])
+        lines.append("")
+        lines += [f"-- {reason}" for reason in index['reasons']]
+        lines.append(f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = N'{name}')")
+        statement = f"CREATE NONCLUSTERED INDEX {name} ON {index['table']} ({', '.join(index['keys'])})"
+        if index['include']:
+            statement += f" INCLUDE ({', '.join(index['include'])})"
+        lines.append(statement + ";")
+    return "\n".join(lines) + "\n"
+
+
+def write_ddl(output_path="/tmp/edufin_ddl", tables=None, workload=(SQL_PATH,), columnstore=()):
+    """Write edufin_tables.sql and edufin_indexes.sql; returns the designed indexes"""
+
+    tables = list(tables or TABLE_DIRECTORIES)
+    indexes = design_indexes(workload_predicates(workload, tables), tables)
+    os.makedirs(output_path, exist_ok=True)
+    with open(os.path.join(output_path, 'edufin_tables.sql'), 'w') as handle:
+        handle.write(create_tables_sql(tables, columnstore))
+    with open(os.path.join(output_path, 'edufin_indexes.sql'), 'w') as handle:
+        handle.write(create_indexes_sql(tables, indexes))
+
+    print(f"DDL for {len(tables)} tables written to {output_path}")
+    for index in indexes:
+        include = f" INCLUDE ({', '.join(index['include'])})" if index['include'] else ""
+        print(f"   {index['table']} ({', '.join(index['keys'])}){include}")
+    return indexes
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write SQL Server DDL for the generated EduFin tables")
+    parser.add_argument("--output-path", default="/tmp/edufin_ddl")
+    parser.add_argument("--payments-columnstore", action="store_true",
+                        help="store sample_payments as a clustered columnstore (primary key nonclustered)")
+    parser.add_argument("--market-rollups", action="store_true",
+                        help="include the summary tables and EduFin_SQL_V3_Rollups.sql")
+    parser.add_argument("--workload", nargs="+", default=None, help="T-SQL scripts whose predicates drive the indexes")
+    args = parser.parse_args()
+
+    tables = list(TABLE_DIRECTORIES) + (list(SUMMARY_DIRECTORIES) if args.market_rollups else [])
+    workload = args.workload or [SQL_PATH] + ([ROLLUP_SQL_PATH] if args.market_rollups else [])
+    write_ddl(args.output_path, tables, workload, columnstore=('payments',) if args.payments_columnstore else ())
@@ -0,0 +1,219 @@
+# =====================================================
+# EduFin Credit Solutions - Streaming SSMS Export
+# Chunked CSV part files + manifest + BULK INSERT script
+# =====================================================
+
+# Tables are never collected whole on the driver. Sources can be
+#   - Spark DataFrames: dates are formatted and CSV parts written by the executors
+#   - pandas DataFrames (local backend): written slice by slice
+#   - Parquet table directories (e.g. sharded_generation output): streamed in
+#     Arrow record batches, so memory stays bounded by `batch_rows`
+# Every part file carries its own header row and at most `rows_per_file` rows.
+# manifest.json lists the part files per table, and bulk_insert.sql loads them.
+
+import gzip
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from parquet_layout import part_files
+from table_schemas import TABLE_SCHEMAS, column_names, column_types, frame_from_storage
+
+# Generated tables are loaded into the sample_* tables queried by EduFin_SQL_V3.sql
+TARGET_TABLE_PREFIX = 'sample_'
+
+
+def _format_dates(chunk):
+    """SSMS-compatible %Y-%m-%d text for every column with 'date' in its name"""
+    formatted = {}
+    for column in chunk.columns:
+        if 'date' in column.lower():
+            values = pd.to_datetime(chunk[column]).to_numpy().astype('datetime64[D]')
+            text = values.astype('U10').astype(object)
+            text[np.isnat(values)] = None
+            formatted[column] = text
+    return chunk.assign(**formatted) if formatted else chunk
+
+
+def _format_integers(chunk):
+    """Integer columns held as floats because of NULLs, written as 3 rather than 3.0"""
+    types = column_types()
+    formatted = {column: chunk[column].astype('Int64') for column in chunk.columns
+                 if types.get(column, '').endswith('INT') and chunk[column].dtype.kind == 'f'}
+    return chunk.assign(**formatted) if formatted else chunk
+
+
+def _open_part(path, compression):
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', compresslevel=6, encoding='utf-8', newline='')  # level 9 is ~2x slower for <1% smaller files
+    return open(path, 'w', encoding='utf-8', newline='')
+
+# =====================================================
+# CHUNK SOURCES
+# =====================================================
+
+def pandas_chunks(df, batch_rows):
+    """Row slices of an in-memory pandas frame"""
+    for start in range(0, len(df), batch_rows):
+        yield df.iloc[start:start + batch_rows]
+
+
+def parquet_chunks(directory, batch_rows, columns=None):
+    """Stream the part files of a Parquet table directory (partitioned or not) as pandas batches
+
+    With `columns`, only those columns are read from the files.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Partition columns only exist in directory names, so partitioned tables stream their original columns
+    for path in part_files(directory):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            yield frame_from_storage(pa.Table.from_batches([batch]))
+
+# =====================================================
+# TABLE WRITERS
+# =====================================================
+
+def _write_chunks(chunks, directory, rows_per_file, compression):
+    """Write formatted chunks into rolling part files, returning the manifest file entries"""
+    # Overwrite like the Spark writer: parts of a larger earlier export must not be globbed back in
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+    suffix = '.csv.gz' if compression == 'gzip' else '.csv'
+    files = []
+    handle = None
+
+    for chunk in chunks:
+        chunk = _format_integers(_format_dates(chunk))
+        start = 0
+        while start < len(chunk):
+            # Roll over to a new part file once the current one is full
+            if handle is None or files[-1]['rows'] >= rows_per_file:
+                if handle is not None:
+                    handle.close()
+                path = os.path.join(directory, f"part-{len(files):05d}{suffix}")
+                handle = _open_part(path, compression)
+                files.append({'path': path, 'rows': 0})
+                header = True
+            take = min(rows_per_file - files[-1]['rows'], len(chunk) - start)
+            chunk.iloc[start:start + take].to_csv(handle, header=header, index=False, lineterminator='\n')
+            files[-1]['rows'] += take
+            header = False
+            start += take
+
+    if handle is not None:
+        handle.close()
+    for entry in files:
+        entry['bytes'] = os.path.getsize(entry['path'])
+    return files
+
+
+def _write_spark_table(df, directory, rows_per_file, compression):
+    """Executor-side CSV write; the driver only lists the part files afterwards"""
+    from pyspark.sql.functions import col, date_format, input_file_name
+
+    for column in df.columns:
+        if 'date' in column.lower():
+            df = df.withColumn(column, date_format(col(column), 'yyyy-MM-dd'))
+
+    (df.write.mode("overwrite")
+     .option("header", True)
+     .option("escape", '"')  # RFC 4180 quoting, as BULK INSERT FORMAT='CSV' expects
+     .option("compression", compression or "none")
+     .option("maxRecordsPerFile", rows_per_file)
+     .csv(directory))
+
+    # Per-file row counts are computed by the executors from the written files, keyed
+    # by file name because input_file_name() and listStatus() spell URIs differently
+    spark = df.sparkSession
+    rows = {row['file'].rsplit('/', 1)[-1]: row['count'] for row in
+            spark.read.option("header", True).csv(directory)
+            .groupBy(input_file_name().alias("file")).count().collect()}
+
+    path = spark._jvm.org.apache.hadoop.fs.Path(directory)
+    fs = path.getFileSystem(spark._jsc.hadoopConfiguration())
+    files = []
+    for status in sorted(fs.listStatus(path), key=lambda s: s.getPath().getName()):
+        name = status.getPath().getName()
+        if name.startswith('part-'):
+            files.append({'path': status.getPath().toString(), 'rows': rows.get(name, 0), 'bytes': status.getLen()})
+    return files
+
+
+def export_table(source, output_path, table_name, rows_per_file=1000000, batch_rows=100000, compression=None):
+    """Export one table as CSV part files under output_path/table_name"""
+
+    directory = os.path.join(output_path, table_name)
+    # BULK INSERT FORMAT='CSV' maps fields by position, so parts carry exactly the target table's
+    # columns, not the helper columns the generators add (as in bcp_export.export_native_table)
+    columns = column_names(TABLE_SCHEMAS[table_name]) if table_name in TABLE_SCHEMAS else None
+    if hasattr(source, 'sparkSession'):
+        files = _write_spark_table(source.select(*columns) if columns else source, directory, rows_per_file,
+                                   compression)
+    elif isinstance(source, str):
+        files = _write_chunks(parquet_chunks(source, batch_rows, columns), directory, rows_per_file, compression)
+    else:
+        files = _write_chunks(pandas_chunks(source[columns] if columns else source, batch_rows), directory,
+                              rows_per_file, compression)
+
+    return {
+        'target_table': TABLE_SCHEMAS.get(table_name, {}).get('target_table', f"{TARGET_TABLE_PREFIX}{table_name}"),
+        'rows': sum(entry['rows'] for entry in files),
+        'files': files
+    }
+
+# =====================================================
+# MANIFEST AND BULK INSERT SCRIPT
+# =====================================================
+
+def bulk_insert_script(manifest, data_root=None):
+    """T-SQL BULK INSERT statements for every part file in the manifest
+
+    `data_root` replaces the export directory in file paths, for when SQL
+    Server sees the files under a different path (a share or mounted volume).
+    """
+
+    lines = [
+        "-- EduFin bulk load generated from manifest.json",
+        f"-- {sum(table['rows'] for table in manifest['tables'].values()):,} rows in "
+        f"{sum(len(table['files']) for table in manifest['tables'].values())} part files",
+    ]
+    if manifest['compression'] == 'gzip':
+        lines.append("-- Part files are gzip-compressed: decompress them first, BULK INSERT reads plain text only")
+
+    for table_name, table in manifest['tables'].items():
+        lines.append("")
+        lines.append(f"-- {table['target_table']}: {table['rows']:,} rows")
+        for entry in table['files']:
+            path = entry['path']
+            if data_root is not None:
+                path = f"{data_root.rstrip('/')}/{table_name}/{path.rsplit('/', 1)[-1]}"
+            if manifest['compression'] == 'gzip' and path.endswith('.gz'):
+                path = path[:-3]
+            lines.append(f"BULK INSERT {table['target_table']} FROM '{path}'")
+            lines.append("WITH (FORMAT = 'CSV', FIRSTROW = 2, FIELDTERMINATOR = ',', ROWTERMINATOR = '0x0a', "
+                         "CODEPAGE = '65001', TABLOCK);")
+    return "\n".join(lines) + "\n"
+
+
+def export_datasets(datasets, output_path="/tmp/edufin_csv", rows_per_file=1000000, batch_rows=100000,
+                    compression=None, data_root=None):
+    """Stream every table to CSV parts, then write manifest.json and bulk_insert.sql"""
+
+    manifest = {'output_path': output_path, 'format': 'csv', 'date_format': '%Y-%m-%d',
+                'compression': compression, 'tables': {}}
+    for table_name, source in datasets.items():
+        table = export_table(source, output_path, table_name, rows_per_file, batch_rows, compression)
+        manifest['tables'][table_name] = table
+        print(f"   Exported {table_name}: {table['rows']:,} rows in {len(table['files'])} part files")
+
+    os.makedirs(output_path, exist_ok=True)
+    with open(os.path.join(output_path, 'manifest.json'), 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    with open(os.path.join(output_path, 'bulk_insert.sql'), 'w') as handle:
+        handle.write(bulk_insert_script(manifest, data_root))
+    return manifest
@@ -0,0 +1,241 @@
+# =====================================================
+# EduFin Credit Solutions - Referentially Consistent Subsets
+# Hash-sampled customers plus everything that hangs off them
+# =====================================================
+
+# Builds small FK-consistent samples (1k, 10k, 100k customers) from a full
+# generated dataset, for fast tests and demos:
+#   customers     the `customers` ids with the smallest keyed hash (bottom-k),
+#                 so samples are reproducible and a 1k sample is contained in
+#                 the 10k one
+#   loans         every loan of a sampled customer
+#   payments      every payment of a kept loan
+#   defaults      every default record of a kept loan
+#   institutions  every institution a kept loan references
+# Each table is streamed once, in that order. Kept keys are held in
+# referential_integrity KeyBitmaps, so membership is two array lookups per
+# batch and no full table is joined or loaded. Sources are the layouts
+# referential_integrity reads (Parquet output, CSV exports, data/ samples).
+#
+#     python subset_extractor.py /tmp/edufin_data /tmp/edufin_sample_1k --customers 1000
+#     python subset_extractor.py /tmp/edufin_data data_10k --customers 10000 --format csv
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from deterministic_rng import random_bits
+from edufin_config import EduFinDataConfig
+from referential_integrity import KeyBitmap, check_integrity, print_report, table_files
+from table_schemas import (TABLE_DIRECTORIES, TABLE_SCHEMAS, column_names, column_types, frame_from_storage,
+                           write_parquet_frame)
+
+# Streaming order: every table's filter key is known before the table is read
+SUBSET_ORDER = ['customers', 'loans', 'payments', 'defaults', 'institutions']
+
+# table -> (key column, kept key set it is filtered on)
+SUBSET_FILTERS = {
+    'loans': ('customer_id', 'customers'),
+    'payments': ('loan_id', 'loans'),
+    'defaults': ('loan_id', 'loans'),
+    'institutions': ('institution_id', 'referenced_institutions')
+}
+
+# CSV output follows the data/sample_*.csv conventions
+CSV_DATE_FORMAT = '%d/%m/%Y'
+
+# =====================================================
+# STREAMING SOURCES
+# =====================================================
+
+def filtered_batches(files, key, keep, batch_rows=500000):
+    """Stream a table, yielding only the rows whose `key` passes keep(int64 keys) as pandas frames
+
+    Parquet rows are filtered on the Arrow batch, so rows that are dropped are
+    never converted to pandas.
+    """
+    for path in files:
+        if path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+                keys = batch.column(key).to_numpy(zero_copy_only=False).astype(np.float64)
+                mask = keep(keys)
+                if mask.any():
+                    yield len(keys), frame_from_storage(pa.Table.from_batches([batch]).filter(pa.array(mask)))
+                else:
+                    yield len(keys), None
+        else:
+            # CSV values stay text (dates keep their format), only the key is parsed
+            for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[''], chunksize=batch_rows):
+                keys = pd.to_numeric(chunk[key], errors='coerce').to_numpy(dtype=np.float64)
+                mask = keep(keys)
+                yield len(keys), chunk[mask] if mask.any() else None
+
+
+def _member(bitmap):
+    """keep() function testing (non-null) keys against a KeyBitmap"""
+    def keep(keys):
+        mask = ~np.isnan(keys)
+        mask[mask] = bitmap.contains(keys[mask].astype(np.int64))
+        return mask
+    return keep
+
+# =====================================================
+# TABLE WRITERS
+# =====================================================
+
+class SubsetWriter:
+    """Buffers the kept rows of one table and writes them as Parquet parts or one CSV file"""
+
+    def __init__(self, output_path, table, output_format='parquet', rows_per_file=1000000):
+        self.table = table
+        self.output_format = output_format
+        self.rows_per_file = rows_per_file
+        self.frames = []
+        self.buffered = 0
+        self.rows = 0
+        self.parts = 0
+        if output_format == 'csv':
+            self.path = os.path.join(output_path, f"sample_{table}.csv")
+            os.makedirs(output_path, exist_ok=True)
+        else:
+            self.path = os.path.join(output_path, TABLE_DIRECTORIES[table])
+            os.makedirs(self.path, exist_ok=True)
+
+    def append(self, frame):
+        self.frames.append(frame)
+        self.buffered += len(frame)
+        if self.buffered >= self.rows_per_file:
+            self.flush()
+
+    def _csv_frame(self, frame):
+        """Exported columns only, dates as dd/mm/yyyy and integers without a trailing .0, like data/sample_*.csv"""
+        frame = frame[[column for column in column_names(TABLE_SCHEMAS[self.table]) if column in frame.columns]]
+        types = column_types()
+        formatted = {}
+        for column in frame.columns:
+            sql_type = types.get(column, '')
+            if sql_type == 'DATE' and frame[column].dtype.kind == 'M':
+                formatted[column] = frame[column].dt.strftime(CSV_DATE_FORMAT)
+            elif sql_type.endswith('INT') and frame[column].dtype.kind == 'f':
+                formatted[column] = frame[column].astype('Int64')
+        return frame.assign(**formatted) if formatted else frame
+
+    def flush(self):
+        if not self.frames:
+            return
+        frame = pd.concat(self.frames, ignore_index=True)
+        if self.output_format == 'csv':
+            self._csv_frame(frame).to_csv(self.path, mode='w' if self.rows == 0 else 'a', header=self.rows == 0,
+                                          index=False, lineterminator='\n')
+        else:
+            write_parquet_frame(frame, os.path.join(self.path, f"part-{self.parts:05d}.parquet"))
+        self.parts += 1
+        self.rows += len(frame)
+        self.frames, self.buffered = [], 0
+
+    def close(self):
+        self.flush()
+        if self.rows == 0 and self.output_format == 'csv':
+            # Keep the table present (header only) so readers see an empty table, not a missing one
+            pd.DataFrame(columns=column_names(TABLE_SCHEMAS[self.table])).to_csv(self.path, index=False)
+
+# =====================================================
+# SUBSET EXTRACTION
+# =====================================================
+
+def sample_customers(files, customers, seed, writer, batch_rows=500000):
+    """Bottom-k hash sample of the customers table in one pass; returns (bitmap, rows scanned)
+
+    Only the current best `customers` rows are kept between batches.
+    """
+    kept, scanned = None, 0
+    threshold = [np.iinfo(np.uint64).max]
+
+    def keep(keys):
+        # Rows ranked above the current k-th smallest hash can never make the sample
+        mask = ~np.isnan(keys)
+        mask[mask] = random_bits(seed, 'subset_customers', keys[mask].astype(np.int64)) <= threshold[0]
+        return mask
+
+    for rows, batch in filtered_batches(files, 'customer_id', keep, batch_rows):
+        scanned += rows
+        if batch is None:
+            continue
+        ranks = random_bits(seed, 'subset_customers', pd.to_numeric(batch['customer_id']).to_numpy(np.int64))
+        batch = batch.assign(_rank=ranks)
+        kept = batch if kept is None else pd.concat([kept, batch], ignore_index=True)
+        if len(kept) >= customers:
+            kept = kept.nsmallest(customers, '_rank')
+            threshold[0] = kept['_rank'].max()
+
+    if kept is None:
+        return KeyBitmap(), scanned
+    kept = kept.assign(_id=pd.to_numeric(kept['customer_id'])).sort_values('_id')
+    writer.append(kept.drop(columns=['_rank', '_id']).reset_index(drop=True))
+    return KeyBitmap.from_keys(kept['_id'].to_numpy(np.int64)), scanned
+
+
+def extract_subset(source, output_path, customers=1000, seed=None, output_format='parquet', batch_rows=500000):
+    """Write an FK-consistent subset of the dataset at `source` with `customers` sampled customers"""
+
+    seed = EduFinDataConfig.SEED if seed is None else seed
+    print(f"Extracting a {customers:,} customer subset of {source} into {output_path}...")
+    started = time.perf_counter()
+    kept = {}
+    summary = {}
+
+    for table in SUBSET_ORDER:
+        table_started = time.perf_counter()
+        files = table_files(source, table)
+        if not files:
+            raise FileNotFoundError(f"No {table} table found under {source}")
+        writer = SubsetWriter(output_path, table, output_format)
+
+        if table == 'customers':
+            kept['customers'], scanned = sample_customers(files, customers, seed, writer, batch_rows)
+        else:
+            key, parent = SUBSET_FILTERS[table]
+            scanned = 0
+            if table == 'loans':
+                kept['loans'], kept['referenced_institutions'] = KeyBitmap(), KeyBitmap()
+            for rows, batch in filtered_batches(files, key, _member(kept[parent]), batch_rows):
+                scanned += rows
+                if batch is None:
+                    continue
+                if table == 'loans':
+                    # The loans pass also collects the parents and children of the kept loans
+                    kept['loans'].add(pd.to_numeric(batch['loan_id']).to_numpy(np.int64))
+                    institution_ids = pd.to_numeric(batch['institution_id']).dropna()
+                    kept['referenced_institutions'].add(institution_ids.to_numpy(np.int64))
+                writer.append(batch)
+
+        writer.close()
+        summary[table] = {'scanned': scanned, 'rows': writer.rows}
+        print(f"   {table:<13} {writer.rows:>10,} of {scanned:>12,} rows ({time.perf_counter() - table_started:.1f}s)")
+
+    print(f"   Subset written in {time.perf_counter() - started:.1f}s")
+    return summary
+
+# =====================================================
+# COMMAND LINE
+# =====================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extract an FK-consistent customer sample of an EduFin dataset")
+    parser.add_argument("source", help="Parquet output, CSV export or sample directory")
+    parser.add_argument("output_path")
+    parser.add_argument("--customers", type=int, default=1000, help="customers to sample")
+    parser.add_argument("--seed", type=int, default=None, help="sampling seed (default: the config SEED)")
+    parser.add_argument("--format", choices=['parquet', 'csv'], default='parquet',
+                        help="parquet table directories, or sample_<table>.csv files like data/")
+    parser.add_argument("--batch-rows", type=int, default=500000)
+    args = parser.parse_args()
+
+    extract_subset(args.source, args.output_path, args.customers, args.seed, args.format, args.batch_rows)
+    print_report(check_integrity(args.output_path))
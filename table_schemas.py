@@ -0,0 +1,390 @@
+# =====================================================
+# EduFin Credit Solutions - Table Schema Registry
+# SQL Server column types and clustered keys of every table
+# =====================================================
+
+# The generated tables are loaded into the sample_* tables queried by
+# EduFin_SQL_V3.sql, with the columns of the data/sample_*.csv extracts.
+# Reference tables (geographic_demographics, economic_indicators) are read
+# from the CREATE TABLE statements in EduFin_Table_SQL_V3.sql so the two
+# never drift apart. The same types are the compact storage types of the
+# generated frames and Parquet files (see COMPACT STORAGE TYPES).
+
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from amortization_engine import PAYMENT_STATUSES
+
+# =====================================================
+# OUTPUT DIRECTORIES
+# =====================================================
+
+# Output directory of each generated table
+TABLE_DIRECTORIES = {
+    'institutions': 'institutions',
+    'customers': 'customers',
+    'loans': 'loans',
+    'payments': 'payments',
+    'defaults': 'defaults_collections'
+}
+
+# Optional summary tables (generate_market_rollups), written next to the generated tables
+SUMMARY_DIRECTORIES = {
+    'market_rollups': 'market_rollups',
+    'market_customer_rollups': 'market_customer_rollups'
+}
+OUTPUT_DIRECTORIES = dict(TABLE_DIRECTORIES, **SUMMARY_DIRECTORIES)
+
+# Monthly partitions of incremental_generation, only valid for the base snapshot
+# they were rolled forward from: writing a new base removes them
+INCREMENTS_DIRECTORY = 'increments'
+
+# =====================================================
+# GENERATED TABLES
+# =====================================================
+
+TABLE_SCHEMAS = {
+    'institutions': {
+        'target_table': 'sample_institutions',
+        'clustered_key': 'institution_id',
+        'columns': [
+            ('institution_id', 'INT'),
+            ('institution_name', 'NVARCHAR(200)'),
+            ('institution_code', 'VARCHAR(20)'),
+            ('institution_type', 'VARCHAR(50)'),
+            ('city', 'VARCHAR(100)'),
+            ('state', 'VARCHAR(100)'),
+            ('tier_classification', 'VARCHAR(10)'),
+            ('establishment_year', 'SMALLINT'),
+            ('nirf_ranking', 'SMALLINT'),
+            ('placement_percentage', 'FLOAT'),
+            ('average_package', 'INT'),
+            ('partnership_start_date', 'DATE'),
+            ('partnership_status', 'VARCHAR(20)'),
+            ('default_rate_percentage', 'FLOAT'),
+            ('contact_person_name', 'NVARCHAR(200)'),
+            ('contact_email', 'VARCHAR(200)'),
+            ('contact_phone', 'VARCHAR(30)')
+        ]
+    },
+    'customers': {
+        'target_table': 'sample_customers',
+        'clustered_key': 'customer_id',
+        'columns': [
+            ('customer_id', 'INT'),
+            ('application_number', 'VARCHAR(20)'),
+            ('full_name', 'NVARCHAR(200)'),
+            ('date_of_birth', 'DATE'),
+            ('gender', 'VARCHAR(1)'),
+            ('mobile_number', 'VARCHAR(15)'),
+            ('email', 'VARCHAR(200)'),
+            ('pan_number', 'VARCHAR(10)'),
+            ('aadhar_number', 'VARCHAR(12)'),
+            ('current_city', 'VARCHAR(100)'),
+            ('current_state', 'VARCHAR(100)'),
+            ('employment_type', 'VARCHAR(50)'),
+            ('customer_profile', 'VARCHAR(20)'),
+            ('registration_date', 'DATE'),
+            ('kyc_status', 'VARCHAR(20)'),
+            ('annual_income', 'DECIMAL(15,2)'),
+            ('cibil_score', 'SMALLINT')
+        ]
+    },
+    'loans': {
+        'target_table': 'sample_loans',
+        'clustered_key': 'loan_id',
+        'columns': [
+            ('loan_id', 'INT'),
+            ('loan_application_number', 'VARCHAR(20)'),
+            ('customer_id', 'INT'),
+            ('requested_amount', 'DECIMAL(15,2)'),
+            ('base_interest_rate', 'DECIMAL(6,3)'),
+            ('application_date', 'DATE'),
+            ('institution_id', 'INT'),
+            ('loan_purpose', 'VARCHAR(50)'),
+            ('course_duration_months', 'TINYINT'),
+            ('customer_profile', 'VARCHAR(20)'),
+            ('cibil_score', 'SMALLINT'),
+            ('annual_income', 'DECIMAL(15,2)'),
+            ('current_city', 'VARCHAR(100)'),
+            ('loan_status', 'VARCHAR(20)'),
+            ('sanctioned_amount', 'DECIMAL(15,2)'),
+            ('loan_amount', 'DECIMAL(15,2)'),
+            ('risk_category', 'VARCHAR(20)'),
+            ('loan_term_months', 'TINYINT'),
+            ('monthly_interest_rate', 'FLOAT'),
+            ('emi_amount', 'DECIMAL(15,2)'),
+            ('disbursement_date', 'DATE'),
+            ('months_since_disbursement', 'FLOAT'),
+            ('current_loan_status', 'VARCHAR(20)')
+        ]
+    },
+    'payments': {
+        'target_table': 'sample_payments',
+        'clustered_key': 'payment_id',
+        'columns': [
+            ('payment_id', 'BIGINT'),
+            ('loan_id', 'INT'),
+            ('payment_date', 'DATE'),
+            ('due_date', 'DATE'),
+            ('payment_amount', 'DECIMAL(15,2)'),
+            ('principal_amount', 'DECIMAL(15,2)'),
+            ('interest_amount', 'DECIMAL(15,2)'),
+            ('penalty_amount', 'INT'),
+            ('days_early_late', 'SMALLINT'),
+            ('payment_sequence_number', 'TINYINT'),
+            ('total_outstanding_principal', 'DECIMAL(15,2)'),
+            ('payment_method', 'VARCHAR(20)'),
+            ('payment_status', 'VARCHAR(20)'),
+            ('transaction_reference', 'VARCHAR(20)')
+        ]
+    },
+    'defaults': {
+        'target_table': 'sample_defaults',
+        'clustered_key': 'loan_id',
+        'columns': [
+            ('loan_id', 'INT'),
+            ('last_payment_date', 'DATE'),
+            ('last_payment_sequence', 'TINYINT'),
+            ('total_paid', 'DECIMAL(15,2)'),
+            ('default_date', 'DATE'),
+            ('dpd_days', 'SMALLINT'),
+            ('default_bucket', 'VARCHAR(20)'),
+            ('default_amount', 'DECIMAL(15,2)'),
+            ('primary_default_reason', 'VARCHAR(50)'),
+            ('collection_stage', 'VARCHAR(30)'),
+            ('recovery_percentage', 'FLOAT'),
+            ('total_recovered_amount', 'DECIMAL(15,2)')
+        ]
+    },
+    # Optional summaries for the market expansion analysis (generate_market_rollups):
+    # loans per city and disbursement year (NULL year: customers without loans), and
+    # customers per city and set of loan disbursement years (bit year - 2000, bit 0 = none)
+    'market_rollups': {
+        'target_table': 'market_rollups',
+        'clustered_key': None,
+        'columns': [
+            ('current_city', 'VARCHAR(100)'),
+            ('current_state', 'VARCHAR(100)'),
+            ('disbursement_year', 'SMALLINT'),
+            ('loans', 'INT'),
+            ('customers_without_loans', 'INT'),
+            ('portfolio_value', 'DECIMAL(18,2)'),
+            ('defaulted_loans', 'INT'),
+            ('currently_defaulted_loans', 'INT'),
+            ('processing_days', 'BIGINT'),
+            ('processed_loans', 'INT')
+        ]
+    },
+    'market_customer_rollups': {
+        'target_table': 'market_customer_rollups',
+        'clustered_key': None,
+        'columns': [
+            ('current_city', 'VARCHAR(100)'),
+            ('current_state', 'VARCHAR(100)'),
+            ('loan_years', 'BIGINT'),
+            ('customers', 'INT')
+        ]
+    }
+}
+
+# =====================================================
+# REFERENCE TABLES FROM EduFin_Table_SQL_V3.sql
+# =====================================================
+
+REFERENCE_DDL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'EduFin_Table_SQL_V3.sql')
+
+_CREATE_TABLE = re.compile(r'CREATE\s+TABLE\s+(\w+)\s*\((.*?)\);', re.IGNORECASE | re.DOTALL)
+_COLUMN = re.compile(r'^\s*(\w+)\s+(\w+(?:\s*\([\d\s,]+\))?)', re.IGNORECASE)
+
+
+def _split_columns(body):
+    """Split a CREATE TABLE body on top-level commas (not those inside DECIMAL(p, s))"""
+    parts, depth, start = [], 0, 0
+    for position, char in enumerate(body):
+        depth += {'(': 1, ')': -1}.get(char, 0)
+        if char == ',' and depth == 0:
+            parts.append(body[start:position])
+            start = position + 1
+    parts.append(body[start:])
+    return parts
+
+
+def parse_create_tables(sql_text):
+    """Schemas of every CREATE TABLE statement in a T-SQL script"""
+    schemas = {}
+    for table, body in _CREATE_TABLE.findall(sql_text):
+        columns = []
+        for line in _split_columns(body):
+            match = _COLUMN.match(line)
+            if match and match.group(1).upper() not in ('PRIMARY', 'CONSTRAINT', 'FOREIGN', 'INDEX'):
+                columns.append((match.group(1), re.sub(r'\s+', '', match.group(2)).upper()))
+        schemas[table] = {'target_table': table, 'clustered_key': None, 'columns': columns}
+    return schemas
+
+
+def reference_schemas(path=REFERENCE_DDL_PATH):
+    with open(path, encoding='utf-8') as handle:
+        return parse_create_tables(handle.read())
+
+
+def column_names(schema):
+    return [name for name, _ in schema['columns']]
+
+# =====================================================
+# COMPACT STORAGE TYPES
+# =====================================================
+
+# The SQL types above are also the storage types of the generated frames and
+# Parquet files. A column name has the same type in every table holding it
+# (loans and defaults repeat the customer and loan columns):
+#   TINYINT / SMALLINT / INT  int8 / int16 / int32 (integer columns with NULLs stay as generated)
+#   DATE                      datetime64[s] in pandas, DATE (int32 days) in Parquet
+#   DECIMAL(p,s)              float64 rounded to s places in pandas, DECIMAL(p,s) in Parquet
+#   categorical VARCHARs      pandas categoricals over the values fixed by the config
+#                             (int8 codes), dictionary-encoded in Parquet
+#   other VARCHARs            pandas' Arrow-backed str, never Python object strings
+
+# Labels assigned by the generators rather than drawn from config distributions
+LOAN_STATUSES = ['Approved', 'Rejected']
+CURRENT_LOAN_STATUSES = ['Sanctioned', 'Active', 'Closed', 'Defaulted']
+DEFAULT_BUCKETS = ['0-30 DPD', '31-60 DPD', '61-90 DPD', '91-180 DPD', '180+ DPD']
+COLLECTION_STAGES = ['Early Collection', 'Primary Collection', 'Secondary Collection', 'Legal Action']
+TIMING_DEFAULT_REASONS = ['Job Loss', 'Income Reduction', 'Course Dropout']
+
+_INTEGER_DTYPES = {'TINYINT': 'int8', 'SMALLINT': 'int16', 'INT': 'int32', 'BIGINT': 'int64'}
+_DECIMAL = re.compile(r'DECIMAL\((\d+),(\d+)\)')
+
+
+def column_types():
+    """{column: SQL type} over every generated table"""
+    types = {}
+    for schema in TABLE_SCHEMAS.values():
+        types.update(schema['columns'])
+    return types
+
+
+def category_values(config):
+    """{column: allowed values} of the columns stored as categoricals"""
+    states = list(dict.fromkeys(info['state'] for info in config.CITY_DISTRIBUTION.values()))
+    return {
+        'institution_type': list(config.INSTITUTION_TYPES),
+        'state': states,
+        'tier_classification': list(dict.fromkeys(info['tier'] for info in config.CITY_DISTRIBUTION.values())),
+        'partnership_status': list(config.PARTNERSHIP_STATUSES),
+        'gender': list(config.GENDER_DISTRIBUTION),
+        'current_city': list(config.CITY_DISTRIBUTION),
+        'current_state': states,
+        'employment_type': list(config.EMPLOYMENT_TYPES),
+        'customer_profile': list(config.CUSTOMER_PROFILES),
+        'kyc_status': list(config.KYC_STATUSES),
+        'loan_purpose': list(config.LOAN_PURPOSES),
+        'loan_status': LOAN_STATUSES,
+        'risk_category': list(dict.fromkeys(info['risk_category'] for info in config.CUSTOMER_PROFILES.values())),
+        'current_loan_status': CURRENT_LOAN_STATUSES,
+        'payment_method': list(config.PAYMENT_RULES['payment_methods']),
+        'payment_status': PAYMENT_STATUSES,
+        'default_bucket': DEFAULT_BUCKETS,
+        'primary_default_reason': TIMING_DEFAULT_REASONS + list(config.DEFAULT_REASONS),
+        'collection_stage': COLLECTION_STAGES
+    }
+
+
+def compact_frame(df, config):
+    """Cast the known columns of a generated pandas frame to their compact types
+
+    Raises ValueError if a categorical column holds a value the config does not define.
+    """
+    types = column_types()
+    categories = category_values(config)
+    casts = {}
+    for column in df.columns:
+        sql_type = types.get(column)
+        values = df[column]
+        if column in categories:
+            compact = values.astype(pd.CategoricalDtype(categories[column]))
+            unknown = values.notna() & compact.isna()
+            if unknown.any():
+                raise ValueError(f"{column} values outside the configured categories: "
+                                 f"{sorted(set(values[unknown]))[:5]}")
+            casts[column] = compact
+        elif sql_type in _INTEGER_DTYPES and not values.isna().any():
+            casts[column] = values.astype(_INTEGER_DTYPES[sql_type])
+        elif sql_type == 'DATE':
+            casts[column] = pd.to_datetime(values).astype('datetime64[s]')
+        elif sql_type is not None and _DECIMAL.match(sql_type):
+            casts[column] = values.astype(float).round(int(_DECIMAL.match(sql_type).group(2)))
+        elif sql_type is not None and 'CHAR' in sql_type and values.dtype == object:
+            casts[column] = values.astype('str')
+    return df.assign(**casts)
+
+# =====================================================
+# ARROW / PARQUET STORAGE
+# =====================================================
+
+def _arrow_type(sql_type):
+    import pyarrow as pa
+
+    if sql_type in _INTEGER_DTYPES:
+        return pa.from_numpy_dtype(_INTEGER_DTYPES[sql_type])
+    if sql_type == 'DATE':
+        return pa.date32()
+    decimal = _DECIMAL.match(sql_type or '')
+    if decimal:
+        return pa.decimal128(int(decimal.group(1)), int(decimal.group(2)))
+    return None
+
+
+def storage_table(df):
+    """Arrow table of a pandas frame with DATE, DECIMAL and narrow integer columns as stored"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    types = column_types()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for position, field in enumerate(table.schema):
+        arrow_type = _arrow_type(types.get(field.name))
+        if arrow_type is None or field.type == arrow_type:
+            continue
+        column = table.column(position)
+        if pa.types.is_decimal(arrow_type):
+            column = pc.round(column.cast(pa.float64()), arrow_type.scale)
+        table = table.set_column(position, pa.field(field.name, arrow_type), column.cast(arrow_type))
+    return table
+
+
+def frame_from_storage(table):
+    """pandas frame of a stored Arrow table: DATE as datetime64[s], DECIMAL as float64"""
+    import pyarrow as pa
+
+    for position, field in enumerate(table.schema):
+        if pa.types.is_date(field.type):
+            table = table.set_column(position, pa.field(field.name, pa.timestamp('s')),
+                                     table.column(position).cast(pa.timestamp('s')))
+        elif pa.types.is_decimal(field.type):
+            # Arrow's decimal -> double cast (and pc.round) can miss the nearest double:
+            # 3776.24 would come back as 3776.2400000000002
+            values = np.round(table.column(position).cast(pa.float64()).to_numpy(), field.type.scale)
+            table = table.set_column(position, pa.field(field.name, pa.float64()), pa.array(values, from_pandas=True))
+    return table.to_pandas()
+
+
+def write_parquet_frame(df, path, compression='snappy'):
+    """Write a pandas frame as one Parquet file in the compact storage types"""
+    import pyarrow.parquet as pq
+
+    pq.write_table(storage_table(df), path, compression=compression, store_decimal_as_integer=True)
+
+
+def read_parquet_frame(paths):
+    """Read Parquet files or directories back into one pandas frame, in the given order"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    paths = [paths] if isinstance(paths, str) else list(paths)
+    tables = [pq.read_table(path) for path in paths]
+    # Categorical dictionaries of different files are unified when converting to pandas
+    return frame_from_storage(pa.concat_tables(tables, promote_options='permissive'))
@@ -0,0 +1,203 @@
+# =====================================================
+# EduFin Credit Solutions - Amortization Engine Parity Tests
+# The vectorized engine against a loop-per-payment reference
+# =====================================================
+
+# reference_schedule() is the original iterrows loop of generate_payments,
+# one loan and one installment at a time, reading its random numbers from the
+# same keyed draws as the engine (draw k of payment_id under stream 'payments').
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import local_backend
+from amortization_engine import PAYMENT_COLUMNS, PAYMENT_ID_STRIDE, build_payment_schedules
+from deterministic_rng import uniform, weighted_sampler
+from edufin_config import EduFinDataConfig
+
+LOANS = 400
+
+
+@pytest.fixture(scope="module")
+def config():
+    return EduFinDataConfig(scale_factor=0.01)
+
+
+@pytest.fixture(scope="module")
+def loans(config):
+    return local_backend.generate_loans(config, loan_ids=np.arange(1, LOANS + 1))
+
+
+def _draw(seed, payment_id, draw):
+    return float(uniform(seed, 'payments', np.array([payment_id], dtype=np.int64), draw)[0])
+
+
+def reference_schedule(loan, config, as_of, start_month=0, outstanding=None):
+    """Payment rows of one loan, installment by installment, like the original loop"""
+    rules = config.PAYMENT_RULES
+    seed = config.SEED
+    profile = config.CUSTOMER_PROFILES.get(loan['customer_profile'], config.CUSTOMER_PROFILES['poor'])
+    methods = weighted_sampler(list(rules['payment_methods']), list(rules['payment_methods'].values()))
+
+    disbursed = np.datetime64(pd.Timestamp(loan['disbursement_date']).date(), 'D')
+    elapsed_days = int((as_of - disbursed).astype(np.int64))
+    # int() truncates towards zero, like the original int(days / 30)
+    months_to_generate = min(int(elapsed_days / rules['days_between_installments']), int(loan['loan_term_months']))
+    if loan['current_loan_status'] == 'Defaulted':
+        stop_range = max(1, months_to_generate // 2)
+        u = float(uniform(seed, 'payment_stop', np.array([loan['loan_id']], dtype=np.int64))[0])
+        months_to_generate = 1 + math.floor(u * stop_range)
+
+    outstanding = np.round(float(loan['loan_amount']), 2) if outstanding is None else outstanding
+    if start_month > 0 and outstanding <= rules['closure_threshold']:
+        return []
+    monthly_rate = float(loan['base_interest_rate']) / 100 / 12
+    emi = float(loan['emi_amount'])
+    due = disbursed + rules['first_installment_after_days'] + start_month * rules['days_between_installments']
+
+    rows = []
+    for month in range(start_month, months_to_generate):
+        if outstanding <= 0:
+            break
+        payment_id = int(loan['loan_id']) * PAYMENT_ID_STRIDE + month + 1
+        draws = [_draw(seed, payment_id, draw) for draw in range(8)]
+
+        failed = False
+        payment = emi
+        if draws[0] < profile['on_time_probability']:
+            days_late = 0
+        else:
+            days_late = 1 + math.floor(draws[1] * profile['max_payment_delay'])
+            if days_late > rules['failure_after_days'] and draws[2] < rules['failure_probability']:
+                failed = True
+            elif days_late > rules['partial_after_days'] and draws[3] < rules['partial_probability']:
+                low, high = rules['partial_fraction_range']
+                payment = emi * (low + draws[4] * (high - low))
+
+        payment = np.round(payment, 2)
+        interest = np.round(outstanding * monthly_rate, 2)
+        if failed:
+            payment = interest = principal = 0.0
+        else:
+            principal = min(payment - interest, outstanding)
+            outstanding = np.round(outstanding - principal, 2)
+
+        # Seasonal delay, counted in the penalty as well
+        if pd.Timestamp(due).month in rules['seasonal_delay_months'] and \
+                draws[5] < rules['seasonal_delay_probability']:
+            low, high = rules['seasonal_delay_days']
+            days_late += low + math.floor(draws[6] * (high - low + 1))
+
+        rows.append({
+            'payment_id': payment_id,
+            'loan_id': int(loan['loan_id']),
+            'payment_date': (due + days_late).astype('datetime64[s]'),
+            'due_date': due.astype('datetime64[s]'),
+            'payment_amount': np.round(payment, 2),
+            'principal_amount': np.round(principal, 2),
+            'interest_amount': np.round(interest, 2),
+            'penalty_amount': max(0, days_late * rules['penalty_per_day']),
+            'days_early_late': days_late,
+            'payment_sequence_number': month + 1,
+            'total_outstanding_principal': np.round(outstanding, 2),
+            'payment_method': methods.choice(np.array([draws[7]]))[0],
+            'payment_status': 'Failed' if failed else 'Successful',
+            'transaction_reference': f"TXN{payment_id:010d}"
+        })
+
+        due = due + rules['days_between_installments']
+        if outstanding <= rules['closure_threshold']:
+            break
+    return rows
+
+
+def reference_payments(loans, config, as_of, resume=None):
+    resume = {} if resume is None else {row.loan_id: row for row in resume.itertuples(index=False)}
+    rows = []
+    for _, loan in loans.iterrows():
+        if loan['current_loan_status'] not in ('Active', 'Closed', 'Defaulted') or pd.isna(loan['disbursement_date']):
+            continue
+        state = resume.get(loan['loan_id'])
+        if state is None:
+            rows += reference_schedule(loan, config, as_of)
+        else:
+            rows += reference_schedule(loan, config, as_of, state.payment_sequence_number,
+                                       state.total_outstanding_principal)
+    return pd.DataFrame(rows, columns=PAYMENT_COLUMNS)
+
+
+def _normalized(payments):
+    """Comparable frame: plain dtypes, categoricals as strings"""
+    payments = payments[PAYMENT_COLUMNS].reset_index(drop=True)
+    return payments.astype({'payment_method': str, 'payment_status': str, 'transaction_reference': str,
+                            'payment_id': np.int64, 'loan_id': np.int64, 'penalty_amount': np.int64,
+                            'days_early_late': np.int64, 'payment_sequence_number': np.int64,
+                            'payment_date': 'datetime64[s]', 'due_date': 'datetime64[s]'})
+
+
+def _as_of(config):
+    return np.datetime64(config.AS_OF_DATE.date(), 'D')
+
+# =====================================================
+# TESTS
+# =====================================================
+
+def test_engine_matches_reference_loop(loans, config):
+    statuses = set(loans['current_loan_status'])
+    assert {'Active', 'Defaulted'} <= statuses
+
+    payments = build_payment_schedules(loans, config)
+    expected = reference_payments(loans, config, _as_of(config))
+
+    assert len(payments) > 1000
+    pd.testing.assert_frame_equal(_normalized(payments), _normalized(expected))
+
+
+def test_defaulted_loans_stop_in_first_half(loans, config):
+    payments = build_payment_schedules(loans, config)
+    defaulted = loans[loans['current_loan_status'] == 'Defaulted'].set_index('loan_id')
+    assert len(defaulted) > 0
+    last = payments[payments['loan_id'].isin(defaulted.index)].groupby('loan_id')['payment_sequence_number'].max()
+
+    elapsed = (_as_of(config) - defaulted['disbursement_date'].to_numpy().astype('datetime64[D]')).astype(np.int64)
+    months = np.minimum(np.fix(elapsed / config.PAYMENT_RULES['days_between_installments']).astype(np.int64),
+                        defaulted['loan_term_months'].to_numpy())
+    stop = pd.Series(np.maximum(1, months // 2), index=defaulted.index)
+    assert (last >= 1).all()
+    assert (last <= stop[last.index]).all()
+
+
+def test_resume_adds_exactly_the_missing_installments(loans, config):
+    earlier = pd.Timestamp(config.AS_OF_DATE) - pd.DateOffset(months=7)
+    full = build_payment_schedules(loans, config)
+    head = build_payment_schedules(loans, config, as_of_date=earlier)
+    resume = head.sort_values('payment_sequence_number').groupby('loan_id', as_index=False).last()
+    resume = resume[['loan_id', 'payment_sequence_number', 'total_outstanding_principal']]
+
+    tail = build_payment_schedules(loans, config, resume=resume)
+    assert len(tail) > 0 and len(head) > 0
+
+    # Without a resume point a loan starts from its first installment, so only resumed
+    # loans (and loans first disbursed in between) have to line up with the full run
+    combined = pd.concat([head, tail]).sort_values(['loan_id', 'payment_sequence_number'])
+    pd.testing.assert_frame_equal(_normalized(combined), _normalized(full))
+    pd.testing.assert_frame_equal(_normalized(tail),
+                                  _normalized(reference_payments(loans, config, _as_of(config), resume)))
+
+
+def test_summary_covers_the_returned_rows(loans, config):
+    payments, summary = build_payment_schedules(loans, config, summary=True)
+    grouped = payments.groupby('loan_id').agg(last_payment_date=('payment_date', 'max'),
+                                              last_payment_sequence=('payment_sequence_number', 'max'),
+                                              total_paid=('payment_amount', 'sum'),
+                                              last_outstanding_principal=('total_outstanding_principal', 'last'))
+    summary = summary.set_index('loan_id').sort_index()
+    assert list(summary.index) == list(grouped.index)
+    np.testing.assert_array_equal(summary['last_payment_sequence'], grouped['last_payment_sequence'])
+    np.testing.assert_array_equal(summary['last_payment_date'].to_numpy(),
+                                  grouped['last_payment_date'].to_numpy().astype('datetime64[s]'))
+    np.testing.assert_allclose(summary['total_paid'], grouped['total_paid'], atol=0.005)
+    np.testing.assert_array_equal(summary['last_outstanding_principal'], grouped['last_outstanding_principal'])
@@ -0,0 +1,99 @@
+# =====================================================
+# EduFin Credit Solutions - Native BCP Round-Trip Tests
+# encode_native_rows / export_native_table against read_native_file
+# =====================================================
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import local_backend
+from bcp_export import encode_native_rows, export_native_table, format_file_xml, read_native_file
+from edufin_config import EduFinDataConfig
+from table_schemas import TABLE_SCHEMAS
+
+SCHEMA = {
+    'target_table': 'sample_round_trip',
+    'clustered_key': 'row_id',
+    'columns': [
+        ('row_id', 'BIGINT'),
+        ('count_value', 'INT'),
+        ('small_value', 'TINYINT'),
+        ('amount', 'DECIMAL(15,2)'),
+        ('ratio', 'FLOAT'),
+        ('event_date', 'DATE'),
+        ('label', 'VARCHAR(50)'),
+        ('status', 'VARCHAR(20)')
+    ]
+}
+
+
+def _frame():
+    return pd.DataFrame({
+        'row_id': np.arange(1, 7, dtype=np.int64),
+        'count_value': [1, -2, np.nan, 2 ** 31 - 1, 0, 5],     # an integer column with a NULL is float
+        'small_value': np.array([0, 1, 7, 255, 3, 4], dtype=np.int16),
+        'amount': [1250.75, 0.01, np.nan, -99.5, 123456789.12, 0.0],
+        'ratio': [0.5, np.nan, 1e-9, -3.25, 2.0, 1 / 3],
+        'event_date': pd.to_datetime(['2021-03-01', None, '1999-12-31', '2024-02-29', '0001-01-01', '2019-07-15'],
+                                     format='ISO8601').astype('datetime64[s]'),
+        'label': ['Mumbai', None, '', 'Zoë – café', 'emoji 🎓 loan', "O'Brien"],
+        'status': pd.Categorical(['Active', 'Closed', None, 'Active', 'Defaulted', 'Closed'])
+    })
+
+
+def _assert_round_trip(expected, decoded, schema):
+    assert list(decoded.columns) == [name for name, _ in schema['columns']]
+    assert len(decoded) == len(expected)
+    for name, sql_type in schema['columns']:
+        want, got = expected[name].reset_index(drop=True), decoded[name]
+        assert (want.isna().to_numpy() == got.isna().to_numpy()).all(), name
+        present = want.notna().to_numpy()
+        if sql_type == 'DATE':
+            np.testing.assert_array_equal(pd.to_datetime(got[present]).to_numpy().astype('datetime64[D]'),
+                                          want[present].to_numpy().astype('datetime64[D]'))
+        elif sql_type.startswith(('VARCHAR', 'NVARCHAR')):
+            assert list(got[present]) == [str(value) for value in want[present]], name
+        else:
+            np.testing.assert_array_equal(got[present].astype(float), want[present].astype(float), err_msg=name)
+
+# =====================================================
+# TESTS
+# =====================================================
+
+def test_encoded_rows_decode_to_the_source(tmp_path):
+    path = tmp_path / "rows.dat"
+    path.write_bytes(encode_native_rows(_frame(), SCHEMA))
+    _assert_round_trip(_frame(), read_native_file(str(path), SCHEMA), SCHEMA)
+
+
+def test_export_round_trip_across_part_files(tmp_path):
+    table = export_native_table(_frame(), str(tmp_path), 'round_trip', schema=SCHEMA, rows_per_file=4,
+                                batch_rows=3)
+    assert [entry['rows'] for entry in table['files']] == [4, 2]
+    assert table['ordered']
+    assert os.path.exists(table['format_file'])
+
+    decoded = pd.concat([read_native_file(entry['path'], SCHEMA) for entry in table['files']], ignore_index=True)
+    _assert_round_trip(_frame(), decoded, SCHEMA)
+
+
+def test_format_file_declares_every_column():
+    xml = format_file_xml(SCHEMA)
+    for position, (name, _) in enumerate(SCHEMA['columns'], start=1):
+        assert f'NAME="{name}"' in xml and f'FIELD ID="{position}"' in xml
+
+
+@pytest.mark.parametrize("table", ['loans', 'payments'])
+def test_generated_tables_round_trip(tmp_path, table):
+    config = EduFinDataConfig(scale_factor=0.001)
+    loans = local_backend.generate_loans(config, loan_ids=np.arange(1, 51))
+    source = loans if table == 'loans' else local_backend.generate_payments(config, loans)
+    schema = TABLE_SCHEMAS[table]
+
+    exported = export_native_table(source, str(tmp_path), table)
+    decoded = pd.concat([read_native_file(entry['path'], schema) for entry in exported['files']], ignore_index=True)
+    expected = source.sort_values(schema['clustered_key'], kind='stable')[[name for name, _ in schema['columns']]]
+    _assert_round_trip(expected, decoded, schema)
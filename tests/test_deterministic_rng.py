@@ -0,0 +1,148 @@
+# =====================================================
+# EduFin Credit Solutions - Weighted Sampling and Permutation Tests
+# Alias tables, exact quotas and the keyed Feistel permutation
+# =====================================================
+
+import numpy as np
+import pytest
+
+from deterministic_rng import AliasSampler, permutation, sql_permutation, uniform, weighted_sampler
+
+DISTRIBUTIONS = [
+    (['Auto Debit', 'UPI', 'Net Banking', 'Cheque', 'Cash'], [0.4, 0.3, 0.2, 0.08, 0.02]),
+    (['a', 'b', 'c'], [1, 0, 3]),
+    (['only'], [5]),
+    ([f"v{i}" for i in range(37)], list(np.linspace(0.1, 3.7, 37)))
+]
+
+# Non-power-of-two domains exercise the cycle walking
+POPULATIONS = [1, 2, 3, 5, 17, 100, 997, 1000, 1025, 4097]
+
+
+def _alias_mass(sampler):
+    """Exact probability of each value under indices(u) for u ~ U[0, 1)"""
+    count = len(sampler.values)
+    mass = np.zeros(count)
+    for column in range(count):
+        mass[column] += sampler.accept[column] / count
+        mass[sampler.alias[column]] += (1 - sampler.accept[column]) / count
+    return mass
+
+# =====================================================
+# ALIAS TABLE
+# =====================================================
+
+@pytest.mark.parametrize("values, weights", DISTRIBUTIONS)
+def test_alias_table_reproduces_the_weights(values, weights):
+    sampler = AliasSampler(values, weights)
+    expected = np.asarray(weights, dtype=float) / np.sum(weights)
+    np.testing.assert_allclose(_alias_mass(sampler), expected, atol=1e-12)
+
+    # A fine uniform grid lands on each value in proportion to its weight
+    grid = (np.arange(200000) + 0.5) / 200000
+    observed = np.bincount(sampler.indices(grid), minlength=len(values)) / len(grid)
+    np.testing.assert_allclose(observed, expected, atol=len(values) / len(grid))
+
+
+def test_zero_weights_are_never_drawn():
+    sampler = AliasSampler(['a', 'b', 'c'], [1, 0, 3])
+    drawn = sampler.choice(uniform(7, 'alias_test', np.arange(100000)))
+    assert 'b' not in set(drawn)
+
+
+def test_invalid_weights_are_rejected():
+    for values, weights in [([], []), (['a'], [0]), (['a', 'b'], [1, -1]), (['a', 'b'], [1])]:
+        with pytest.raises(ValueError):
+            AliasSampler(values, weights)
+
+
+def test_weighted_sampler_is_shared():
+    assert weighted_sampler(['x', 'y'], [1, 2]) is weighted_sampler(['x', 'y'], [1.0, 2.0])
+
+# =====================================================
+# EXACT QUOTAS
+# =====================================================
+
+@pytest.mark.parametrize("values, weights", DISTRIBUTIONS)
+@pytest.mark.parametrize("rows", [1, 7, 1000, 99991])
+def test_quotas_sum_to_rows_within_one_of_the_target(values, weights, rows):
+    sampler = AliasSampler(values, weights)
+    quotas = sampler.quotas(rows)
+    assert quotas.sum() == rows
+    assert np.all(np.abs(quotas - sampler.probabilities * rows) < 1)
+
+
+@pytest.mark.parametrize("population", [997, 1000, 4097])
+def test_exact_hits_the_quotas_and_composes_across_shards(population):
+    sampler = AliasSampler(*DISTRIBUTIONS[0])
+    ids = np.arange(1, population + 1)
+    drawn = sampler.exact(42, 'exact_test', ids, population)
+
+    counts = [int((drawn == value).sum()) for value in sampler.values]
+    assert counts == list(sampler.quotas(population))
+
+    # Values depend only on the id, so shards generated apart give the same table
+    shards = np.array_split(ids, 5)
+    np.testing.assert_array_equal(
+        np.concatenate([sampler.exact(42, 'exact_test', shard, population) for shard in shards]), drawn)
+
+# =====================================================
+# KEYED PERMUTATION
+# =====================================================
+
+@pytest.mark.parametrize("population", POPULATIONS)
+def test_permutation_is_a_bijection(population):
+    ranks = permutation(3, 'perm_test', np.arange(population), population)
+    np.testing.assert_array_equal(np.sort(ranks), np.arange(population))
+
+
+def test_permutation_depends_on_seed_and_stream():
+    positions = np.arange(1000)
+    base = permutation(3, 'perm_test', positions, 1000)
+    assert not np.array_equal(base, positions)
+    assert not np.array_equal(base, permutation(4, 'perm_test', positions, 1000))
+    assert not np.array_equal(base, permutation(3, 'other_stream', positions, 1000))
+    np.testing.assert_array_equal(base[::7], permutation(3, 'perm_test', positions[::7], 1000))
+
+
+def test_permutation_rejects_positions_outside_the_domain():
+    with pytest.raises(ValueError):
+        permutation(3, 'perm_test', [0, 10], 10)
+
+# =====================================================
+# SPARK SQL EXPRESSIONS (run where pyspark is installed)
+# =====================================================
+
+@pytest.fixture(scope="module")
+def spark():
+    pytest.importorskip("pyspark")
+    from pyspark.sql import SparkSession
+
+    session = SparkSession.builder.master("local[1]").appName("edufin-rng-tests").getOrCreate()
+    yield session
+    session.stop()
+
+
+@pytest.mark.parametrize("values, weights", DISTRIBUTIONS)
+def test_sql_choice_matches_numpy_for_the_same_uniforms(spark, values, weights):
+    import pandas as pd
+    from pyspark.sql.functions import expr
+
+    sampler = AliasSampler(values, weights)
+    u = uniform(11, 'sql_alias', np.arange(5000))
+    df = spark.createDataFrame(pd.DataFrame({'u': u}))
+    picked = [row[0] for row in df.select(expr(sampler.sql('u'))).collect()]
+    assert picked == list(sampler.choice(u))
+
+
+@pytest.mark.parametrize("population", [5, 997, 1025])
+def test_sql_permutation_and_exact_quotas(spark, population):
+    from pyspark.sql.functions import expr
+
+    sampler = AliasSampler(*DISTRIBUTIONS[0])
+    df = spark.range(1, population + 1)
+    ranks = [row[0] for row in df.select(expr(sql_permutation(42, 'exact_test', "(id - 1)", population))).collect()]
+    assert sorted(ranks) == list(range(population))
+
+    drawn = [row[0] for row in df.select(expr(sampler.sql_exact(42, 'exact_test', 'id', population))).collect()]
+    assert [drawn.count(value) for value in sampler.values] == list(sampler.quotas(population))
@@ -0,0 +1,117 @@
+# =====================================================
+# EduFin Credit Solutions - Referential Integrity Tests
+# KeyBitmap membership and orphan detection on a fixture with known orphans
+# =====================================================
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from referential_integrity import KeyBitmap, check_integrity
+from table_schemas import TABLE_DIRECTORIES, write_parquet_frame
+
+# Key columns only: the checker reads nothing else
+FIXTURE = {
+    'institutions': pd.DataFrame({'institution_id': [1, 2, 3, 4]}),
+    'customers': pd.DataFrame({'customer_id': [1, 2, 3, 5, 8, 8]}),  # 8 appears twice
+    'loans': pd.DataFrame({'loan_id': [10, 11, 12, 13, 14, 15],
+                           'customer_id': [1, 2, 99, 5, 4, np.nan],   # 99 and 4 are not customers
+                           'institution_id': [1, 4, 2, 50, 3, 3]}),   # 50 is not an institution
+    'payments': pd.DataFrame({'payment_id': [1, 2, 3, 4, 5],
+                              'loan_id': [10, 10, 77, 15, 16]}),      # 77 and 16 are not loans
+    'defaults': pd.DataFrame({'loan_id': [12, 88]})                   # 88 is not a loan
+}
+
+EXPECTED_ORPHANS = {
+    ('loans', 'customer_id'): [99, 4],
+    ('loans', 'institution_id'): [50],
+    ('payments', 'loan_id'): [77, 16],
+    ('defaults', 'loan_id'): [88]
+}
+
+
+def _write_csv_samples(root):
+    for table, frame in FIXTURE.items():
+        frame.to_csv(os.path.join(root, f"sample_{table}.csv"), index=False)
+
+
+def _write_parquet_parts(root):
+    # Two part files per table, so orphans and duplicates are found across files
+    for table, frame in FIXTURE.items():
+        directory = os.path.join(root, TABLE_DIRECTORIES[table])
+        os.makedirs(directory)
+        half = (len(frame) + 1) // 2
+        for part, rows in enumerate([frame.iloc[:half], frame.iloc[half:]]):
+            write_parquet_frame(rows.reset_index(drop=True), os.path.join(directory, f"part-{part:05d}.parquet"))
+
+# =====================================================
+# KEY BITMAP
+# =====================================================
+
+def test_bitmap_membership_and_growth_in_both_directions():
+    bitmap = KeyBitmap.from_keys([100, 103, 250])
+    bitmap.add([7, 5000])  # grows below and above the first range
+    keys = np.array([-1, 5, 7, 100, 101, 103, 250, 4999, 5000, 5001])
+    np.testing.assert_array_equal(bitmap.contains(keys),
+                                  [False, False, True, True, False, True, True, False, True, False])
+    assert bitmap.count == 5
+    assert bitmap.duplicates == 0
+
+
+def test_bitmap_counts_duplicates_within_and_across_batches():
+    bitmap = KeyBitmap.from_keys([1, 2, 2, 3])
+    bitmap.add([3, 4])
+    assert bitmap.count == 4
+    assert bitmap.duplicates == 2
+
+
+def test_empty_bitmap_contains_nothing():
+    assert not KeyBitmap().contains([0, 1, 2]).any()
+
+# =====================================================
+# ORPHAN DETECTION
+# =====================================================
+
+@pytest.mark.parametrize("layout", [_write_csv_samples, _write_parquet_parts])
+def test_check_integrity_finds_the_known_orphans(tmp_path, layout):
+    layout(str(tmp_path))
+    report = check_integrity(str(tmp_path), batch_rows=2)
+
+    assert not report['passed']
+    assert report['tables']['customers']['duplicate_keys'] == 1
+    assert report['tables']['customers']['distinct_keys'] == 5
+
+    found = {(check['child'], check['column']): check for check in report['foreign_keys']}
+    assert set(found) == set(EXPECTED_ORPHANS)
+    for key, orphans in EXPECTED_ORPHANS.items():
+        assert found[key]['checked']
+        assert found[key]['orphans'] == len(orphans)
+        assert found[key]['sample_orphans'] == orphans
+    assert found[('loans', 'customer_id')]['nulls'] == 1
+
+
+def test_check_integrity_passes_a_consistent_dataset(tmp_path):
+    # The fixture with every missing parent added and the duplicate customer removed
+    parents = {
+        'institutions': pd.DataFrame({'institution_id': [1, 2, 3, 4, 50]}),
+        'customers': pd.DataFrame({'customer_id': [1, 2, 3, 4, 5, 8, 99]}),
+        'loans': pd.concat([FIXTURE['loans'], pd.DataFrame({'loan_id': [16, 77, 88], 'customer_id': [1, 2, 3],
+                                                            'institution_id': [1, 2, 3]})], ignore_index=True)
+    }
+    for table, frame in dict(FIXTURE, **parents).items():
+        frame.to_csv(os.path.join(tmp_path, f"sample_{table}.csv"), index=False)
+
+    report = check_integrity(str(tmp_path))
+    assert report['passed']
+    assert all(check['checked'] and check['orphans'] == 0 for check in report['foreign_keys'])
+
+
+def test_missing_parent_tables_are_reported_unchecked(tmp_path):
+    FIXTURE['payments'].to_csv(os.path.join(tmp_path, "sample_payments.csv"), index=False)
+    report = check_integrity(str(tmp_path))
+    found = {(check['child'], check['column']): check for check in report['foreign_keys']}
+    assert not found[('payments', 'loan_id')]['checked']
+    assert report['tables']['loans'] == {'files': 0}
+    assert report['tables']['payments']['rows'] == len(FIXTURE['payments'])